@@ -10,12 +10,12 @@ import json
 import asyncio
 import subprocess
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, File, UploadFile
+from fastapi import FastAPI, HTTPException, File, UploadFile, Header, WebSocket, WebSocketDisconnect, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import uvicorn
@@ -29,10 +29,19 @@ from main import (
     call_openai_api,
     process_scenes_phase2,
     process_scenes_phase3,
+    process_scenes_pipeline,
     render_videos,
     combine_videos,
     save_scene_map
 )
+from job_store import get_job_store, new_job_id
+from render_profiles import get_render_profile
+from hls_stream import HLS_DIR_NAME, PLAYLIST_NAME, get_hls_mode
+from workspace import create_workspace, workspace_path
+from job_scheduler import JobScheduler, SchedulerFull, get_priority_class
+from job_events import KEEPALIVE_SECONDS, make_event_publisher, poll_job_events, format_sse, get_poll_interval
+from schemas import schema_for
+from lesson_batch import normalize_batch_items, load_finished_ids, run_batch
 
 app = FastAPI(
     title="Study Sage API",
@@ -55,6 +64,7 @@ class LessonRequest(BaseModel):
     complexity: str = "intermediate"
     depth: str = "detailed"
     style: str = "clean and modern"
+    priority: Optional[str] = None
 
 class Phase2Request(BaseModel):
     scene_data: Dict[str, Any]
@@ -64,15 +74,77 @@ class Phase3Request(BaseModel):
 
 class RenderRequest(BaseModel):
     phase3_data: Dict[str, Any]
+    preview: Optional[bool] = None
+    profile: Optional[str] = None
+    hls: Optional[bool] = None
+    priority: Optional[str] = None
 
-# Global variables for tracking jobs
-active_jobs: Dict[str, Dict[str, Any]] = {}
+class BatchRequest(BaseModel):
+    topics: List[Union[str, Dict[str, Any]]]
+    render: bool = False
+    profile: Optional[str] = None
+    priority: Optional[str] = "batch"
+    resume: Optional[str] = None
 
 # Create output directories
 OUTPUT_DIR = Path("outputs")
 OUTPUT_DIR.mkdir(exist_ok=True)
 STATIC_DIR = OUTPUT_DIR / "static"
 STATIC_DIR.mkdir(exist_ok=True)
+# Each render job writes its code, media and videos into its own workspace under here
+WORKSPACE_DIR = Path(os.getenv("WORKSPACE_ROOT", str(OUTPUT_DIR / "jobs")))
+
+# Job state lives in a shared store so it survives restarts and works across workers
+job_store = get_job_store(str(OUTPUT_DIR / "jobs.sqlite"))
+
+# Blocking work (LLM calls, pipeline runs, Manim renders) is queued on the scheduler's
+# worker threads so the event loop only ever serves requests. Threads rather than processes
+# so the shared LLM client and caches are reused; Manim already renders in subprocesses.
+# Interactive work runs before batch work, and users take turns within each class.
+scheduler = JobScheduler({
+    "generation": int(os.getenv("GENERATION_WORKERS", 4)),
+    "render": int(os.getenv("RENDER_JOB_WORKERS", 1))
+})
+
+def get_user(http_request: Request, x_user_id: Optional[str] = Header(default=None)) -> str:
+    """
+    Identify who a request is scheduled for: the X-User-Id header, else the client address
+    """
+    if x_user_id:
+        return x_user_id
+    return http_request.client.host if http_request.client else "anonymous"
+
+def resolve_priority(priority: Optional[str]) -> str:
+    """
+    Validate a request's priority class, rejecting unknown ones with a 400
+    """
+    try:
+        return get_priority_class(priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def busy_error(e: SchedulerFull) -> HTTPException:
+    """
+    Turn a rejected job into a 429 that tells the client when to retry
+    """
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def run_in_worker(kind: str, user: str, priority_class: str, func, *args, **kwargs):
+    """
+    Run a blocking function on the scheduler without blocking the event loop
+    """
+    try:
+        future = scheduler.submit(kind, func, *args, user=user, priority_class=priority_class, **kwargs)
+    except SchedulerFull as e:
+        raise busy_error(e)
+    return await asyncio.wrap_future(future)
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    """
+    Stop accepting queued work when the server shuts down
+    """
+    scheduler.shutdown(cancel_pending=True)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
@@ -88,48 +160,48 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "scheduler": scheduler.stats()
     }
 
 @app.post("/api/lessons/generate")
-async def generate_lesson(request: LessonRequest, background_tasks: BackgroundTasks):
+async def generate_lesson(request: LessonRequest, user: str = Depends(get_user)):
     """
     Generate a complete lesson with all phases
     """
-    job_id = f"lesson_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    priority_class = resolve_priority(request.priority)
+    job_id = new_job_id("lesson")
     
     try:
         # Initialize job tracking
-        active_jobs[job_id] = {
-            "status": "processing",
-            "phase": "phase1",
-            "progress": 0,
-            "result": None,
-            "error": None
-        }
+        job_store.create(job_id, status="processing", phase="queued")
         
-        # Start background processing
-        background_tasks.add_task(process_lesson_background, job_id, request)
+        # Queue background processing on the generation workers
+        try:
+            scheduler.submit("generation", process_lesson_background, job_id, request, user=user, priority_class=priority_class)
+        except SchedulerFull as e:
+            job_store.update(job_id, status="error", error=str(e))
+            raise busy_error(e)
         
         return {
             "success": True,
             "job_id": job_id,
             "message": "Lesson generation started",
-            "status_url": f"/api/jobs/{job_id}"
+            "status_url": f"/api/jobs/{job_id}",
+            "events_url": f"/api/jobs/{job_id}/events"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        active_jobs[job_id] = {
-            "status": "error",
-            "phase": "phase1",
-            "progress": 0,
-            "result": None,
-            "error": str(e)
-        }
+        if job_store.get(job_id) is None:
+            job_store.create(job_id, status="error", phase="phase1", error=str(e))
+        else:
+            job_store.update(job_id, status="error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/lessons/phase1")
-async def generate_phase1(request: LessonRequest):
+async def generate_phase1(request: LessonRequest, user: str = Depends(get_user)):
     """
     Generate Phase 1: Basic scene mapping
     """
@@ -143,7 +215,7 @@ async def generate_phase1(request: LessonRequest):
         prompt = generate_scene_prompt(request.topic)
         
         # Call OpenAI API
-        response = call_openai_api(prompt, api_key)
+        response = await run_in_worker("generation", user, resolve_priority(request.priority), call_openai_api, prompt, api_key, schema=schema_for(1))
         
         # Parse JSON response
         try:
@@ -162,11 +234,13 @@ async def generate_phase1(request: LessonRequest):
             "message": "Phase 1 completed successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/lessons/phase2")
-async def generate_phase2(request: Phase2Request):
+async def generate_phase2(request: Phase2Request, user: str = Depends(get_user)):
     """
     Generate Phase 2: Detailed script generation
     """
@@ -177,7 +251,7 @@ async def generate_phase2(request: Phase2Request):
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
         # Process Phase 2
-        phase2_data = process_scenes_phase2(request.scene_data, api_key)
+        phase2_data = await run_in_worker("generation", user, "interactive", process_scenes_phase2, request.scene_data, api_key)
         
         return {
             "success": True,
@@ -185,11 +259,13 @@ async def generate_phase2(request: Phase2Request):
             "message": "Phase 2 completed successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/lessons/phase3")
-async def generate_phase3(request: Phase3Request):
+async def generate_phase3(request: Phase3Request, user: str = Depends(get_user)):
     """
     Generate Phase 3: Manim code generation
     """
@@ -200,7 +276,7 @@ async def generate_phase3(request: Phase3Request):
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
         
         # Process Phase 3
-        phase3_data = process_scenes_phase3(request.scene_data, api_key)
+        phase3_data = await run_in_worker("generation", user, "interactive", process_scenes_phase3, request.scene_data, api_key)
         
         return {
             "success": True,
@@ -208,44 +284,108 @@ async def generate_phase3(request: Phase3Request):
             "message": "Phase 3 completed successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/lessons/render")
-async def render_lesson_videos(request: RenderRequest, background_tasks: BackgroundTasks):
+async def render_lesson_videos(request: RenderRequest, user: str = Depends(get_user)):
     """
     Render videos for the lesson
     """
-    job_id = f"render_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    try:
+        get_render_profile(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    priority_class = resolve_priority(request.priority)
+    
+    job_id = new_job_id("render")
     
     try:
         # Initialize job tracking
-        active_jobs[job_id] = {
-            "status": "processing",
-            "phase": "rendering",
-            "progress": 0,
-            "result": None,
-            "error": None
-        }
+        job_store.create(job_id, status="processing", phase="queued")
         
-        # Start background processing
-        background_tasks.add_task(render_videos_background, job_id, request.phase3_data)
+        # Queue background processing on the render workers
+        try:
+            scheduler.submit("render", render_videos_background, job_id, request.phase3_data, request.preview, request.profile, request.hls,
+                             user=user, priority_class=priority_class)
+        except SchedulerFull as e:
+            job_store.update(job_id, status="error", error=str(e))
+            raise busy_error(e)
         
-        return {
+        response = {
             "success": True,
             "job_id": job_id,
             "message": "Video rendering started",
-            "status_url": f"/api/jobs/{job_id}"
+            "status_url": f"/api/jobs/{job_id}",
+            "events_url": f"/api/jobs/{job_id}/events"
         }
+        if get_hls_mode(request.hls):
+            # Players can start polling straight away; the playlist grows as scenes render
+            response["playlist_url"] = f"/api/jobs/{job_id}/hls/{PLAYLIST_NAME}"
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
-        active_jobs[job_id] = {
-            "status": "error",
-            "phase": "rendering",
-            "progress": 0,
-            "result": None,
-            "error": str(e)
+        if job_store.get(job_id) is None:
+            job_store.create(job_id, status="error", phase="rendering", error=str(e))
+        else:
+            job_store.update(job_id, status="error", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/lessons/batch")
+async def generate_lesson_batch(request: BatchRequest, user: str = Depends(get_user)):
+    """
+    Generate a lesson for every topic, appending each result to the job's results.jsonl
+
+    Pass resume with an earlier batch job id to rerun it, skipping the topics it completed.
+    """
+    try:
+        items = normalize_batch_items(request.topics)
+        if request.render:
+            get_render_profile(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not items:
+        raise HTTPException(status_code=400, detail="No topics given")
+    priority_class = resolve_priority(request.priority)
+    
+    if request.resume:
+        job_id = request.resume
+        job = job_store.get(job_id)
+        if job is None or not job_id.startswith("batch_"):
+            raise HTTPException(status_code=404, detail="Batch job not found")
+        if job["status"] == "processing":
+            raise HTTPException(status_code=409, detail="Batch job is still running")
+        job_store.update(job_id, status="processing", phase="queued", error=None)
+    else:
+        job_id = new_job_id("batch")
+        job_store.create(job_id, status="processing", phase="queued")
+    
+    try:
+        try:
+            # A batch is mostly LLM calls, so it holds a generation worker; its renders
+            # share the render workers at BATCH_PRIORITY, behind every render job's
+            scheduler.submit("generation", process_batch_background, job_id, items, request.render, request.profile, user=user, priority_class=priority_class)
+        except SchedulerFull as e:
+            job_store.update(job_id, status="error", error=str(e))
+            raise busy_error(e)
+        
+        return {
+            "success": True,
+            "job_id": job_id,
+            "message": f"Batch of {len(items)} lessons started",
+            "status_url": f"/api/jobs/{job_id}",
+            "events_url": f"/api/jobs/{job_id}/events",
+            "results_url": f"/api/jobs/{job_id}/files/results.jsonl"
         }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        job_store.update(job_id, status="error", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/jobs/{job_id}")
@@ -253,10 +393,98 @@ async def get_job_status(job_id: str):
     """
     Get the status of a background job
     """
-    if job_id not in active_jobs:
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return active_jobs[job_id]
+    return job
+
+async def job_events(job_id: str, after: int):
+    """
+    Yield a job's events as they are recorded, ending once the job has finished
+
+    Yields None when there has been nothing to send for KEEPALIVE_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    interval = get_poll_interval()
+    state = None
+    idle = 0.0
+    while True:
+        events, after, state, done = await loop.run_in_executor(None, poll_job_events, job_store, job_id, after, state)
+        for event in events:
+            yield event
+        if done:
+            return
+        idle = 0.0 if events else idle + interval
+        if idle >= KEEPALIVE_SECONDS:
+            idle = 0.0
+            yield None
+        await asyncio.sleep(interval)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, after: int = 0, last_event_id: Optional[str] = Header(default=None)):
+    """
+    Stream a job's progress as server-sent events
+
+    Reconnecting clients resume after the Last-Event-ID header (or ?after=).
+    """
+    if job_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+    
+    async def stream():
+        async for event in job_events(job_id, after):
+            yield ": keep-alive\n\n" if event is None else format_sse(event)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/api/jobs/{job_id}/ws")
+async def job_events_websocket(websocket: WebSocket, job_id: str, after: int = 0):
+    """
+    Push a job's progress events over a WebSocket as JSON messages, closing once the job has finished
+    """
+    await websocket.accept()
+    try:
+        async for event in job_events(job_id, after):
+            if event is not None:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/jobs/{job_id}/files/{file_path:path}")
+async def get_job_file(job_id: str, file_path: str):
+    """
+    Serve a file from a render job's workspace, such as a scene video named in a render_finish event
+    """
+    try:
+        root = Path(workspace_path(job_id, str(WORKSPACE_DIR))).resolve()
+    except ValueError:
+        raise HTTPException(status_code=404, detail="File not found")
+    full_path = (root / file_path).resolve()
+    if root not in full_path.parents or not full_path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    return FileResponse(path=str(full_path), filename=full_path.name)
+
+@app.get("/api/jobs/{job_id}/hls/{filename}")
+async def get_hls_file(job_id: str, filename: str):
+    """
+    Serve a render job's growing lesson playlist and its segments
+    """
+    if filename != Path(filename).name:
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        file_path = Path(workspace_path(job_id, str(WORKSPACE_DIR))) / HLS_DIR_NAME / filename
+    except ValueError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not file_path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    if filename.endswith(".m3u8"):
+        # The playlist changes as scenes finish, so players must always refetch it
+        return FileResponse(path=str(file_path), media_type="application/vnd.apple.mpegurl", headers={"Cache-Control": "no-cache"})
+    return FileResponse(path=str(file_path), media_type="video/mp2t")
 
 @app.get("/api/files/{filename}")
 async def download_file(filename: str):
@@ -291,7 +519,7 @@ async def list_files():
     return {"files": files}
 
 # Background task functions
-async def process_lesson_background(job_id: str, request: LessonRequest):
+def process_lesson_background(job_id: str, request: LessonRequest):
     """
     Background task to process a complete lesson
     """
@@ -302,25 +530,21 @@ async def process_lesson_background(job_id: str, request: LessonRequest):
             raise Exception("OpenAI API key not configured")
         
         # Phase 1: Basic scene mapping
-        active_jobs[job_id]["phase"] = "phase1"
-        active_jobs[job_id]["progress"] = 10
+        job_store.update(job_id, phase="phase1", progress=10)
         
         prompt = generate_scene_prompt(request.topic)
-        response = call_openai_api(prompt, api_key)
+        response = call_openai_api(prompt, api_key, schema=schema_for(1))
         scene_data = json.loads(response)
         scene_data["phase"] = 1
         
-        # Phase 2: Detailed scripts
-        active_jobs[job_id]["phase"] = "phase2"
-        active_jobs[job_id]["progress"] = 40
-        
-        phase2_data = process_scenes_phase2(scene_data, api_key)
+        # Phase 2 + Phase 3: each scene moves to code generation as soon as its script is ready
+        job_store.update(job_id, phase="phase2_phase3", progress=40)
         
-        # Phase 3: Manim code generation
-        active_jobs[job_id]["phase"] = "phase3"
-        active_jobs[job_id]["progress"] = 70
+        def update_progress(completed: int, total: int):
+            job_store.update(job_id, progress=40 + int(50 * completed / max(total, 1)))
         
-        phase3_data = process_scenes_phase3(phase2_data, api_key)
+        pipeline_output = process_scenes_pipeline(scene_data, api_key, progress_callback=update_progress, on_event=make_event_publisher(job_store, job_id))
+        phase3_data = pipeline_output["phase3_data"]
         
         # Save results
         output_file = OUTPUT_DIR / f"lesson_{job_id}.json"
@@ -328,43 +552,94 @@ async def process_lesson_background(job_id: str, request: LessonRequest):
             json.dump(phase3_data, f, indent=2, ensure_ascii=False)
         
         # Complete
-        active_jobs[job_id]["status"] = "completed"
-        active_jobs[job_id]["progress"] = 100
-        active_jobs[job_id]["result"] = {
+        job_store.update(job_id, status="completed", progress=100, result={
             "phase3_data": phase3_data,
             "output_file": str(output_file.relative_to(OUTPUT_DIR))
-        }
+        })
         
     except Exception as e:
-        active_jobs[job_id]["status"] = "error"
-        active_jobs[job_id]["error"] = str(e)
+        job_store.update(job_id, status="error", error=str(e))
 
-async def render_videos_background(job_id: str, phase3_data: Dict[str, Any]):
+def render_videos_background(job_id: str, phase3_data: Dict[str, Any], preview: Optional[bool] = None, profile: Optional[str] = None, hls: Optional[bool] = None):
     """
     Background task to render videos
     """
     try:
-        active_jobs[job_id]["progress"] = 20
+        output_dir = create_workspace(job_id, str(WORKSPACE_DIR))
+        
+        def artifact_url(path: str) -> str:
+            return f"/api/jobs/{job_id}/files/{Path(os.path.relpath(path, output_dir)).as_posix()}"
+        
+        playlist_url = f"/api/jobs/{job_id}/hls/{PLAYLIST_NAME}" if get_hls_mode(hls) else None
+        job_store.update(job_id, phase="rendering", progress=20, result={"playlist_url": playlist_url})
+        
+        previewed = False
+        
+        def publish(videos: List[str], quality: str):
+            complete_video = combine_videos(videos, output_dir)
+            job_store.update(job_id, status="completed", progress=100, result={
+                "videos": videos,
+                "complete_video": complete_video,
+                "complete_url": artifact_url(complete_video) if complete_video else None,
+                "video_count": len(videos),
+                "quality": quality,
+                "upgrading": quality == "preview",
+                "playlist_url": playlist_url
+            })
+        
+        def publish_previews(videos: List[str]):
+            # The job completes with its previews; final renders replace them in the background
+            nonlocal previewed
+            previewed = True
+            publish(videos, "preview")
         
         # Render videos
-        videos = render_videos(phase3_data, str(OUTPUT_DIR))
+        videos = render_videos(phase3_data, output_dir, preview=preview, on_preview=publish_previews, profile=profile, hls=hls,
+                               on_event=make_event_publisher(job_store, job_id, artifact_url), on_final=lambda videos: publish(videos, "final"))
+        
+        if not previewed:
+            publish(videos, "final")
+        
+    except Exception as e:
+        job_store.update(job_id, status="error", error=str(e))
+
+def process_batch_background(job_id: str, items: List[Dict[str, Any]], render: bool = False, profile: Optional[str] = None):
+    """
+    Background task to generate a batch of lessons
+    """
+    try:
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise Exception("OpenAI API key not configured")
         
-        active_jobs[job_id]["progress"] = 80
+        output_dir = create_workspace(job_id, str(WORKSPACE_DIR))
+        results_path = os.path.join(output_dir, "results.jsonl")
+        ids = {item["id"] for item in items}
+        finished = len(load_finished_ids(results_path) & ids)
+        job_store.update(job_id, phase="generating", progress=int(100 * finished / len(items)))
         
-        # Combine videos
-        complete_video = combine_videos(videos, str(OUTPUT_DIR))
+        def artifact_url(path: str) -> str:
+            return f"/api/jobs/{job_id}/files/{Path(os.path.relpath(path, output_dir)).as_posix()}"
         
-        active_jobs[job_id]["status"] = "completed"
-        active_jobs[job_id]["progress"] = 100
-        active_jobs[job_id]["result"] = {
-            "videos": videos,
-            "complete_video": complete_video,
-            "video_count": len(videos)
-        }
+        def publish_result(result: Dict[str, Any]):
+            nonlocal finished
+            finished += 1
+            data = dict(result)
+            if data.get("complete_video"):
+                data["url"] = artifact_url(data["complete_video"])
+            job_store.add_event(job_id, "lesson_finish", data)
+            job_store.update(job_id, progress=int(100 * finished / len(items)))
+        
+        # Each lesson gets its own workspace inside the batch's, so its files are served under the job
+        summary = run_batch(items, results_path, api_key, render=render, profile=profile,
+                            workspace_root=os.path.join(output_dir, "lessons"), on_result=publish_result)
+        summary["results_path"] = os.path.relpath(results_path, output_dir)
+        summary["results_url"] = f"/api/jobs/{job_id}/files/results.jsonl"
+        
+        job_store.update(job_id, status="completed", progress=100, result=summary)
         
     except Exception as e:
-        active_jobs[job_id]["status"] = "error"
-        active_jobs[job_id]["error"] = str(e)
+        job_store.update(job_id, status="error", error=str(e))
 
 if __name__ == "__main__":
     # Load environment variables
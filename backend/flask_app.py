@@ -7,13 +7,11 @@ Exposes Python Manim generation capabilities to React frontend
 import os
 import sys
 import json
-import threading
 import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 
 # Add the py_par directory to the Python path
@@ -23,23 +21,44 @@ sys.path.append(str(Path(__file__).parent.parent / "py_par"))
 from main import (
     generate_scene_prompt,
     call_openai_api,
-    process_scenes_phase2,
-    process_scenes_phase3,
+    process_scenes_pipeline,
     render_videos,
     combine_videos,
     save_scene_map
 )
+from job_store import get_job_store, new_job_id
+from job_scheduler import JobScheduler, SchedulerFull, get_priority_class
+from job_events import KEEPALIVE_SECONDS, make_event_publisher, poll_job_events, format_sse, get_poll_interval
+from schemas import schema_for
 
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"])
 
-# Global variables for tracking jobs
-active_jobs: Dict[str, Dict[str, Any]] = {}
-
 # Create output directories
 OUTPUT_DIR = Path("outputs")
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Job state lives in a shared store so it survives restarts and works across workers
+job_store = get_job_store(str(OUTPUT_DIR / "jobs.sqlite"))
+
+# Background lessons run on a fixed set of scheduler threads instead of one thread per
+# request; interactive work runs before batch work, and users take turns within each class
+scheduler = JobScheduler({"generation": int(os.getenv("GENERATION_WORKERS", 4))})
+
+def get_user() -> str:
+    """
+    Identify who a request is scheduled for: the X-User-Id header, else the client address
+    """
+    return request.headers.get("X-User-Id") or request.remote_addr or "anonymous"
+
+def busy_response(e: SchedulerFull):
+    """
+    Turn a rejected job into a 429 that tells the client when to retry
+    """
+    response = jsonify({"error": str(e)})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 429
+
 @app.route("/")
 def root():
     """Root endpoint"""
@@ -55,7 +74,8 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "scheduler": scheduler.stats()
     })
 
 @app.route("/api/lessons/generate", methods=["POST"])
@@ -75,31 +95,30 @@ def generate_lesson():
         complexity = data.get("complexity", "intermediate")
         depth = data.get("depth", "detailed")
         style = data.get("style", "clean and modern")
+        try:
+            priority_class = get_priority_class(data.get("priority"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        job_id = f"lesson_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        job_id = new_job_id("lesson")
         
         # Initialize job tracking
-        active_jobs[job_id] = {
-            "status": "processing",
-            "phase": "phase1",
-            "progress": 0,
-            "result": None,
-            "error": None
-        }
+        job_store.create(job_id, status="processing", phase="queued")
         
-        # Start background processing
-        thread = threading.Thread(
-            target=process_lesson_background,
-            args=(job_id, topic, complexity, depth, style)
-        )
-        thread.daemon = True
-        thread.start()
+        # Queue background processing on the generation workers
+        try:
+            scheduler.submit("generation", process_lesson_background, job_id, topic, complexity, depth, style,
+                             user=get_user(), priority_class=priority_class)
+        except SchedulerFull as e:
+            job_store.update(job_id, status="error", error=str(e))
+            return busy_response(e)
         
         return jsonify({
             "success": True,
             "job_id": job_id,
             "message": "Lesson generation started",
-            "status_url": f"/api/jobs/{job_id}"
+            "status_url": f"/api/jobs/{job_id}",
+            "events_url": f"/api/jobs/{job_id}/events"
         })
         
     except Exception as e:
@@ -131,8 +150,17 @@ def generate_phase1():
         # Generate prompt
         prompt = generate_scene_prompt(topic)
         
-        # Call OpenAI API
-        response = call_openai_api(prompt, api_key)
+        try:
+            priority_class = get_priority_class(data.get("priority"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Call OpenAI API on the generation workers, so it counts against the same in-flight limit
+        try:
+            response = scheduler.submit("generation", call_openai_api, prompt, api_key, schema=schema_for(1),
+                                        user=get_user(), priority_class=priority_class).result()
+        except SchedulerFull as e:
+            return busy_response(e)
         
         # Parse JSON response
         try:
@@ -217,10 +245,41 @@ def get_job_status(job_id):
     """
     Get the status of a background job
     """
-    if job_id not in active_jobs:
+    job = job_store.get(job_id)
+    if job is None:
         return jsonify({"error": "Job not found"}), 404
     
-    return jsonify(active_jobs[job_id])
+    return jsonify(job)
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET"])
+def stream_job_events(job_id):
+    """
+    Stream a job's progress as server-sent events
+
+    Reconnecting clients resume after the Last-Event-ID header (or ?after=).
+    """
+    if job_store.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    after = int(last_event_id) if last_event_id.isdigit() else request.args.get("after", 0, type=int)
+    
+    def stream(after: int):
+        interval = get_poll_interval()
+        state = None
+        idle = 0.0
+        while True:
+            events, after, state, done = poll_job_events(job_store, job_id, after, state)
+            for event in events:
+                yield format_sse(event)
+            if done:
+                return
+            idle = 0.0 if events else idle + interval
+            if idle >= KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            time.sleep(interval)
+    
+    return Response(stream_with_context(stream(after)), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # Background task functions
 def process_lesson_background(job_id: str, topic: str, complexity: str, depth: str, style: str):
@@ -234,25 +293,21 @@ def process_lesson_background(job_id: str, topic: str, complexity: str, depth: s
             raise Exception("OpenAI API key not configured")
         
         # Phase 1: Basic scene mapping
-        active_jobs[job_id]["phase"] = "phase1"
-        active_jobs[job_id]["progress"] = 10
+        job_store.update(job_id, phase="phase1", progress=10)
         
         prompt = generate_scene_prompt(topic)
-        response = call_openai_api(prompt, api_key)
+        response = call_openai_api(prompt, api_key, schema=schema_for(1))
         scene_data = json.loads(response)
         scene_data["phase"] = 1
         
-        # Phase 2: Detailed scripts
-        active_jobs[job_id]["phase"] = "phase2"
-        active_jobs[job_id]["progress"] = 40
+        # Phase 2 + Phase 3: each scene moves to code generation as soon as its script is ready
+        job_store.update(job_id, phase="phase2_phase3", progress=40)
         
-        phase2_data = process_scenes_phase2(scene_data, api_key)
+        def update_progress(completed: int, total: int):
+            job_store.update(job_id, progress=40 + int(50 * completed / max(total, 1)))
         
-        # Phase 3: Manim code generation
-        active_jobs[job_id]["phase"] = "phase3"
-        active_jobs[job_id]["progress"] = 70
-        
-        phase3_data = process_scenes_phase3(phase2_data, api_key)
+        pipeline_output = process_scenes_pipeline(scene_data, api_key, progress_callback=update_progress, on_event=make_event_publisher(job_store, job_id))
+        phase3_data = pipeline_output["phase3_data"]
         
         # Save results
         output_file = OUTPUT_DIR / f"lesson_{job_id}.json"
@@ -260,16 +315,13 @@ def process_lesson_background(job_id: str, topic: str, complexity: str, depth: s
             json.dump(phase3_data, f, indent=2, ensure_ascii=False)
         
         # Complete
-        active_jobs[job_id]["status"] = "completed"
-        active_jobs[job_id]["progress"] = 100
-        active_jobs[job_id]["result"] = {
+        job_store.update(job_id, status="completed", progress=100, result={
             "phase3_data": phase3_data,
             "output_file": str(output_file.relative_to(OUTPUT_DIR))
-        }
+        })
         
     except Exception as e:
-        active_jobs[job_id]["status"] = "error"
-        active_jobs[job_id]["error"] = str(e)
+        job_store.update(job_id, status="error", error=str(e))
 
 if __name__ == "__main__":
     # Load environment variables
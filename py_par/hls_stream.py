@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Growing HLS playlist for a lesson
+Each scene video is cut into MPEG-TS segments (stream copy, no re-encode) as soon
+as it has rendered, and the lesson playlist is extended in scene order, so
+playback can start once the first scene is ready. The target duration is fixed
+when the playlist is created, as EVENT playlists require; a scene whose keyframes
+are too far apart for it is re-encoded with forced keyframes
+"""
+
+import math
+import os
+import shutil
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SEGMENT_SECONDS = 6
+# Stream copy can only cut at keyframes, so segments run a little over HLS_SEGMENT_SECONDS
+TARGET_DURATION_MARGIN = 2
+HLS_DIR_NAME = "hls"
+PLAYLIST_NAME = "lesson.m3u8"
+
+def get_hls_mode(hls: Optional[bool] = None) -> bool:
+    """
+    Resolve whether to stream scenes into an HLS playlist from the argument or RENDER_HLS env var
+    """
+    if hls is None:
+        hls = os.getenv("RENDER_HLS", "").lower() in ("1", "true", "yes", "on")
+    return hls
+
+def lesson_playlist_path(output_dir: str) -> str:
+    """
+    Where the lesson playlist for an output directory is written
+    """
+    return os.path.join(output_dir, HLS_DIR_NAME, PLAYLIST_NAME)
+
+def segment_video(video_path: str, directory: str, name: str, segment_seconds: float, force_keyframes: bool = False) -> List[Tuple[float, str]]:
+    """
+    Cut a video into HLS segments in directory and return (duration, filename) pairs
+
+    Segments are stream copies cut at the video's own keyframes, unless
+    force_keyframes re-encodes it with a keyframe every segment_seconds.
+    Raises subprocess.CalledProcessError or FileNotFoundError when ffmpeg fails.
+    """
+    scene_playlist = os.path.join(directory, f"{name}.m3u8")
+    for filename in os.listdir(directory):
+        # Leftovers of an earlier attempt at this scene
+        if filename.startswith(f"{name}_") and filename.endswith(".ts"):
+            os.remove(os.path.join(directory, filename))
+    if force_keyframes:
+        codec = ["-c:v", "libx264", "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds:g})", "-c:a", "aac"]
+    else:
+        codec = ["-c", "copy"]
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-i", video_path,
+        *codec,
+        "-f", "hls",
+        "-hls_time", f"{segment_seconds:g}",
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(directory, f"{name}_%03d.ts"),
+        scene_playlist
+    ], check=True, capture_output=True, text=True)
+
+    segments = []
+    duration = None
+    with open(scene_playlist, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",")[0])
+            elif line and not line.startswith("#") and duration is not None:
+                segments.append((duration, os.path.basename(line)))
+                duration = None
+    return segments
+
+class HLSPlaylist:
+    """
+    An EVENT playlist that grows by whole scenes, always in scene order
+
+    Scenes may finish in any order; a scene is published once every scene before
+    it has either been added or skipped. Safe to call from several threads.
+    """
+
+    def __init__(self, output_dir: str, total: int, segment_seconds: Optional[float] = None):
+        self.path = lesson_playlist_path(output_dir)
+        self.directory = os.path.dirname(self.path)
+        self.total = total
+        self.segment_seconds = segment_seconds or float(os.getenv("HLS_SEGMENT_SECONDS", DEFAULT_SEGMENT_SECONDS))
+        # Never changes once written: players stall or reload when an EVENT playlist's target changes
+        self.target_duration = math.ceil(self.segment_seconds + TARGET_DURATION_MARGIN)
+        self._scenes: Dict[int, Optional[List[Tuple[float, str]]]] = {}
+        self._published = 0
+        self._finished = False
+        self._lock = threading.Lock()
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self._write()
+
+    def add_scene(self, index: int, video_path: str) -> bool:
+        """
+        Segment a rendered video (0-based position in the lesson) and publish it when its turn comes
+
+        Returns False, and skips the scene, when it cannot be segmented within
+        the playlist's target duration.
+        """
+        name = f"part_{index:03d}"
+        try:
+            segments = segment_video(video_path, self.directory, name, self.segment_seconds)
+            if not self._fits(segments):
+                print(f"⚠️  {os.path.basename(video_path)} has keyframes over {self.target_duration}s apart, re-encoding it for HLS")
+                segments = segment_video(video_path, self.directory, name, self.segment_seconds, force_keyframes=True)
+                if not self._fits(segments):
+                    raise ValueError(f"segments still longer than the {self.target_duration}s target duration")
+        except (subprocess.CalledProcessError, FileNotFoundError, OSError, ValueError) as e:
+            print(f"⚠️  Could not add {os.path.basename(video_path)} to the HLS playlist: {e}")
+            segments = None
+        with self._lock:
+            self._scenes[index] = segments
+            self._publish()
+        return segments is not None
+
+    def _fits(self, segments: List[Tuple[float, str]]) -> bool:
+        # RFC 8216: every EXTINF, rounded to the nearest integer, must be at most the target
+        return all(round(duration) <= self.target_duration for duration, _ in segments)
+
+    def skip_scene(self, index: int) -> None:
+        """
+        Mark a scene that will never render so later scenes are not held back
+        """
+        with self._lock:
+            self._scenes[index] = None
+            self._publish()
+
+    def finish(self) -> None:
+        """
+        End the playlist; anything not added by now is left out
+        """
+        with self._lock:
+            for index in range(self.total):
+                self._scenes.setdefault(index, None)
+            self._finished = True
+            self._publish()
+
+    def _publish(self) -> None:
+        published = self._published
+        while self._published in self._scenes:
+            self._published += 1
+        if self._published != published or self._finished:
+            self._write()
+
+    def _write(self) -> None:
+        scenes = [self._scenes[i] for i in range(self._published) if self._scenes[i]]
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0"
+        ]
+        for n, segments in enumerate(scenes):
+            # Every scene is encoded on its own, so timestamps restart between scenes
+            if n > 0:
+                lines.append("#EXT-X-DISCONTINUITY")
+            for duration, filename in segments:
+                lines += [f"#EXTINF:{duration:.6f},", filename]
+        if self._finished:
+            lines.append("#EXT-X-ENDLIST")
+
+        # Players poll the playlist, so replace it atomically
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
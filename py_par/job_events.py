@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Job event streams
+Pipeline events (LLM calls, validation, renders) are appended to the job
+store's event log, and the backends push them to clients over SSE or a
+WebSocket instead of having every client poll the job status
+"""
+
+import json
+import os
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# How often a stream checks the job store for new events (JOB_EVENTS_POLL_INTERVAL)
+DEFAULT_POLL_INTERVAL = 0.5
+# Idle streams send a comment this often so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+def get_poll_interval() -> float:
+    """
+    Resolve the event stream poll interval in seconds from the JOB_EVENTS_POLL_INTERVAL env var
+    """
+    interval = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", DEFAULT_POLL_INTERVAL))
+    if interval <= 0:
+        raise ValueError(f"JOB_EVENTS_POLL_INTERVAL must be positive, got {interval}")
+    return interval
+
+def make_event_publisher(store, job_id: str, artifact_url: Optional[Callable[[str], Optional[str]]] = None) -> Callable[[str, Dict[str, Any]], None]:
+    """
+    Build an on_event callback that records pipeline events in the job store
+
+    Events with a "video" path also get a "url" from artifact_url, so clients can
+    fetch each scene as soon as it has rendered. Safe to call from any thread.
+    """
+    def publish(event_type: str, data: Dict[str, Any]) -> None:
+        data = dict(data)
+        if artifact_url and data.get("video"):
+            data["url"] = artifact_url(data["video"])
+        store.add_event(job_id, event_type, data)
+    return publish
+
+def poll_job_events(store, job_id: str, after: int, last_state: Optional[Tuple]) -> Tuple[List[Dict[str, Any]], int, Optional[Tuple], bool]:
+    """
+    Collect what a stream should send next: new events after the given id, then a
+    "status" event if status, phase or progress changed since last_state
+
+    Returns (events, last event id, state, done). done is True once the job has
+    finished and every event has been read, or when the job does not exist.
+    """
+    job = store.get(job_id)
+    if job is None:
+        return [{"id": None, "type": "error", "data": {"error": "Job not found"}}], after, last_state, True
+
+    events = store.get_events(job_id, after)
+    if events:
+        after = events[-1]["id"]
+    state = (job["status"], job["phase"], job["progress"])
+    if state != last_state:
+        data = {"status": job["status"], "phase": job["phase"], "progress": job["progress"]}
+        if job["status"] != "processing":
+            data.update(result=job["result"], error=job["error"])
+        events.append({"id": None, "type": "status", "data": data})
+    # A finished job may still have events past the read limit, so only stop once they are drained
+    done = job["status"] != "processing" and not store.get_events(job_id, after, limit=1)
+    return events, after, state, done
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Encode an event as a server-sent event; stored events carry their id so
+    clients can resume with Last-Event-ID
+    """
+    lines = []
+    if event["id"] is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'])}")
+    return "\n".join(lines) + "\n\n"
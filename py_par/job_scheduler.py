@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Job scheduler for the backends
+Background work is queued by kind ("generation", "render") with a fixed number
+of jobs of each kind in flight. Within a kind, interactive jobs run before batch
+jobs, and users take turns so one bulk customer cannot starve everyone else.
+Full queues reject new work instead of growing without bound.
+"""
+
+import itertools
+import os
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Deque, Optional
+
+# Lower runs first; interactive requests are someone waiting on the result
+PRIORITY_CLASSES = {"interactive": 0, "batch": 10}
+DEFAULT_PRIORITY_CLASS = "interactive"
+
+# Queue limits per kind (SCHEDULER_MAX_QUEUED) and per user within a kind (SCHEDULER_MAX_QUEUED_PER_USER)
+DEFAULT_MAX_QUEUED = 100
+DEFAULT_MAX_QUEUED_PER_USER = 20
+# Seconds a rejected client is told to wait before retrying (SCHEDULER_RETRY_AFTER)
+DEFAULT_RETRY_AFTER = 30
+# Workers of each kind that only interactive jobs may use (SCHEDULER_INTERACTIVE_RESERVED), and
+# how many batch jobs of a kind one user may run at once (SCHEDULER_MAX_RUNNING_BATCH_PER_USER);
+# a batch can hold a worker for hours, so running batches must never take every worker
+DEFAULT_INTERACTIVE_RESERVED = 1
+DEFAULT_MAX_RUNNING_BATCH_PER_USER = 1
+
+class SchedulerFull(RuntimeError):
+    """
+    Raised when a job is rejected because its queue, or its user's share of it, is full
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def get_priority_class(name: Optional[str] = None) -> str:
+    """
+    Resolve a priority class name, defaulting to interactive
+
+    Raises ValueError for unknown classes.
+    """
+    name = name or DEFAULT_PRIORITY_CLASS
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class '{name}', expected one of: {', '.join(PRIORITY_CLASSES)}")
+    return name
+
+class JobScheduler:
+    """
+    Fixed worker threads per job kind, fed by priority class and then fair share
+
+    The next job of a kind comes from the best priority class with queued work;
+    within it, from the user with the fewest jobs of that kind running, ties
+    going to whoever was served least recently. Each user's jobs run in the
+    order they were submitted. Jobs of lower classes than interactive leave
+    interactive_reserved workers of their kind free (while the kind has more
+    than that), and each user runs at most max_running_batch_per_user of them.
+    """
+
+    def __init__(self, limits: Dict[str, int], max_queued: Optional[int] = None, max_queued_per_user: Optional[int] = None,
+                 interactive_reserved: Optional[int] = None, max_running_batch_per_user: Optional[int] = None):
+        self.limits = {kind: max(1, limit) for kind, limit in limits.items()}
+        self.max_queued = max_queued or int(os.getenv("SCHEDULER_MAX_QUEUED", DEFAULT_MAX_QUEUED))
+        self.max_queued_per_user = max_queued_per_user or int(os.getenv("SCHEDULER_MAX_QUEUED_PER_USER", DEFAULT_MAX_QUEUED_PER_USER))
+        self.retry_after = int(os.getenv("SCHEDULER_RETRY_AFTER", DEFAULT_RETRY_AFTER))
+        if interactive_reserved is None:
+            interactive_reserved = int(os.getenv("SCHEDULER_INTERACTIVE_RESERVED", DEFAULT_INTERACTIVE_RESERVED))
+        self.interactive_reserved = max(0, interactive_reserved)
+        self.max_running_batch_per_user = max(1, max_running_batch_per_user or int(os.getenv("SCHEDULER_MAX_RUNNING_BATCH_PER_USER", DEFAULT_MAX_RUNNING_BATCH_PER_USER)))
+        self._cond = threading.Condition()
+        # kind -> priority -> user -> jobs in submission order
+        self._queues: Dict[str, Dict[int, Dict[str, Deque[tuple]]]] = {kind: {} for kind in self.limits}
+        self._queued: Counter = Counter()
+        self._queued_by_user: Counter = Counter()
+        self._running: Counter = Counter()
+        self._running_by_user: Counter = Counter()
+        # Running jobs per (kind, priority) and per (kind, priority, user), for the batch caps
+        self._running_by_class: Counter = Counter()
+        self._running_by_class_user: Counter = Counter()
+        self._last_served: Dict[tuple, int] = {}
+        self._ticks = itertools.count()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, args=(kind,), name=f"{kind}-{n}", daemon=True)
+            for kind, limit in self.limits.items() for n in range(limit)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, kind: str, func: Callable, *args, user: str = "anonymous", priority_class: Optional[str] = None, **kwargs) -> Future:
+        """
+        Queue func(*args, **kwargs) as a job of this kind for a user and return its Future
+
+        Raises SchedulerFull when the kind's queue or the user's share of it is
+        full, and ValueError for unknown kinds or priority classes.
+        """
+        if kind not in self.limits:
+            raise ValueError(f"Unknown job kind '{kind}', expected one of: {', '.join(self.limits)}")
+        priority = PRIORITY_CLASSES[get_priority_class(priority_class)]
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            if self._queued[kind] >= self.max_queued:
+                raise SchedulerFull(f"Too many {kind} jobs queued ({self._queued[kind]}), try again later", self.retry_after)
+            if self._queued_by_user[kind, user] >= self.max_queued_per_user:
+                raise SchedulerFull(f"You already have {self._queued_by_user[kind, user]} {kind} jobs queued, try again later", self.retry_after)
+            self._queues[kind].setdefault(priority, {}).setdefault(user, deque()).append((future, func, args, kwargs))
+            self._queued[kind] += 1
+            self._queued_by_user[kind, user] += 1
+            self._cond.notify_all()
+        return future
+
+    def _take(self, kind: str) -> Optional[tuple]:
+        # Called with the lock held; returns (user, priority, job) or None when nothing may start
+        queues = self._queues[kind]
+        top_priority = min(PRIORITY_CLASSES.values())
+        for priority in sorted(queues):
+            users = queues[priority]
+            if priority != top_priority:
+                if self._running_by_class[kind, priority] >= max(1, self.limits[kind] - self.interactive_reserved):
+                    continue
+                users = {u: jobs for u, jobs in users.items() if self._running_by_class_user[kind, priority, u] < self.max_running_batch_per_user}
+            if not users:
+                continue
+            user = min(users, key=lambda u: (self._running_by_user[kind, u], self._last_served.get((kind, u), -1)))
+            users = queues[priority]
+            job = users[user].popleft()
+            if not users[user]:
+                del users[user]
+            self._queued[kind] -= 1
+            self._queued_by_user[kind, user] -= 1
+            if not self._queued_by_user[kind, user]:
+                del self._queued_by_user[kind, user]
+            return user, priority, job
+        return None
+
+    def _work(self, kind: str) -> None:
+        while True:
+            with self._cond:
+                taken = self._take(kind)
+                while taken is None and not self._closed:
+                    self._cond.wait()
+                    taken = self._take(kind)
+                if taken is None:
+                    return
+                user, priority, (future, func, args, kwargs) = taken
+                self._running[kind] += 1
+                self._running_by_user[kind, user] += 1
+                self._running_by_class[kind, priority] += 1
+                self._running_by_class_user[kind, priority, user] += 1
+                self._last_served[kind, user] = next(self._ticks)
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running[kind] -= 1
+                    self._running_by_user[kind, user] -= 1
+                    if not self._running_by_user[kind, user]:
+                        del self._running_by_user[kind, user]
+                    self._running_by_class[kind, priority] -= 1
+                    self._running_by_class_user[kind, priority, user] -= 1
+                    if not self._running_by_class_user[kind, priority, user]:
+                        del self._running_by_class_user[kind, priority, user]
+                    # A batch job held back by the caps may start now
+                    self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queued and running jobs per kind, e.g. for health checks
+        """
+        with self._cond:
+            return {
+                kind: {"limit": limit, "running": self._running[kind], "queued": self._queued[kind]}
+                for kind, limit in self.limits.items()
+            }
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        """
+        Stop the workers once their current jobs finish, cancelling queued jobs unless told otherwise
+        """
+        with self._cond:
+            self._closed = True
+            if cancel_pending:
+                for kind, queues in self._queues.items():
+                    for users in queues.values():
+                        for jobs in users.values():
+                            for future, *_ in jobs:
+                                future.cancel()
+                    queues.clear()
+                self._queued.clear()
+                self._queued_by_user.clear()
+            self._cond.notify_all()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Pluggable job store for the backends
+Replaces the per-process active_jobs dict so job state survives restarts and
+can be shared by several API workers
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+JOB_FIELDS = ("status", "phase", "progress", "result", "error")
+
+def _check_fields(fields: Dict[str, Any]) -> None:
+    # Both stores accept the same fields, so switching JOB_STORE never changes behaviour
+    unknown = set(fields) - set(JOB_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+
+def new_job_id(prefix: str) -> str:
+    """
+    Create a collision-free job id that still sorts and reads by creation time
+    """
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+class MemoryJobStore:
+    """
+    In-process job store, only suitable for a single worker
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._next_event_id = 1
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, **fields) -> Dict[str, Any]:
+        _check_fields(fields)
+        job = {"status": "processing", "phase": None, "progress": 0, "result": None, "error": None}
+        job.update(fields)
+        with self._lock:
+            self._jobs[job_id] = job
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, **fields) -> None:
+        """
+        Update any of status, phase, progress, result and error; unknown job ids are ignored
+        """
+        _check_fields(fields)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def add_event(self, job_id: str, event_type: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            event_id = self._next_event_id
+            self._next_event_id += 1
+            self._events.setdefault(job_id, []).append({"id": event_id, "type": event_type, "time": time.time(), "data": dict(data)})
+            return event_id
+
+    def get_events(self, job_id: str, after: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(event) for event in self._events.get(job_id, []) if event["id"] > after][:limit]
+
+class SQLiteJobStore:
+    """
+    Job store backed by SQLite, shared by every process that opens the same file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                phase TEXT,
+                progress INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                type TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; SQLite serialises writers across processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, **fields) -> Dict[str, Any]:
+        _check_fields(fields)
+        job = {"status": "processing", "phase": None, "progress": 0, "result": None, "error": None}
+        job.update(fields)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, phase, progress, result, error, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, job["status"], job["phase"], job["progress"], json.dumps(job["result"]), job["error"], now, now)
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT status, phase, progress, result, error FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, phase, progress, result, error = row
+        return {
+            "status": status,
+            "phase": phase,
+            "progress": progress,
+            "result": json.loads(result) if result else None,
+            "error": error
+        }
+
+    def update(self, job_id: str, **fields) -> None:
+        """
+        Atomically update any of status, phase, progress, result and error; unknown job ids are ignored
+        """
+        _check_fields(fields)
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*fields.values(), time.time(), job_id)
+            )
+
+    def add_event(self, job_id: str, event_type: str, data: Dict[str, Any]) -> int:
+        """
+        Append an event to a job's event log and return its id, which increases with every event
+        """
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, event_type, json.dumps(data), time.time())
+            )
+        return cursor.lastrowid
+
+    def get_events(self, job_id: str, after: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Read a job's events with an id above after, oldest first
+        """
+        rows = self._conn().execute(
+            "SELECT id, type, data, created_at FROM job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after, limit)
+        ).fetchall()
+        return [{"id": event_id, "type": event_type, "time": created_at, "data": json.loads(data)} for event_id, event_type, data, created_at in rows]
+
+def get_job_store(default_path: str):
+    """
+    Create the job store configured by JOB_STORE ("sqlite" or "memory") and JOB_STORE_PATH
+    """
+    backend = os.getenv("JOB_STORE", "sqlite").lower()
+    if backend == "memory":
+        return MemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore(os.getenv("JOB_STORE_PATH", default_path))
+    raise ValueError(f"Unknown JOB_STORE backend: {backend}")
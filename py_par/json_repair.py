@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Single-pass repairing JSON parser for LLM responses
+Handles code fences and surrounding prose, unescaped newlines and quotes inside
+strings, trailing commas, Python literals and unterminated containers, and
+reports which repairs were applied
+"""
+
+import json
+import re
+from typing import Any, List, Tuple
+
+# Characters that need attention inside a string: quotes, escapes and raw control characters
+_STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+_WHITESPACE = re.compile(r'[\s\x00-\x1f]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_HEX4 = re.compile(r'[0-9a-fA-F]{4}')
+_BARE_WORD = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_CONTROL_ESCAPES = {'\n': '\n', '\r': '\r', '\t': '\t'}
+_LITERALS = {"true": True, "false": False, "null": None}
+_PYTHON_LITERALS = {"True": True, "False": False, "None": None}
+
+# Characters that can start an array item after a comma, used to tell a closing quote from an inner one
+_VALUE_START = set('"{[-0123456789tfnTFN}]')
+# A quoted or bare object key and its colon; in an object value a quote only closes
+# the string before "}" or before a comma and the next key
+_KEY_AHEAD = re.compile(r'(?:"(?:[^"\\\n]|\\.)*"|[A-Za-z_][A-Za-z0-9_]*)[\s\x00-\x1f]*:')
+
+# Repairs that mean the response was cut short rather than merely sloppy
+TRUNCATION_REPAIRS = ("closed_unterminated_strings", "closed_unterminated_containers")
+
+class JSONRepairError(ValueError):
+    """
+    Raised when a response cannot be repaired into JSON
+    """
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.repairs: List[str] = []
+
+    def repair(self, name: str) -> None:
+        if name not in self.repairs:
+            self.repairs.append(name)
+
+    def skip_ws(self) -> None:
+        self.pos = _WHITESPACE.match(self.text, self.pos).end()
+
+    def peek(self) -> str:
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def parse_value(self, container: str = "") -> Any:
+        # container is "object" or "array" for values inside one, which decides how strings end
+        self.skip_ws()
+        char = self.peek()
+        if char == "{":
+            return self.parse_object()
+        if char == "[":
+            return self.parse_array()
+        if char == '"':
+            return self.parse_string(container=container)
+        number = _NUMBER.match(self.text, self.pos)
+        if number:
+            self.pos = number.end()
+            literal = number.group(0)
+            return float(literal) if any(c in literal for c in ".eE") else int(literal)
+        word = _BARE_WORD.match(self.text, self.pos)
+        if word:
+            self.pos = word.end()
+            if word.group(0) in _LITERALS:
+                return _LITERALS[word.group(0)]
+            if word.group(0) in _PYTHON_LITERALS:
+                self.repair("converted_python_literals")
+                return _PYTHON_LITERALS[word.group(0)]
+        raise JSONRepairError(f"Unexpected character {char!r} at position {self.pos}")
+
+    def parse_object(self) -> dict:
+        self.pos += 1
+        result = {}
+        while True:
+            self.skip_ws()
+            char = self.peek()
+            if char == "}":
+                self.pos += 1
+                return result
+            if char == "":
+                self.repair("closed_unterminated_containers")
+                return result
+            if char == ",":
+                # Leading or doubled comma
+                self.repair("removed_extra_commas")
+                self.pos += 1
+                continue
+
+            if char == '"':
+                key = self.parse_string(is_key=True)
+            else:
+                word = _BARE_WORD.match(self.text, self.pos)
+                if not word:
+                    raise JSONRepairError(f"Expected object key at position {self.pos}")
+                self.repair("quoted_bare_keys")
+                key = word.group(0)
+                self.pos = word.end()
+
+            self.skip_ws()
+            if self.peek() != ":":
+                raise JSONRepairError(f"Expected ':' after key {key!r} at position {self.pos}")
+            self.pos += 1
+            result[key] = self.parse_value("object")
+
+            self.skip_ws()
+            char = self.peek()
+            if char == ",":
+                self.pos += 1
+                self.skip_ws()
+                if self.peek() == "}":
+                    self.repair("removed_trailing_commas")
+            elif char == '"':
+                self.repair("inserted_missing_commas")
+            elif char not in ("}", ""):
+                raise JSONRepairError(f"Expected ',' or '}}' at position {self.pos}")
+
+    def parse_array(self) -> list:
+        self.pos += 1
+        result = []
+        while True:
+            self.skip_ws()
+            char = self.peek()
+            if char == "]":
+                self.pos += 1
+                return result
+            if char == "":
+                self.repair("closed_unterminated_containers")
+                return result
+            if char == ",":
+                self.repair("removed_extra_commas")
+                self.pos += 1
+                continue
+
+            result.append(self.parse_value("array"))
+
+            self.skip_ws()
+            char = self.peek()
+            if char == ",":
+                self.pos += 1
+                self.skip_ws()
+                if self.peek() == "]":
+                    self.repair("removed_trailing_commas")
+            elif char in ('"', "{", "["):
+                self.repair("inserted_missing_commas")
+            elif char not in ("]", ""):
+                raise JSONRepairError(f"Expected ',' or ']' at position {self.pos}")
+
+    def is_closing_quote(self, quote_pos: int, is_key: bool, container: str = "") -> bool:
+        # A quote ends the string when what follows it can only come after a complete value
+        text = self.text
+        end = _WHITESPACE.match(text, quote_pos + 1).end()
+        if end >= len(text):
+            return True
+        following = text[end]
+        if is_key:
+            return following == ":"
+        if container == "object":
+            # Code strings are full of '", ' between call arguments, so only the next key counts
+            if following == "}":
+                return True
+            if following == '"':
+                # The next key with its comma missing
+                return _KEY_AHEAD.match(text, end) is not None
+            if following == ",":
+                after_comma = _WHITESPACE.match(text, end + 1).end()
+                return after_comma >= len(text) or text[after_comma] == "}" or _KEY_AHEAD.match(text, after_comma) is not None
+            return False
+        if following in "}]:":
+            return True
+        if following == ",":
+            after_comma = _WHITESPACE.match(text, end + 1).end()
+            return after_comma >= len(text) or text[after_comma] in _VALUE_START
+        return False
+
+    def parse_string(self, is_key: bool = False, container: str = "") -> str:
+        text = self.text
+        self.pos += 1
+        chunks = []
+        while True:
+            match = _STRING_SPECIAL.search(text, self.pos)
+            if match is None:
+                chunks.append(text[self.pos:])
+                self.pos = len(text)
+                self.repair("closed_unterminated_strings")
+                return "".join(chunks)
+
+            index = match.start()
+            chunks.append(text[self.pos:index])
+            char = text[index]
+
+            if char == '"':
+                if self.is_closing_quote(index, is_key, container):
+                    self.pos = index + 1
+                    return "".join(chunks)
+                self.repair("escaped_inner_quotes")
+                chunks.append('"')
+                self.pos = index + 1
+            elif char == "\\":
+                escape = text[index + 1:index + 2]
+                if escape in _ESCAPES:
+                    chunks.append(_ESCAPES[escape])
+                    self.pos = index + 2
+                elif escape == "u" and _HEX4.fullmatch(text, index + 2, index + 6):
+                    code_point = int(text[index + 2:index + 6], 16)
+                    self.pos = index + 6
+                    # Combine UTF-16 surrogate pairs the same way json.loads does
+                    if 0xD800 <= code_point < 0xDC00 and text[self.pos:self.pos + 2] == "\\u" and _HEX4.fullmatch(text, self.pos + 2, self.pos + 6):
+                        low = int(text[self.pos + 2:self.pos + 6], 16)
+                        if 0xDC00 <= low < 0xE000:
+                            code_point = 0x10000 + ((code_point - 0xD800) << 10) + (low - 0xDC00)
+                            self.pos += 6
+                    chunks.append(chr(code_point))
+                else:
+                    # Keep invalid escapes such as LaTeX "\(" as a literal backslash
+                    self.repair("kept_invalid_escapes")
+                    chunks.append("\\")
+                    self.pos = index + 1
+            else:
+                if char in _CONTROL_ESCAPES:
+                    self.repair("escaped_control_characters")
+                    chunks.append(_CONTROL_ESCAPES[char])
+                else:
+                    self.repair("removed_control_characters")
+                self.pos = index + 1
+
+def repair_json(response: str) -> Tuple[Any, List[str]]:
+    """
+    Parse an LLM response as JSON, repairing common mistakes in a single pass
+
+    Returns the parsed value and the list of repairs applied (empty when the
+    response was already valid JSON).
+    """
+    try:
+        return json.loads(response), []
+    except json.JSONDecodeError:
+        pass
+
+    repairs = []
+    start = response.find("{")
+    if start == -1:
+        start = response.find("[")
+    if start == -1:
+        raise JSONRepairError("No JSON object found in response")
+    if start > 0:
+        repairs.append("stripped_code_fence" if "```" in response[:start] else "stripped_leading_text")
+
+    parser = _Parser(response)
+    parser.pos = start
+    parser.repairs = repairs
+    value = parser.parse_value()
+
+    trailing = response[parser.pos:].strip()
+    if trailing and trailing.strip("`").strip():
+        parser.repair("ignored_trailing_text")
+    elif trailing:
+        parser.repair("stripped_code_fence")
+
+    return value, parser.repairs
+
+def is_complete_json(response: str) -> bool:
+    """
+    Check whether a response repairs into JSON without having been cut short
+    """
+    try:
+        _, repairs = repair_json(response)
+    except JSONRepairError:
+        return False
+    return not any(repair in TRUNCATION_REPAIRS for repair in repairs)
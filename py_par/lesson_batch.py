@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Batch lesson generation
+Reads topics from JSONL, generates several lessons at once on one event loop
+(sharing the LLM client, the LLM and render caches and the render threads) and
+appends one JSONL result per topic. Topics already completed in the results
+file are skipped, so an interrupted batch resumes where it stopped:
+
+    python lesson_batch.py topics.jsonl --output results.jsonl
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Set, Union
+
+from dotenv import load_dotenv
+
+from main import DEFAULT_MODEL, generate_lesson_async
+from render_pool import get_render_workers, BATCH_PRIORITY
+from render_profiles import get_render_profile
+from workspace import create_workspace, workspace_path
+
+# Lessons generated at once (BATCH_CONCURRENCY); LLM requests are further bounded by LLM_MAX_CONCURRENCY
+DEFAULT_BATCH_CONCURRENCY = 4
+
+def get_batch_concurrency(concurrency: Optional[int] = None) -> int:
+    """
+    Resolve how many lessons run at once from the argument or BATCH_CONCURRENCY env var
+    """
+    if concurrency is None:
+        concurrency = int(os.getenv("BATCH_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY))
+    return max(1, concurrency)
+
+def batch_item_id(topic: str) -> str:
+    """
+    Stable id for a topic, so a rerun recognises topics it has already finished
+    """
+    return "topic_" + hashlib.sha256(topic.strip().encode("utf-8")).hexdigest()[:12]
+
+def normalize_batch_items(entries: List[Union[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Turn topic strings or {"topic", "id"} objects into batch items with ids
+
+    Raises ValueError for entries without a topic, ids that repeat or ids that
+    cannot name a workspace.
+    """
+    items = []
+    seen = set()
+    for n, entry in enumerate(entries, 1):
+        if not isinstance(entry, (str, dict)):
+            raise ValueError(f"Batch entry {n} must be a topic string or an object, got {type(entry).__name__}")
+        item = {"topic": entry} if isinstance(entry, str) else dict(entry)
+        topic = str(item.get("topic") or "").strip()
+        if not topic:
+            raise ValueError(f"Batch entry {n} has no topic")
+        item["topic"] = topic
+        item["id"] = str(item.get("id") or batch_item_id(topic))
+        workspace_path(item["id"])
+        if item["id"] in seen:
+            raise ValueError(f"Batch entry {n} repeats id {item['id']}")
+        seen.add(item["id"])
+        items.append(item)
+    return items
+
+def load_batch_items(path: str) -> List[Dict[str, Any]]:
+    """
+    Read batch items from a JSONL file of {"topic": ..., "id": ...} objects or plain JSON strings
+
+    Raises ValueError naming the first line that is not valid JSON.
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: {e}") from e
+    return normalize_batch_items(entries)
+
+def load_finished_ids(results_path: str) -> Set[str]:
+    """
+    Ids of the topics a results file records as completed; failed topics are retried
+    """
+    finished = set()
+    if not os.path.exists(results_path):
+        return finished
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; its topic simply runs again
+                continue
+            if result.get("status") == "completed":
+                finished.add(result["id"])
+    return finished
+
+def append_result(results_path: str, result: Dict[str, Any]) -> None:
+    """
+    Append one result line and flush it to disk, so a crash never loses a finished topic
+    """
+    with open(results_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def _end_with_newline(results_path: str) -> None:
+    # After a crash mid-write, start the next result on a fresh line
+    if not os.path.exists(results_path) or os.path.getsize(results_path) == 0:
+        return
+    with open(results_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+async def run_batch_async(items: List[Dict[str, Any]], results_path: str, api_key: str, model: str = DEFAULT_MODEL, render: bool = True, max_workers: int = None, profile: str = None, concurrency: int = None, workspace_root: str = None, on_result: Callable[[Dict[str, Any]], None] = None, render_priority: int = BATCH_PRIORITY) -> Dict[str, Any]:
+    """
+    Generate every item not yet completed in results_path and append a result for each
+
+    Each lesson is written to the workspace named by its id under workspace_root
+    (default WORKSPACE_ROOT). on_result is called with every result as it is
+    appended. Renders run at render_priority, by default BATCH_PRIORITY so that
+    interactive renders sharing the process go first. Returns {"total", "skipped", "completed", "failed", "results_path"}.
+    """
+    if render:
+        # Resolve up front so an unknown profile fails before any LLM call
+        profile = get_render_profile(profile)["name"]
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    _end_with_newline(results_path)
+    finished = load_finished_ids(results_path)
+    pending = [item for item in items if item["id"] not in finished]
+    summary = {"total": len(items), "skipped": len(items) - len(pending), "completed": 0, "failed": 0, "results_path": results_path}
+    print(f"📚 Batch of {len(items)} topics: {summary['skipped']} already done, {len(pending)} to generate")
+
+    semaphore = asyncio.Semaphore(get_batch_concurrency(concurrency))
+    render_executor = ThreadPoolExecutor(max_workers=get_render_workers(max_workers), thread_name_prefix="render") if render else None
+
+    async def run_item(item: Dict[str, Any]) -> None:
+        async with semaphore:
+            start = time.monotonic()
+            output_dir = create_workspace(item["id"], workspace_root)
+            result = {"id": item["id"], "topic": item["topic"], "workspace": output_dir}
+            try:
+                lesson = await generate_lesson_async(item["topic"], api_key, output_dir, model, render, max_workers, profile, render_executor, render_priority)
+                result.update(status="completed", error=None, **lesson)
+                summary["completed"] += 1
+                print(f"✅ {item['topic']}: {lesson['scene_count']} scenes in {time.monotonic() - start:.0f}s")
+            except Exception as e:
+                result.update(status="error", error=str(e))
+                summary["failed"] += 1
+                print(f"❌ {item['topic']}: {e}")
+            result.update(duration=round(time.monotonic() - start, 1), finished_at=datetime.now().isoformat())
+            # Appends happen on the event loop thread, so lines never interleave
+            append_result(results_path, result)
+            if on_result:
+                on_result(result)
+
+    try:
+        await asyncio.gather(*[run_item(item) for item in pending])
+    finally:
+        if render_executor is not None:
+            render_executor.shutdown(wait=False)
+    print(f"📚 Batch finished: {summary['completed']} completed, {summary['failed']} failed, {summary['skipped']} skipped")
+    return summary
+
+def run_batch(items: List[Dict[str, Any]], results_path: str, api_key: str, **kwargs) -> Dict[str, Any]:
+    """
+    Wrapper function to run a batch on a new event loop
+    """
+    return asyncio.run(run_batch_async(items, results_path, api_key, **kwargs))
+
+def main():
+    """
+    Generate lessons for every topic in a JSONL file
+    """
+    parser = argparse.ArgumentParser(description="Generate a batch of Manim lessons from a JSONL file of topics")
+    parser.add_argument("topics", type=str,
+                       help='JSONL file with one {"topic": ..., "id": ...} object or JSON string per line')
+    parser.add_argument("--output", type=str, default=None,
+                       help="JSONL file results are appended to, and resumed from (default: <topics>.results.jsonl)")
+    parser.add_argument("--model", type=str, default=DEFAULT_MODEL,
+                       help=f"OpenAI model to use (default: {DEFAULT_MODEL})")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help="Number of lessons to generate at once (default: BATCH_CONCURRENCY env var or 4)")
+    parser.add_argument("--render-workers", type=int, default=None,
+                       help="Number of scenes to render in parallel across the batch (default: RENDER_WORKERS env var or half the CPU cores)")
+    parser.add_argument("--profile", type=str, default=None,
+                       help="Render profile (default: RENDER_PROFILE env var or standard)")
+    parser.add_argument("--no-render", action="store_true",
+                       help="Stop after Phase 3 code generation")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path="../.env")
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("❌ Error: Please set your OPENAI_API_KEY environment variable.")
+        return
+
+    try:
+        items = load_batch_items(args.topics)
+        results_path = args.output or f"{os.path.splitext(args.topics)[0]}.results.jsonl"
+        run_batch(items, results_path, api_key, model=args.model, render=not args.no_render,
+                  max_workers=args.render_workers, profile=args.profile, concurrency=args.concurrency)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+
+if __name__ == "__main__":
+    main()
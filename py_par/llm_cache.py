@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Content-addressed LLM response cache
+Responses are keyed by a hash of (model, system prompt, user prompt) and stored
+on local disk or in SQLite, with size-bounded LRU eviction and optional TTL
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Eviction trims the cache to this fraction of max_bytes, so a full cache is not rescanned on every write
+EVICT_TO_FRACTION = 0.9
+
+def make_cache_key(model: str, system_prompt: str, prompt: str, response_format: Optional[dict] = None) -> str:
+    """
+    Hash the request contents into a cache key
+    """
+    request = [model, system_prompt, prompt]
+    if response_format is not None:
+        request.append(response_format)
+    payload = json.dumps(request, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SQLiteLLMCache:
+    """
+    LLM response cache stored in a single SQLite database
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+        # Running size of the entries, so writes need not sum the whole table
+        self._total = self._sum_sizes()
+
+    def _sum_sizes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            now = time.time()
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total -= len(response.encode("utf-8"))
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return response
+
+    def set(self, key: str, response: str) -> None:
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self._total += size - (row[0] if row else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until the cache is back under the low-water mark.
+        # Resync the total first, since other processes may share the database
+        total = self._sum_sizes()
+        target = self.max_bytes * EVICT_TO_FRACTION
+        if total > self.max_bytes:
+            victims = []
+            cursor = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC")
+            for key, size in cursor:
+                if total <= target:
+                    break
+                victims.append((key,))
+                total -= size
+            cursor.close()
+            self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        self._total = total
+
+class DiskLLMCache:
+    """
+    LLM response cache stored as one JSON file per entry
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Running size of the entries, so writes need not walk the whole directory
+        self._total = sum(size for _, size, _ in self._scan())
+
+    def _scan(self):
+        # (mtime, size, path) of every entry
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _remove(self, path: str) -> int:
+        # Delete an entry and return the bytes freed
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            entry = None
+        if not isinstance(entry, dict) or not isinstance(entry.get("created_at"), (int, float)) or not isinstance(entry.get("response"), str):
+            # Corrupt or partial entry: a miss, and removed so it is written afresh
+            with self._lock:
+                self._total -= self._remove(path)
+            return None
+        if self.ttl is not None and time.time() - entry["created_at"] > self.ttl:
+            with self._lock:
+                self._total -= self._remove(path)
+            return None
+        # The file's mtime doubles as its last access time for LRU eviction
+        now = time.time()
+        os.utime(path, (now, now))
+        return entry["response"]
+
+    def set(self, key: str, response: str) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per process and thread, as several processes may share LLM_CACHE_PATH
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "response": response}, f, ensure_ascii=False)
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._total += size - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until the cache is back under the low-water mark.
+        # Only now is the directory walked, which also resyncs the total
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO_FRACTION
+        if total > self.max_bytes:
+            for _, _, path in entries:
+                if total <= target:
+                    break
+                total -= self._remove(path)
+        self._total = total
+
+def get_llm_cache():
+    """
+    Create the response cache configured by the environment
+
+    LLM_CACHE: "sqlite" (default), "disk" or "off"
+    LLM_CACHE_PATH: SQLite file or cache directory
+    LLM_CACHE_MAX_MB: size bound for LRU eviction
+    LLM_CACHE_TTL: entry lifetime in seconds (no expiry when unset)
+    """
+    backend = os.getenv("LLM_CACHE", "sqlite").lower()
+    if backend in ("off", "none", "0", "false"):
+        return None
+
+    max_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024)
+    ttl = os.getenv("LLM_CACHE_TTL")
+    ttl = float(ttl) if ttl else None
+
+    if backend == "disk":
+        return DiskLLMCache(os.getenv("LLM_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "llm")), max_bytes, ttl)
+    if backend == "sqlite":
+        return SQLiteLLMCache(os.getenv("LLM_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "llm_cache.sqlite")), max_bytes, ttl)
+    raise ValueError(f"Unknown LLM_CACHE backend: {backend}")
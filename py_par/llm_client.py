@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Shared LLM client layer
+One long-lived, keep-alive connection pool per process with bounded concurrency
+and per-model rate-limit budgets, used by both the sync and async call paths
+"""
+
+import asyncio
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Optional, Tuple
+
+import aiohttp
+
+from llm_cache import get_llm_cache, make_cache_key
+from retry import RetryPolicy, retry_async
+from schemas import SchemaValidationError, response_format, validate_against_schema
+
+OPENAI_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+
+# Maximum number of LLM requests in flight at once (per process)
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Per-model budgets: requests per minute and tokens per minute.
+# Override with the LLM_RATE_LIMITS env var, e.g. '{"gpt-4o": {"rpm": 500, "tpm": 30000}}'
+DEFAULT_RATE_LIMITS = {
+    "default": {"rpm": 500, "tpm": 200000}
+}
+
+# Rough characters-per-token ratio used to reserve budget before the response arrives
+CHARS_PER_TOKEN = 4
+
+class RateLimiter:
+    """
+    Sliding one-minute window of request and token budgets for a single model
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events = deque()  # (timestamp, tokens), one per request
+        self._corrections = deque()  # (timestamp, actual - estimated tokens), only counted against tpm
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        for window in (self._events, self._corrections):
+            while window and now - window[0][0] >= 60:
+                window.popleft()
+
+    def try_acquire(self, tokens: int) -> float:
+        """
+        Reserve budget for one request, or return how long to wait before trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+
+            wait = 0.0
+            if self.rpm and len(self._events) >= self.rpm:
+                wait = max(wait, 60 - (now - self._events[0][0]))
+            if self.tpm:
+                window = list(heapq.merge(self._events, self._corrections))
+                used = sum(t for _, t in window)
+                if used + tokens > self.tpm and window:
+                    # Wait until enough of the window has expired to fit this request
+                    freed = 0
+                    for ts, t in window:
+                        freed += t
+                        if used - freed + tokens <= self.tpm:
+                            wait = max(wait, 60 - (now - ts))
+                            break
+                    else:
+                        wait = max(wait, 60 - (now - window[-1][0]))
+
+            if wait > 0:
+                return wait
+
+            self._events.append((now, tokens))
+            return 0.0
+
+    def record_usage(self, estimated: int, actual: int) -> None:
+        """
+        Correct the token window once the real usage is known, without using up another request
+        """
+        if actual == estimated:
+            return
+        with self._lock:
+            self._corrections.append((time.monotonic(), actual - estimated))
+
+class LLMClient:
+    """
+    Process-wide chat completions client
+
+    All requests run on a dedicated background event loop that owns a single
+    aiohttp session, so connections and TLS sessions are reused across scenes,
+    phases and callers regardless of which thread or event loop they come from.
+    """
+
+    def __init__(self, api_key: str, max_concurrency: Optional[int] = None, rate_limits: Optional[Dict[str, Dict[str, int]]] = None, url: str = OPENAI_CHAT_COMPLETIONS_URL, cache: Any = "env", retry_policy: Optional[RetryPolicy] = None):
+        self.api_key = api_key
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.url = url
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+        self.rate_limits = rate_limits or load_rate_limits()
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._limiters_lock = threading.Lock()
+        # Pass cache=None to disable response caching for this client
+        self.cache = get_llm_cache() if cache == "env" else cache
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _limiter(self, model: str) -> RateLimiter:
+        with self._limiters_lock:
+            if model not in self._limiters:
+                limits = self.rate_limits.get(model) or self.rate_limits.get("default", {})
+                self._limiters[model] = RateLimiter(limits.get("rpm"), limits.get("tpm"))
+            return self._limiters[model]
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        # Only ever called on the client's own loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=120)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _request(self, system_prompt: str, prompt: str, model: str, schema: Optional[Tuple[str, Dict[str, Any]]] = None, validate: Optional[Callable[[str], bool]] = None) -> str:
+        format_spec = response_format(*schema) if schema else None
+
+        # Cache lookups touch disk, so they run off the client loop that every request shares
+        loop = asyncio.get_running_loop()
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(model, system_prompt, prompt, format_spec)
+            cached = await loop.run_in_executor(None, self.cache.get, cache_key)
+            if cached is not None:
+                return cached
+
+        content = await retry_async(lambda: self._send(system_prompt, prompt, model, format_spec), self.retry_policy, f"LLM request ({model})")
+        if schema:
+            # Enforce the schema ourselves as well, so models or servers without
+            # strict structured output support cannot slip malformed payloads through
+            try:
+                errors = validate_against_schema(json.loads(content), schema[1])
+            except json.JSONDecodeError as e:
+                errors = [f"response is not valid JSON: {e}"]
+            if errors:
+                raise SchemaValidationError(f"Response does not match the {schema[0]} schema: {'; '.join(errors[:5])}")
+        # A truncated or unparseable reply is returned but not cached, so a rerun asks again
+        if cache_key is not None and (validate is None or validate(content)):
+            await loop.run_in_executor(None, self.cache.set, cache_key, content)
+        return content
+
+    async def _send(self, system_prompt: str, prompt: str, model: str, format_spec: Optional[Dict[str, Any]] = None) -> str:
+        session = await self._ensure_session()
+
+        estimated_tokens = (len(system_prompt) + len(prompt)) // CHARS_PER_TOKEN
+        limiter = self._limiter(model)
+        while (wait := limiter.try_acquire(estimated_tokens)) > 0:
+            await asyncio.sleep(wait)
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        data = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+        if format_spec:
+            data["response_format"] = format_spec
+
+        async with self._semaphore:
+            timeout = aiohttp.ClientTimeout(total=self.retry_policy.request_timeout)
+            async with session.post(self.url, headers=headers, json=data, timeout=timeout) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    usage = result.get("usage") or {}
+                    limiter.record_usage(estimated_tokens, usage.get("total_tokens", estimated_tokens))
+                    return result["choices"][0]["message"]["content"].strip()
+                error_text = await response.text()
+                raise aiohttp.ClientResponseError(
+                    request_info=response.request_info,
+                    history=response.history,
+                    status=response.status,
+                    message=f"OpenAI API error {response.status}: {error_text}",
+                    headers=response.headers
+                )
+
+    def complete(self, system_prompt: str, prompt: str, model: str, schema: Optional[Tuple[str, Dict[str, Any]]] = None, validate: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Blocking chat completion call, safe to use from any thread
+
+        schema is an optional (name, JSON schema) pair to request structured output.
+        validate is an optional check a response must pass to be cached.
+        """
+        return asyncio.run_coroutine_threadsafe(self._request(system_prompt, prompt, model, schema, validate), self._loop).result()
+
+    async def complete_async(self, system_prompt: str, prompt: str, model: str, schema: Optional[Tuple[str, Dict[str, Any]]] = None, validate: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Async chat completion call, safe to await from any event loop
+
+        schema is an optional (name, JSON schema) pair to request structured output.
+        validate is an optional check a response must pass to be cached.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._request(system_prompt, prompt, model, schema, validate), self._loop)
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        """
+        Close the connection pool and stop the background loop
+        """
+        async def _close():
+            if self._session is not None:
+                await self._session.close()
+        asyncio.run_coroutine_threadsafe(_close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+def load_rate_limits() -> Dict[str, Dict[str, int]]:
+    """
+    Load per-model rate limits from the LLM_RATE_LIMITS env var, falling back to defaults
+    """
+    limits = dict(DEFAULT_RATE_LIMITS)
+    raw = os.getenv("LLM_RATE_LIMITS")
+    if raw:
+        limits.update(json.loads(raw))
+    return limits
+
+_clients: Dict[str, LLMClient] = {}
+_clients_lock = threading.Lock()
+
+def get_llm_client(api_key: str) -> LLMClient:
+    """
+    Get the shared client for an API key, creating it on first use
+    """
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = LLMClient(api_key)
+            _clients[api_key] = client
+        return client
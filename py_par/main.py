@@ -6,20 +6,42 @@ Generates scene-by-scene scripts for educational animations using OpenAI API
 
 import json
 import os
-import re
 import shutil
 import subprocess
+import threading
 import asyncio
 import aiohttp
 import argparse
-from openai import OpenAI
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional
 from dotenv import load_dotenv
 from tqdm.asyncio import tqdm
+from json_repair import repair_json, is_complete_json, JSONRepairError
+from manim_fixer import apply_manim_fixes
+from manim_lint import lint_manim_code
+from llm_client import get_llm_client
+from schemas import schema_for
+from render_cache import RenderCache, get_render_cache
+from render_pool import render_scene, render_scenes, precheck_scene, get_render_workers, get_preview_mode, get_cli_slots, PREVIEW_PRIORITY, FINAL_PRIORITY
+from render_profiles import get_render_profile, get_preview_profile
+from video_concat import concat_videos
+from hls_stream import HLSPlaylist, get_hls_mode
+from render_server import warm_render_server
+from scene_check import load_manim_symbols
+from job_store import new_job_id
+from workspace import create_workspace
 
 # Default OpenAI model to use
 DEFAULT_MODEL = "gpt-5-nano"
 
+# How many times a failing scene is sent back to the model before giving up (SCENE_REPAIR_ATTEMPTS)
+DEFAULT_REPAIR_ATTEMPTS = 2
+
+# System prompts for the sync (Phase 1) and async (Phase 2/3) API calls
+PHASE1_SYSTEM_PROMPT = "You are an expert educational content creator specializing in Manim (Mathematical Animation Engine) animations. You create comprehensive scene-by-scene scripts for educational videos that will be animated using Manim. CRITICAL: Always respond with valid JSON format. Ensure all strings are properly escaped - use \\n for newlines, \\\" for quotes, and avoid control characters. Double-check your JSON syntax before responding."
+
+SCENE_SYSTEM_PROMPT = "You are an expert educational content creator specializing in Manim (Mathematical Animation Engine) animations. You create comprehensive scene-by-scene scripts for educational videos that will be animated using Manim. IMPORTANT: For Phase 2, describe animations in natural English language, NOT code. Focus on what the viewer sees and how elements move and relate to each other. CRITICAL: Always respond with valid JSON format. Ensure all strings are properly escaped - use \\n for newlines, \\\" for quotes, and avoid control characters. Double-check your JSON syntax before responding."
+
 APPROVED_FONTS = ['C059', 'D050000L', 'DejaVu Math TeX Gyre', 'DejaVu Sans', 'DejaVu Sans Mono', 'DejaVu Serif', 'Droid Sans Fallback', 'FreeMono', 'FreeSans', 'FreeSerif', 'Inconsolata', 'Lato', 'Liberation Mono', 'Liberation Sans', 'Liberation Serif', 'MathJax_AMS', 'MathJax_Caligraphic', 'MathJax_Fraktur', 'MathJax_Main', 'MathJax_Math', 'MathJax_SansSerif', 'MathJax_Script', 'MathJax_Size1', 'MathJax_Size2', 'MathJax_Size3', 'MathJax_Size4', 'MathJax_Typewriter', 'MathJax_Vector', 'MathJax_Vector-Bold', 'MathJax_WinChrome', 'MathJax_WinIE6', 'Monospace', 'Nimbus Mono PS', 'Nimbus Roman', 'Nimbus San']
 
 def get_user_input(prompt: str, skip_confirm: bool = False) -> bool:
@@ -219,276 +241,55 @@ IMPORTANT JSON FORMATTING RULES:
 
 Return ONLY the JSON response, no additional text."""
 
-def clean_json_response(response: str) -> str:
-    """
-    Clean JSON response by removing common issues that cause parsing errors
-    """
-    import re
-    
-    # Remove any text before the first { or after the last }
-    start_idx = response.find('{')
-    end_idx = response.rfind('}')
-    
-    if start_idx == -1 or end_idx == -1 or start_idx >= end_idx:
-        return response
-    
-    cleaned = response[start_idx:end_idx + 1]
-    
-    # Fix common JSON issues
-    # 1. Remove control characters except \n, \r, \t
-    cleaned = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', cleaned)
-    
-    # 2. Use character-by-character approach for proper escaping
-    result = []
-    i = 0
-    in_string = False
-    escape_next = False
-    
-    while i < len(cleaned):
-        char = cleaned[i]
-        
-        if escape_next:
-            result.append(char)
-            escape_next = False
-        elif char == '\\':
-            result.append(char)
-            escape_next = True
-        elif char == '"' and not in_string:
-            result.append(char)
-            in_string = True
-        elif char == '"' and in_string:
-            # This is a quote inside a string value - check if it's the end of the string
-            # Look ahead to see if this is followed by a colon (indicating end of string value)
-            lookahead = cleaned[i+1:i+10].strip() if i+1 < len(cleaned) else ""
-            if lookahead.startswith(','):
-                # This is the end of the string value
-                result.append(char)
-                in_string = False
-            else:
-                # This is a quote inside the string value that needs escaping
-                if i > 0 and cleaned[i-1] == '\\':
-                    result.append(char)
-                else:
-                    result.append('\\"')
-        elif in_string:
-            # We're inside a string value
-            if char == '\n':
-                result.append('\\n')
-            elif char == '\t':
-                result.append('\\t')
-            elif char == '\r':
-                result.append('\\r')
-            elif char == '"':
-                # Only escape quotes that are not already escaped
-                if i > 0 and cleaned[i-1] != '\\':
-                    result.append('\\"')
-                else:
-                    result.append(char)
-            else:
-                result.append(char)
-        else:
-            result.append(char)
-        
-        i += 1
-    
-    return ''.join(result)
-
 def parse_json_with_fallback(response: str, context: str = "response") -> dict:
     """
-    Parse JSON with multiple fallback strategies
+    Parse JSON with a single-pass repairing parser, falling back to a minimal structure
     """
-    import re
-    
-    # Strategy 1: Try direct parsing
-    try:
-        return json.loads(response)
-    except json.JSONDecodeError:
-        pass
-    
-    # Strategy 2: Simple string replacement approach
-    try:
-        # Find JSON boundaries
-        start_idx = response.find('{')
-        end_idx = response.rfind('}')
-        
-        if start_idx != -1 and end_idx != -1 and start_idx < end_idx:
-            json_content = response[start_idx:end_idx + 1]
-            
-            # Remove control characters
-            json_content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', json_content)
-            
-            # Simple approach: replace newlines in string values
-            # This is a very basic approach that should handle most cases
-            lines = json_content.split('\n')
-            result_lines = []
-            
-            for line in lines:
-                # Check if this line contains a string value that spans multiple lines
-                if ':' in line and '"' in line:
-                    # This might be a string value
-                    colon_pos = line.find(':')
-                    if colon_pos != -1:
-                        key_part = line[:colon_pos].strip()
-                        value_part = line[colon_pos + 1:].strip()
-                        
-                        # If value starts with quote but doesn't end with quote, it's a multi-line string
-                        if value_part.startswith('"') and not value_part.endswith('"'):
-                            # This is the start of a multi-line string
-                            # Find the end of this string by looking for the next line that ends with quote
-                            multi_line_value = value_part[1:]  # Remove opening quote
-                            i = len(result_lines) + 1
-                            while i < len(lines):
-                                if lines[i].strip().endswith('"'):
-                                    # Found the end
-                                    multi_line_value += '\\n' + lines[i].strip()[:-1]  # Remove closing quote
-                                    break
-                                else:
-                                    multi_line_value += '\\n' + lines[i].strip()
-                                i += 1
-                            
-                            # Escape the content
-                            escaped_value = multi_line_value.replace('"', '\\"')
-                            result_lines.append(f'{key_part}: "{escaped_value}"')
-                        else:
-                            result_lines.append(line)
-                    else:
-                        result_lines.append(line)
-                else:
-                    result_lines.append(line)
-            
-            if result_lines:
-                repaired = '\n'.join(result_lines)
-                return json.loads(repaired)
-        
-        return json.loads(json_content)
-    except json.JSONDecodeError:
-        pass
-    
-    # Strategy 3: Extract JSON from markdown code blocks
     try:
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-    except json.JSONDecodeError:
-        pass
-    
-    # Strategy 4: Find JSON object boundaries and try simple fixes
-    try:
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            json_content = json_match.group(0)
-            
-            # Simple fixes
-            json_content = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', json_content)
-            
-            # Try to fix common issues
-            # Replace unescaped newlines in string values (very basic approach)
-            json_content = re.sub(r'(?<!\\)\n', r'\\n', json_content)
-            
-            return json.loads(json_content)
-    except json.JSONDecodeError:
-        pass
+        data, repairs = repair_json(response)
+        if repairs:
+            print(f"🔧 Repaired JSON for {context}: {', '.join(repairs)}")
+        return data
+    except JSONRepairError as e:
+        print(f"❌ JSON repair failed for {context}: {e}")
+        print(f"Raw response preview: {response[:200]}...")
     
-    # Strategy 5: Last resort - try to create a minimal valid JSON
-    try:
-        # Extract basic structure and create fallback
-        if 'expanded_description' in response:
-            return {
-                "expanded_description": "Error parsing detailed description",
-                "script": {
-                    "setup": ["Error generating script"],
-                    "animations": [],
-                    "cleanup": [],
-                    "total_estimated_time": 0,
-                    "manim_objects": {},
-                    "positioning_guide": {},
-                    "color_scheme": {}
-                }
+    # Last resort - create a minimal valid JSON
+    if 'expanded_description' in response:
+        return {
+            "expanded_description": "Error parsing detailed description",
+            "script": {
+                "setup": ["Error generating script"],
+                "animations": [],
+                "cleanup": [],
+                "total_estimated_time": 0,
+                "manim_objects": {},
+                "positioning_guide": {},
+                "color_scheme": {}
             }
-        else:
-            return {"error": "Failed to parse JSON"}
-    except Exception as e:
-        print(f"❌ All JSON parsing strategies failed for {context}: {e}")
-        print(f"Raw response preview: {response[:200]}...")
-        raise e
+        }
+    return {"error": "Failed to parse JSON"}
 
-def call_openai_api(prompt: str, api_key: str, model: str = DEFAULT_MODEL) -> str:
+def call_openai_api(prompt: str, api_key: str, model: str = DEFAULT_MODEL, schema: tuple = None) -> str:
     """
-    Call OpenAI API with the given prompt
+    Call OpenAI API with the given prompt using the shared client
+    Pass a (name, schema) pair from schemas.schema_for() to request structured output
     """
     try:
-        client = OpenAI(api_key=api_key)
-        
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert educational content creator specializing in Manim (Mathematical Animation Engine) animations. You create comprehensive scene-by-scene scripts for educational videos that will be animated using Manim. CRITICAL: Always respond with valid JSON format. Ensure all strings are properly escaped - use \\n for newlines, \\\" for quotes, and avoid control characters. Double-check your JSON syntax before responding."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            # temperature=0.7,
-            # max_tokens=4000
-        )
-        
-        return response.choices[0].message.content.strip()
+        return get_llm_client(api_key).complete(PHASE1_SYSTEM_PROMPT, prompt, model, schema, validate=is_complete_json)
     
     except Exception as e:
         print(f"Error calling OpenAI API: {e}")
         raise
 
-async def call_openai_api_async(session: aiohttp.ClientSession, prompt: str, api_key: str, model: str = DEFAULT_MODEL) -> str:
+async def call_openai_api_async(prompt: str, api_key: str, model: str = DEFAULT_MODEL, schema: tuple = None) -> str:
     """
-    Async call to OpenAI API with the given prompt
+    Async call to OpenAI API with the given prompt using the shared client
+    Pass a (name, schema) pair from schemas.schema_for() to request structured output
     """
     try:
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are an expert educational content creator specializing in Manim (Mathematical Animation Engine) animations. You create comprehensive scene-by-scene scripts for educational videos that will be animated using Manim. IMPORTANT: For Phase 2, describe animations in natural English language, NOT code. Focus on what the viewer sees and how elements move and relate to each other. CRITICAL: Always respond with valid JSON format. Ensure all strings are properly escaped - use \\n for newlines, \\\" for quotes, and avoid control characters. Double-check your JSON syntax before responding."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            # "temperature": 0.7,
-            # "max_tokens": 4000
-        }
-        
-        async with session.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data
-        ) as response:
-            if response.status == 200:
-                result = await response.json()
-                return result["choices"][0]["message"]["content"].strip()
-            else:
-                error_text = await response.text()
-                raise aiohttp.ClientResponseError(
-                    request_info=response.request_info,
-                    history=response.history,
-                    status=response.status,
-                    message=f"OpenAI API error {response.status}: {error_text}"
-                )
-    
-    except aiohttp.ServerDisconnectedError as e:
-        print(f"Server disconnected, retrying...")
-        # Wait a bit before retrying
-        await asyncio.sleep(2)
-        raise
+        return await get_llm_client(api_key).complete_async(SCENE_SYSTEM_PROMPT, prompt, model, schema, validate=is_complete_json)
+    
     except aiohttp.ClientError as e:
         print(f"Client error calling OpenAI API: {e}")
         raise
@@ -508,7 +309,7 @@ def save_scene_map(scene_data: Dict[str, Any], output_path: str) -> None:
         print(f"Error saving scene map: {e}")
         raise
 
-async def process_scene_phase2_async(session: aiohttp.ClientSession, scene: Dict[str, Any], api_key: str, scene_index: int, total_scenes: int, model: str = DEFAULT_MODEL) -> Dict[str, Any]:
+async def process_scene_phase2_async(scene: Dict[str, Any], api_key: str, scene_index: int, total_scenes: int, model: str = DEFAULT_MODEL) -> Dict[str, Any]:
     """
     Process a single scene through Phase 2 asynchronously
     """
@@ -518,20 +319,8 @@ async def process_scene_phase2_async(session: aiohttp.ClientSession, scene: Dict
         # Generate detailed prompt for this scene
         prompt = generate_scene_script_prompt(scene)
         
-        # Call OpenAI API asynchronously with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = await call_openai_api_async(session, prompt, api_key, model)
-                break
-            except aiohttp.ServerDisconnectedError as e:
-                if attempt < max_retries - 1:
-                    print(f"⚠️  Server disconnected on attempt {attempt + 1}, retrying in 5 seconds...")
-                    await asyncio.sleep(5)
-                    continue
-                else:
-                    print(f"❌ Server disconnected after {max_retries} attempts")
-                    raise
+        # Call OpenAI API asynchronously (retries are handled by the shared client's retry policy)
+        response = await call_openai_api_async(prompt, api_key, model, schema_for(2))
         
         # Parse JSON response with robust fallback
         try:
@@ -585,39 +374,48 @@ async def process_scenes_phase2_async(scene_data: Dict[str, Any], api_key: str,
     
     scenes = scene_data.get('scenes', [])
     
-    # Create async session and process all scenes in parallel
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for i, scene in enumerate(scenes, 1):
-            task = process_scene_phase2_async(session, scene, api_key, i, len(scenes), model)
-            tasks.append(task)
-        
-        # Wait for all tasks to complete with progress bar
-        print(f"\n📝 Processing {len(scenes)} scenes in parallel...")
-        expanded_scenes = await tqdm.gather(*tasks, desc="Phase 2: Expanding scenes", unit="scene")
-        
-        # Handle any exceptions that occurred
-        processed_scenes = []
-        for i, result in enumerate(expanded_scenes, 1):
-            if isinstance(result, Exception):
-                print(f"❌ Exception in scene {i}: {result}")
-                # Create fallback scene
-                fallback_scene = scenes[i-1].copy()
-                fallback_scene['expanded_description'] = scenes[i-1].get('description', '')
-                fallback_scene['script'] = {
-                    'setup': ['Error generating detailed script'],
-                    'animations': [],
-                    'cleanup': [],
-                    'total_estimated_time': 0,
-                    'manim_objects': {},
-                    'positioning_guide': {},
-                    'color_scheme': {}
-                }
-                processed_scenes.append(fallback_scene)
-            else:
-                processed_scenes.append(result)
+    # Process all scenes in parallel
+    tasks = []
+    for i, scene in enumerate(scenes, 1):
+        task = process_scene_phase2_async(scene, api_key, i, len(scenes), model)
+        tasks.append(task)
+    
+    # Wait for all tasks to complete with progress bar
+    print(f"\n📝 Processing {len(scenes)} scenes in parallel...")
+    expanded_scenes = await tqdm.gather(*tasks, desc="Phase 2: Expanding scenes", unit="scene")
+    
+    # Handle any exceptions that occurred
+    processed_scenes = []
+    for i, result in enumerate(expanded_scenes, 1):
+        if isinstance(result, Exception):
+            print(f"❌ Exception in scene {i}: {result}")
+            processed_scenes.append(create_fallback_phase2_scene(scenes[i-1]))
+        else:
+            processed_scenes.append(result)
     
-    # Create Phase 2 output
+    return build_phase2_data(scene_data, processed_scenes)
+
+def create_fallback_phase2_scene(scene: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create a Phase 2 scene with a placeholder script when expansion fails
+    """
+    fallback_scene = scene.copy()
+    fallback_scene['expanded_description'] = scene.get('description', '')
+    fallback_scene['script'] = {
+        'setup': ['Error generating detailed script'],
+        'animations': [],
+        'cleanup': [],
+        'total_estimated_time': 0,
+        'manim_objects': {},
+        'positioning_guide': {},
+        'color_scheme': {}
+    }
+    return fallback_scene
+
+def build_phase2_data(scene_data: Dict[str, Any], processed_scenes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Create the Phase 2 output from the Phase 1 data and the expanded scenes
+    """
     phase2_data = scene_data.copy()
     phase2_data['scenes'] = processed_scenes
     phase2_data['phase'] = 2
@@ -894,425 +692,52 @@ Return ONLY the JSON response, no additional text."""
 
 # Note: Sample code reference is currently disabled but can be re-enabled if needed
 
+def generate_repair_prompt(overview: Dict[str, Any], scene: Dict[str, Any], scene_file: Dict[str, Any], errors: List[str]) -> str:
+    """
+    Generate a Phase 3 prompt asking the model to fix its previous code for a single scene
+    """
+    error_list = "\n".join(f"- {error}" for error in errors)
+    return f"""{generate_manim_code_prompt(overview, scene)}
+
+YOUR PREVIOUS CODE FOR THIS SCENE FAILED WITH THESE ERRORS:
+{error_list}
+
+PREVIOUS CODE:
+```python
+{scene_file.get("code", "")}
+```
+
+Return the complete corrected scene in the same JSON format. Keep what already works and change only what is needed to fix the errors above."""
+
 def validate_manim_code(code: str) -> Dict[str, Any]:
     """
     Validate Manim code for common issues and problematic patterns
     """
-    issues = []
-    warnings = []
-    
-    # Check for indentation issues
-    lines = code.split('\n')
-    for i, line in enumerate(lines, 1):
-        if line.strip().startswith(('scene_', 'icon_', 'bullet_')) and not line.startswith('        '):
-            issues.append(f"Line {i}: Indentation error - scene content should be indented")
-    
-    # Check for deprecated camera API
-    if "self.camera.frame" in code:
-        issues.append("Uses deprecated camera.frame API - should use camera.frame_center or avoid camera animations")
-    
-    # Check for camera.frame_center.animate usage
-    if "self.camera.frame_center.animate" in code:
-        issues.append("Uses camera.frame_center.animate - this doesn't work, should use object animations instead")
-    
-    # Check for font_size parameter in get_tex
-    if "font_size=" in code and "get_tex" in code:
-        issues.append("Uses font_size parameter in get_tex() - should use .scale() method instead")
-    
-    # Check for problematic fonts
-    # problematic_fonts = ["CMU Serif", "CMU Sans", "CMU Typewriter", "Computer Modern"]
-    # for font in problematic_fonts:
-    #     if font in code:
-    #         warnings.append(f"Uses potentially problematic font '{font}' - consider using standard fonts")
-    
-    # Check for SVGMobject usage
-    if "SVGMobject" in code:
-        issues.append("Uses SVGMobject - should use basic shapes instead")
-    
-    # Check for ShowCreation usage
-    if "ShowCreation" in code:
-        issues.append("Uses deprecated ShowCreation - should use Create instead")
-    
-    # Check for Create on VGroup - more specific pattern
-    if re.search(r'Create\(\s*[^)]*VGroup[^)]*\)', code):
-        issues.append("Uses Create() on VGroup - should use Write() or FadeIn() instead")
-    
-    # Check for undefined color constants
-    undefined_colors = ["CYAN", "AMBER", "AZURE"]
-    for color in undefined_colors:
-        if color in code:
-            issues.append(f"Uses undefined color constant '{color}' - should use standard Manim colors")
-    
-    # Check for undefined animations
-    undefined_animations = ["FadeInFromUp", "FadeInFromDown", "FadeInFromLeft", "FadeInFromRight"]
-    for anim in undefined_animations:
-        if anim in code:
-            issues.append(f"Uses undefined animation '{anim}' - should use standard Manim animations")
-    
-    # Check for NumberPlane issues
-    if "background_lines_color" in code or "background_lines_stroke_width" in code or "background_lines_opacity" in code:
-        issues.append("Uses unsupported NumberPlane arguments - these parameters don't exist")
-    
-    # Check for Rectangle API issues
-    if ".get_bottom_center()" in code or ".get_left_center()" in code or ".get_right_center()" in code or ".get_top_center()" in code:
-        issues.append("Uses deprecated Rectangle methods - should use .get_bottom(), .get_left(), etc.")
-    
-    # Check for quote escaping issues
-    if 'font=\\"' in code:
-        issues.append("Uses malformed quote escaping in font parameter")
-    
-    # Check for malformed parentheses
-    if 'self.play(self.wait(' in code:
-        issues.append("Uses malformed parentheses in camera animation fix")
-    
-    # Check for incomplete parameters
-    if 'fill_)' in code or 'fill_,' in code:
-        issues.append("Uses incomplete fill_opacity parameters - should be fill_opacity=value")
-    
-    if 'stroke_)' in code or 'stroke_,' in code:
-        issues.append("Uses incomplete stroke parameters - should be stroke_width=value")
-    
-    if 'color_)' in code or 'color_,' in code:
-        issues.append("Uses incomplete color parameters - should be color=value")
-    
-    # Check for FRAME_WIDTH/FRAME_HEIGHT usage
-    if "FRAME_WIDTH" in code or "FRAME_HEIGHT" in code:
-        issues.append("Uses FRAME_WIDTH/FRAME_HEIGHT - these constants don't exist in Manim")
-    
-    # Check for multiline strings in MathTex
-    if '"""' in code and "MathTex" in code:
-        warnings.append("Uses multiline strings with MathTex - may cause issues")
-    
-    # Check for text elements without scaling
-    if "Text(" in code and ".scale(" not in code:
-        warnings.append("Text elements should be scaled for better readability (use .scale(0.6-0.8))")
-    
-    # Check for long text that might need scaling
-    text_matches = re.findall(r'Text\(["\']([^"\']{50,})["\']', code)
-    for text_content in text_matches:
-        if len(text_content) > 50:
-            warnings.append(f"Long text detected: '{text_content[:30]}...' - ensure proper scaling")
-    
-    # Check for potential out-of-bounds positioning
-    if "move_to(" in code:
-        # Look for extreme positioning values
-        extreme_positions = re.findall(r'move_to\([^)]*[+-]?[0-9]+\.?[0-9]*\*?[^)]*\)', code)
-        for pos in extreme_positions:
-            if any(extreme in pos for extreme in ['*8', '*9', '*10', '*11', '*12', '*13', '*14', '*15']):
-                warnings.append("Potential out-of-bounds positioning detected - ensure elements stay within video bounds")
-    
-    # Check for incomplete parameters that cause positional argument errors
-    if re.search(r'fill_\s*,', code):
-        issues.append("Incomplete fill_opacity parameter")
-    if re.search(r'stroke_\s*,', code):
-        issues.append("Incomplete stroke_width parameter")
-    if re.search(r'color_\s*,', code):
-        issues.append("Incomplete color parameter")
-    
-    # Check for scale method issues (but not opacity which is fine)
-    if re.search(r'\.scale\(0\)', code) and 'set_opacity' not in code:
-        issues.append("Scale method with 0 parameter may cause issues")
-    
-    # Check for max_width parameter issues
-    if re.search(r'max_width=', code):
-        issues.append("Uses max_width parameter - not supported in current Manim version")
-    
-    # Check for Sector outer_radius duplication
-    if re.search(r'Sector\([^)]*outer_radius=[^,)]+[^)]*outer_radius=', code):
-        issues.append("Sector has duplicate outer_radius parameters")
-    
-    # Check for VGroup with float values
-    if re.search(r'VGroup\([^)]*,\s*[0-9]+\.?[0-9]*\s*\)', code):
-        issues.append("VGroup contains float values - only VMobjects allowed")
-    
-    # Check for malformed VGroup constructors
-    if re.search(r'VGroup\(\s*\(\s*\(', code):
-        issues.append("VGroup has malformed constructor with extra parentheses")
-    
-    # Check for VGroup with starred expressions issues
-    if re.search(r'VGroup\(\s*\(\s*\*', code):
-        issues.append("VGroup has malformed starred expression syntax")
-    
-    # Check for VGroup with missing closing parentheses
-    if re.search(r'VGroup\(\s*\(\s*[^)]+\)\s*$', code):
-        issues.append("VGroup has missing closing parentheses")
-    
-    # Check for duplicate variable assignments
-    if re.search(r'^(\s*)(\w+)\s*=\s*\2\s*$', code, re.MULTILINE):
-        issues.append("Duplicate variable assignments causing UnboundLocalError")
-    
-    return {
-        "issues": issues,
-        "warnings": warnings,
-        "is_valid": len(issues) == 0
-    }
+    return lint_manim_code(code)
 
 def fix_manim_code(code: str) -> str:
     """
     Automatically fix common Manim code issues
     """
-    import re
-    
-    # Fix camera.frame issues - more comprehensive pattern matching
-    # Pattern for self.camera.frame.animate with method chaining
-    camera_pattern = r'self\.camera\.frame\.animate\.[^)]+\)'
-    def replace_camera(_match):
-        # For camera animations, we'll replace with a simple wait instead
-        return 'self.wait(0.5)  # Camera animation replaced with wait'
-    code = re.sub(camera_pattern, replace_camera, code)
-    
-    # Fix any remaining broken syntax from camera replacements
-    code = re.sub(r'self\.wait\(0\.5\)\s*# Camera animation replaced with wait\.[^)]+\)', 
-                  'self.wait(0.5)  # Camera animation replaced with wait', code)
-    
-    # Also fix direct camera.frame usage
-    code = code.replace("self.camera.frame.", "self.camera.frame_center.")
-    
-    # Fix font_size issues in get_tex
-    # Pattern to match get_tex with font_size parameter
-    pattern = r'\.get_tex\(([^)]+),\s*font_size=(\d+)\)'
-    def replace_font_size(match):
-        text = match.group(1)
-        size = int(match.group(2))
-        scale_factor = size / 36.0  # Default font size is 36
-        # Ensure scale is within recommended range (0.6-0.8)
-        scale_factor = max(0.6, min(0.8, scale_factor))
-        return f'.get_tex({text}).scale({scale_factor:.2f})'
-    code = re.sub(pattern, replace_font_size, code)
-    
-    # Add scaling to Text elements that don't have it
-    text_pattern = r'Text\(([^)]+)\)(?!\s*\.scale)'
-    def add_text_scaling(match):
-        text_content = match.group(1)
-        return f'Text({text_content}).scale(0.7)'
-    code = re.sub(text_pattern, add_text_scaling, code)
-    
-    # Ensure long text is properly scaled
-    long_text_pattern = r'Text\(["\']([^"\']{50,})["\']\)'
-    def fix_long_text(match):
-        text_content = match.group(1)
-        return f'Text("{text_content}").scale(0.6)'
-    code = re.sub(long_text_pattern, fix_long_text, code)
-    
-    # Fix problematic fonts to use approved ones
-    # code = code.replace('font="Arial"', 'font="DejaVu Sans"')
-    # code = code.replace('font="Times New Roman"', 'font="DejaVu Serif"')
-    # code = code.replace('font="Courier New"', 'font="Liberation Mono"')
-    # code = code.replace('font="Helvetica"', 'font="DejaVu Sans"')
-    # code = code.replace('font="Verdana"', 'font="DejaVu Sans"')
-    # code = code.replace('font="CMU Serif"', 'font="DejaVu Serif"')
-    # code = code.replace('font="CMU Sans"', 'font="DejaVu Sans"')
-    # code = code.replace('font="CMU Typewriter"', 'font="Liberation Mono"')
-    # code = code.replace('font="Computer Modern"', 'font="DejaVu Serif"')
-    
-    # Fix ShowCreation
-    code = code.replace("ShowCreation", "Create")
-    
-    # Fix Create on VGroup - replace with Write
-    # More comprehensive pattern to catch Create(VGroup(...))
-    vgroup_create_pattern = r'Create\(\s*([^)]*VGroup[^)]*)\s*\)'
-    def fix_vgroup_create(match):
-        vgroup_expr = match.group(1).strip()
-        return f'Write({vgroup_expr})'
-    code = re.sub(vgroup_create_pattern, fix_vgroup_create, code)
-    
-    # Also fix simple cases like Create(group) where group is a VGroup
-    # This is a more aggressive approach
-    code = re.sub(r'Create\(\s*(\w+)\s*\)', r'Write(\1)', code)
-    
-    # Fix FRAME_WIDTH/FRAME_HEIGHT usage
-    code = code.replace("FRAME_WIDTH", "config.frame_width")
-    code = code.replace("FRAME_HEIGHT", "config.frame_height")
-    
-    # Remove SVGMobject usage
-    if "SVGMobject" in code:
-        # Replace with basic shapes - this is a simple replacement
-        code = code.replace("SVGMobject", "Circle")  # Basic fallback
-    
-    # Fix extreme positioning to stay within bounds
-    # Replace extreme positioning with safer values
-    extreme_patterns = [
-        (r'UP \* (8|9|10|11|12|13|14|15)', 'UP * 3'),  # Reduce extreme UP positioning
-        (r'DOWN \* (8|9|10|11|12|13|14|15)', 'DOWN * 3'),  # Reduce extreme DOWN positioning
-        (r'LEFT \* (8|9|10|11|12|13|14|15)', 'LEFT * 5'),  # Reduce extreme LEFT positioning
-        (r'RIGHT \* (8|9|10|11|12|13|14|15)', 'RIGHT * 5'),  # Reduce extreme RIGHT positioning
-    ]
-    
-    for pattern, replacement in extreme_patterns:
-        code = re.sub(pattern, replacement, code)
-    
-    # Fix indentation issues
-    lines = code.split('\n')
-    fixed_lines = []
-    in_scene_method = False
-    
-    for line in lines:
-        if 'def construct(self):' in line:
-            in_scene_method = True
-            fixed_lines.append(line)
-        elif in_scene_method and line.strip():
-            # Fix any line in the construct method that has wrong indentation
-            if line.startswith('                ') and any(keyword in line for keyword in ['scene_', 'icon_', 'bullet_', 'title_', 'text_', 'rect_', 'diag_', 'w_', 'h_', 'Text(', 'Circle(', 'Rectangle(', 'Square(', 'Line(', 'Dot(', 'VGroup(', 'Polygon(']):
-                # Too much indentation (16 spaces) - fix to 8 spaces
-                fixed_lines.append('        ' + line.strip())
-            elif not line.startswith(' ') and not line.startswith('\t') and any(keyword in line for keyword in ['Text(', 'Circle(', 'Rectangle(', 'Square(', 'Line(', 'Dot(', 'VGroup(', 'Polygon(', 'scene_', 'icon_', 'bullet_', 'title_', 'text_', 'rect_', 'diag_', 'w_', 'h_']):
-                # No indentation - add 8 spaces
-                fixed_lines.append('        ' + line.strip())
-            else:
-                fixed_lines.append(line)
-        else:
-            # Fix common indentation issues - ensure proper indentation for scene content
-            if line.strip().startswith(('scene_', 'icon_', 'bullet_', 'title_', 'text_', 'rect_', 'diag_', 'w_', 'h_')) and not line.startswith('        '):
-                line = '        ' + line.strip()
-            fixed_lines.append(line)
-    
-    code = '\n'.join(fixed_lines)
-    
-    # Fix undefined color constants
-    code = code.replace("CYAN", "BLUE")
-    code = code.replace("AMBER", "YELLOW")
-    code = code.replace("AZURE", "LIGHT_BLUE")
-    
-    # Fix undefined animations
-    code = code.replace("FadeInFromUp", "FadeIn")
-    code = code.replace("FadeInFromDown", "FadeIn")
-    code = code.replace("FadeInFromLeft", "FadeIn")
-    code = code.replace("FadeInFromRight", "FadeIn")
-    
-    # Fix camera.frame_center.animate - this doesn't work either
-    code = re.sub(r'self\.camera\.frame_center\.animate\.move_to\([^)]+\)', 'self.wait(0.5)  # Camera animation replaced with wait', code)
-    
-    # Fix NumberPlane issues - remove problematic arguments
-    code = re.sub(r'background_lines_color=[^,)]+', '', code)
-    code = re.sub(r'background_lines_stroke_width=[^,)]+', '', code)
-    code = re.sub(r'background_lines_opacity=[^,)]+', '', code)
-    code = re.sub(r'opacity=[^,)]+', '', code)  # Remove opacity from set_style calls
-    
-    # Fix Rectangle API issues - replace deprecated methods
-    code = code.replace('.get_bottom_center()', '.get_bottom()')
-    code = code.replace('.get_left_center()', '.get_left()')
-    code = code.replace('.get_right_center()', '.get_right()')
-    code = code.replace('.get_top_center()', '.get_top()')
-    
-    # Fix quote escaping issues
-    code = re.sub(r'font=\\"([^"]+)\\"', r'font="\1"', code)
-    
-    # Fix malformed parentheses from camera fixes
-    code = re.sub(r'self\.play\(self\.wait\(0\.5\)\s*# Camera animation replaced with wait\), run_time=[^)]+\)', 
-                  'self.wait(0.5)  # Camera animation replaced with wait', code)
-    
-    # Fix any remaining malformed parentheses patterns
-    code = re.sub(r'self\.play\(self\.wait\([^)]+\)\s*# [^)]+\)', 
-                  'self.wait(0.5)  # Camera animation replaced with wait', code)
-    
-    # Fix incomplete fill_opacity parameters
-    code = re.sub(r'fill_\)', 'fill_opacity=0.5)', code)
-    code = re.sub(r'fill_,', 'fill_opacity=0.5,', code)
-    
-    # Fix incomplete stroke parameters
-    code = re.sub(r'stroke_\)', 'stroke_width=2)', code)
-    code = re.sub(r'stroke_,', 'stroke_width=2,', code)
-    
-    # Fix incomplete color parameters
-    code = re.sub(r'color_\)', 'color=WHITE)', code)
-    code = re.sub(r'color_,', 'color=WHITE,', code)
-    
-    # Fix positional argument follows keyword argument errors
-    # This happens when incomplete parameters like fill_ are followed by other parameters
-    code = re.sub(r'(\w+=\w+,\s*)(fill_)(\s*,\s*)(\w+=\w+)', r'\1fill_opacity=0.5\3\4', code)
-    code = re.sub(r'(\w+=\w+,\s*)(stroke_)(\s*,\s*)(\w+=\w+)', r'\1stroke_width=2\3\4', code)
-    code = re.sub(r'(\w+=\w+,\s*)(color_)(\s*,\s*)(\w+=\w+)', r'\1color=WHITE\3\4', code)
-    
-    # Fix set_scale deprecation - replace with .scale() first
-    code = re.sub(r'\.set_scale\(([^)]+)\)', r'.scale(\1)', code)
-    
-    # Fix scale method issues - replace .scale(0) with .set_opacity(0) for visibility
-    code = re.sub(r'\.scale\(0\)', '.set_opacity(0)', code)
-    
-    # Fix max_width parameter issue - remove unsupported parameter
-    code = re.sub(r'max_width=[^,)]+[,)]', '', code)
-    code = re.sub(r',\s*max_width=[^,)]+', '', code)
-    
-    # Fix Sector/AnnularSector outer_radius duplication issue
-    code = re.sub(r'Sector\([^)]*outer_radius=([^,)]+)[^)]*outer_radius=([^,)]+)', r'Sector(outer_radius=\2', code)
-    code = re.sub(r'AnnularSector\([^)]*outer_radius=([^,)]+)[^)]*outer_radius=([^,)]+)', r'AnnularSector(outer_radius=\2', code)
-    
-    # Fix VGroup float addition issue - remove float values from VGroup
-    # Use a more robust approach
-    def fix_vgroup_floats(match):
-        content = match.group(0)
-        # Find the content inside VGroup(...)
-        inner_content = content[6:-1]  # Remove 'VGroup(' and ')'
-        
-        # Split by commas and filter out float values
-        parts = inner_content.split(',')
-        filtered_parts = []
-        for part in parts:
-            part = part.strip()
-            # Skip if it's just a number (float or int)
-            if not re.match(r'^[0-9]+\.?[0-9]*$', part):
-                filtered_parts.append(part)
-        
-        # Rejoin with commas and reconstruct VGroup
-        if filtered_parts:
-            result = 'VGroup(' + ','.join(filtered_parts) + ')'
-        else:
-            result = 'VGroup()'
-        # Clean up extra commas
-        result = re.sub(r',\s*,', ',', result)
-        result = re.sub(r',\s*\)', ')', result)
-        return result
-    
-    # Apply VGroup float fix with a more specific pattern
-    code = re.sub(r'VGroup\([^)]*\)', fix_vgroup_floats, code)
-    
-    # Fix VGroup syntax errors - malformed constructors with extra parentheses
-    # Pattern: VGroup(((...) -> VGroup(...)
-    code = re.sub(r'VGroup\(\(\s*\(', 'VGroup(', code)
-    code = re.sub(r'VGroup\(\(\s*', 'VGroup(', code)
-    
-    # Fix VGroup with starred expressions - remove extra parentheses
-    # Pattern: VGroup((*[...]) -> VGroup(*[...])
-    code = re.sub(r'VGroup\(\s*\(\s*\*', 'VGroup(*', code)
-    
-    # Fix VGroup with missing closing parentheses
-    # Pattern: VGroup((item1,item2) -> VGroup(item1,item2)
-    code = re.sub(r'VGroup\(\s*\(\s*([^)]+)\)\s*$', r'VGroup(\1)', code, flags=re.MULTILINE)
-    
-    # Fix duplicate variable assignments that cause UnboundLocalError
-    # Pattern: BLUE = BLUE -> # BLUE = BLUE (commented out)
-    code = re.sub(r'^(\s*)(\w+)\s*=\s*\2\s*$', r'\1# \2 = \2', code, flags=re.MULTILINE)
-    
-    # Clean up extra commas that might be left
-    code = re.sub(r',\s*\)', ')', code)
-    code = re.sub(r',\s*,', ',', code)
-    
-    return code
+    return apply_manim_fixes(code)
 
-async def process_scene_phase3_async(session: aiohttp.ClientSession, overview: Dict[str, Any], scene: Dict[str, Any], api_key: str, scene_index: int, total_scenes: int, model: str = DEFAULT_MODEL) -> Dict[str, Any]:
+async def process_scene_phase3_async(overview: Dict[str, Any], scene: Dict[str, Any], api_key: str, scene_index: int, total_scenes: int, model: str = DEFAULT_MODEL, previous: Dict[str, Any] = None, errors: List[str] = None) -> Dict[str, Any]:
     """
     Process a single scene through Phase 3 asynchronously to generate Manim-compatible code
+
+    When previous and errors are given, the model is asked to repair its previous scene file instead.
     """
     print(f"\n📝 Processing scene {scene_index}/{total_scenes}: {scene.get('title', 'N/A')}")
     
     try:
         # Generate Manim code prompt for this scene
-        prompt = generate_manim_code_prompt(overview, scene)
+        if previous is not None and errors:
+            prompt = generate_repair_prompt(overview, scene, previous, errors)
+        else:
+            prompt = generate_manim_code_prompt(overview, scene)
         
-        # Call OpenAI API asynchronously with retry logic
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = await call_openai_api_async(session, prompt, api_key, model)
-                break
-            except aiohttp.ServerDisconnectedError as e:
-                if attempt < max_retries - 1:
-                    print(f"⚠️  Server disconnected on attempt {attempt + 1}, retrying in 5 seconds...")
-                    await asyncio.sleep(5)
-                    continue
-                else:
-                    print(f"❌ Server disconnected after {max_retries} attempts")
-                    raise
+        # Call OpenAI API asynchronously (retries are handled by the shared client's retry policy)
+        response = await call_openai_api_async(prompt, api_key, model, schema_for(3))
         
         # Parse JSON response with robust fallback
         try:
@@ -1320,17 +745,7 @@ async def process_scene_phase3_async(session: aiohttp.ClientSession, overview: D
         except (json.JSONDecodeError, ValueError, KeyError) as e:
             print(f"❌ Error parsing JSON for scene {scene_index}: {e}")
             # Fallback: create basic scene
-            code_data = {
-                "className": f"Scene{scene_index}",
-                "filename": f"scene_{scene_index}.py",
-                "code": f"# Error generating code for scene: {scene.get('title', 'N/A')}\n# {e}\nfrom manim import *\n\nclass Scene{scene_index}(Scene):\n    def construct(self):\n        title = Text(\"Scene {scene_index}\")\n        self.play(Write(title))\n        self.wait(2)",
-                "validationResults": {
-                    "syntaxValid": False,
-                    "manimCompatible": False,
-                    "warnings": [f"Failed to generate code: {e}"],
-                    "suggestions": ["Retry code generation"]
-                }
-            }
+            return create_fallback_scene_file(scene, scene_index, e)
         
         # Fix and validate the generated code
         code = code_data.get("code", "")
@@ -1364,19 +779,7 @@ async def process_scene_phase3_async(session: aiohttp.ClientSession, overview: D
     except (ValueError, KeyError, TypeError) as e:
         print(f"❌ Error processing scene {scene_index}: {e}")
         # Fallback: create basic scene
-        scene_file = {
-            "id": f"scene-{scene_index}",
-            "className": f"Scene{scene_index}",
-            "filename": f"scene_{scene_index}.py",
-            "code": f"# Error generating code for scene: {scene.get('title', 'N/A')}\n# {e}\nfrom manim import *\n\nclass Scene{scene_index}(Scene):\n    def construct(self):\n        title = Text(\"Scene {scene_index}\")\n        self.play(Write(title))\n        self.wait(2)",
-            "validationResults": {
-                "syntaxValid": False,
-                "manimCompatible": False,
-                "warnings": [f"Failed to generate code: {e}"],
-                "suggestions": ["Retry code generation"]
-            }
-        }
-        return scene_file
+        return create_fallback_scene_file(scene, scene_index, e)
 
 async def process_scenes_phase3_async(scene_data: Dict[str, Any], api_key: str, model: str = DEFAULT_MODEL) -> Dict[str, Any]:
     """
@@ -1388,43 +791,67 @@ async def process_scenes_phase3_async(scene_data: Dict[str, Any], api_key: str,
     overview = scene_data.get('overview', {})
     scenes = scene_data.get('scenes', [])
     
-    # Create async session and process all scenes in parallel
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for i, scene in enumerate(scenes, 1):
-            task = process_scene_phase3_async(session, overview, scene, api_key, i, len(scenes), model)
-            tasks.append(task)
-        
-        # Wait for all tasks to complete with progress bar
-        print(f"\n📝 Processing {len(scenes)} scenes in parallel...")
-        scene_files = await tqdm.gather(*tasks, desc="Phase 3: Generating code", unit="scene")
-        
-        # Handle any exceptions that occurred
-        processed_scene_files = []
-        for i, result in enumerate(scene_files, 1):
-            if isinstance(result, Exception):
-                print(f"❌ Exception in scene {i}: {result}")
-                # Create fallback scene file
-                fallback_scene_file = {
-                    "id": f"scene-{i}",
-                    "className": f"Scene{i}",
-                    "filename": f"scene_{i}.py",
-                    "code": f"# Error generating code for scene: {scenes[i-1].get('title', 'N/A')}\n# {result}\nfrom manim import *\n\nclass Scene{i}(Scene):\n    def construct(self):\n        title = Text(\"Scene {i}\")\n        self.play(Write(title))\n        self.wait(2)",
-                    "validationResults": {
-                        "syntaxValid": False,
-                        "manimCompatible": False,
-                        "warnings": [f"Failed to generate code: {result}"],
-                        "suggestions": ["Retry code generation"]
-                    }
-                }
-                processed_scene_files.append(fallback_scene_file)
-            else:
-                processed_scene_files.append(result)
+    # Process all scenes in parallel
+    tasks = []
+    for i, scene in enumerate(scenes, 1):
+        task = process_scene_phase3_async(overview, scene, api_key, i, len(scenes), model)
+        tasks.append(task)
+    
+    # Wait for all tasks to complete with progress bar
+    print(f"\n📝 Processing {len(scenes)} scenes in parallel...")
+    scene_files = await tqdm.gather(*tasks, desc="Phase 3: Generating code", unit="scene")
+    
+    # Handle any exceptions that occurred
+    processed_scene_files = []
+    for i, result in enumerate(scene_files, 1):
+        if isinstance(result, Exception):
+            print(f"❌ Exception in scene {i}: {result}")
+            processed_scene_files.append(create_fallback_scene_file(scenes[i-1], i, result))
+        else:
+            processed_scene_files.append(result)
     
+    return build_phase3_data(overview, processed_scene_files)
+
+def create_fallback_scene_file(scene: Dict[str, Any], scene_index: int, error: Any) -> Dict[str, Any]:
+    """
+    Create a placeholder Phase 3 scene file when code generation fails
+    """
+    return {
+        "id": f"scene-{scene_index}",
+        "className": f"Scene{scene_index}",
+        "filename": f"scene_{scene_index}.py",
+        "code": f"# Error generating code for scene: {scene.get('title', 'N/A')}\n# {error}\nfrom manim import *\n\nclass Scene{scene_index}(Scene):\n    def construct(self):\n        title = Text(\"Scene {scene_index}\")\n        self.play(Write(title))\n        self.wait(2)",
+        "placeholder": True,
+        "validationResults": {
+            "syntaxValid": False,
+            "manimCompatible": False,
+            "warnings": [f"Failed to generate code: {error}"],
+            "suggestions": ["Retry code generation"]
+        }
+    }
+
+def get_repair_attempts() -> int:
+    """
+    Resolve the per-scene repair budget from the SCENE_REPAIR_ATTEMPTS env var
+    """
+    return max(0, int(os.getenv("SCENE_REPAIR_ATTEMPTS", DEFAULT_REPAIR_ATTEMPTS)))
+
+def scene_file_errors(scene_file: Dict[str, Any]) -> List[str]:
+    """
+    Get the problems that should send a scene file back to the model for repair
+    """
+    results = scene_file.get("validationResults", {})
+    if scene_file.get("placeholder"):
+        return results.get("warnings", [])
+    return results.get("issues", [])
+
+def build_phase3_data(overview: Dict[str, Any], processed_scene_files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Create the Phase 3 output in the format expected by rendering
+    """
     # Generate master file content
     master_file_content = generate_master_file_content(overview, processed_scene_files)
     
-    # Create Phase 3 output in the format expected by rendering
     phase3_data = {
         "lessonPlan": {
             "title": overview.get("title", "Generated Animation"),
@@ -1505,110 +932,208 @@ if __name__ == "__main__":
     {chr(10).join([f'# python {scene["filename"]}' for scene in scene_files])}
 """
 
-def render_videos(phase3_data: Dict[str, Any], output_dir: str) -> List[str]:
+def prepare_render_dirs(output_dir: str) -> tuple:
     """
-    Render videos for each scene and return list of video paths
+    Clean up and create the generated code and mp4s directories for a render
     """
-    print("\n🎬 RENDERING VIDEOS")
-    print("="*60)
-    
-    # Create necessary directories
     generated_dir = os.path.join(output_dir, "generated")
     mp4s_dir = os.path.join(output_dir, "mp4s")
     
-    # Clean up and create directories
     shutil.rmtree(generated_dir, ignore_errors=True)
     os.makedirs(generated_dir, exist_ok=True)
     os.makedirs(mp4s_dir, exist_ok=True)
     
+    return generated_dir, mp4s_dir
+
+def write_scene_file(generated_dir: str, filename: str, code: str) -> str:
+    """
+    Write a scene's Python code into the generated directory
+    """
+    path = os.path.join(generated_dir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(code)
+    return path
+
+def publish_video(video_path: str, dest_stem: str) -> str:
+    """
+    Copy a rendered video into place atomically as dest_stem plus the video's own
+    extension (.mp4, .webm or .mov, from its profile's container), so a final render
+    can replace a preview while someone is watching it
+    """
+    dest = dest_stem + os.path.splitext(video_path)[1]
+    tmp_dest = f"{dest}.{os.getpid()}.tmp"
+    shutil.copy2(video_path, tmp_dest)
+    os.replace(tmp_dest, dest)
+    return os.path.abspath(dest)
+
+def replace_video(video_path: str, dest: str) -> str:
+    """
+    Publish a final render over a published preview and return its path, which
+    differs from dest when the final profile uses another container
+    """
+    final_dest = publish_video(video_path, os.path.splitext(dest)[0])
+    if final_dest != os.path.abspath(dest):
+        try:
+            os.remove(dest)
+        except FileNotFoundError:
+            pass
+    return final_dest
+
+async def await_warmups(warmups: Dict[str, asyncio.Future]) -> None:
+    """
+    Wait for background warm-ups to finish, reporting any that failed
+    """
+    for name, future in warmups.items():
+        try:
+            await future
+        except Exception as e:
+            print(f"⚠️  {name} failed: {e}")
+
+def emit_event(on_event: Callable[[str, Dict[str, Any]], None], event_type: str, **data) -> None:
+    """
+    Send a pipeline event to on_event, if given; a failing listener never stops the pipeline
+    """
+    if on_event is None:
+        return
+    try:
+        on_event(event_type, data)
+    except Exception as e:
+        print(f"⚠️  Could not publish {event_type} event: {e}")
+
+def render_videos(phase3_data: Dict[str, Any], output_dir: str, max_workers: int = None, preview: bool = None, on_preview: Callable[[List[str]], None] = None, profile: str = None, hls: bool = None, on_event: Callable[[str, Dict[str, Any]], None] = None, on_final: Callable[[List[str]], None] = None) -> List[str]:
+    """
+    Render videos for each scene in parallel and return list of video paths
+
+    Scenes are rendered with the named render profile (default RENDER_PROFILE).
+    In preview mode every scene is first rendered with the preview profile,
+    on_preview is called with the videos and they are returned right away. Each
+    is then re-rendered with the final profile on a background thread, at
+    FINAL_PRIORITY, and swapped in at the same path; on_final is called with the
+    videos once every final render is done. In HLS mode (default
+    RENDER_HLS) each video is also appended to <output_dir>/hls/lesson.m3u8 as soon
+    as it and every video before it are ready. on_event receives render_start and
+    render_finish events for every scene (scene 0 is the master scene).
+    """
+    # Resolve up front so an unknown profile fails before anything is rendered
+    profile = get_render_profile(profile)["name"]
+    print("\n🎬 RENDERING VIDEOS")
+    print("="*60)
+    
+    generated_dir, mp4s_dir = prepare_render_dirs(output_dir)
+    
     # Generate Python files
     scene_files = phase3_data.get("sceneFiles", [])
     for file_data in scene_files:
-        filename = file_data["filename"]
-        code = file_data["code"]
-        with open(os.path.join(generated_dir, filename), "w", encoding="utf-8") as f:
-            f.write(code)
+        write_scene_file(generated_dir, file_data["filename"], file_data["code"])
     
     # Generate master file
     master_file = phase3_data.get("masterFile", {})
     if master_file:
-        with open(os.path.join(generated_dir, master_file["filename"]), "w", encoding="utf-8") as f:
-            f.write(master_file["content"])
+        write_scene_file(generated_dir, master_file["filename"], master_file["content"])
     
-    # Change to generated directory for rendering
-    original_cwd = os.getcwd()
-    os.chdir(generated_dir)
+    # Build render jobs, master scene first so it lands first in the final video
+    lesson = phase3_data.get("lessonPlan", {}).get("title")
+    jobs = []
+    if master_file:
+        jobs.append({
+            "filename": master_file.get("filename", "master_animation.py"),
+            "className": "MasterExplainerScene",
+            "workdir": generated_dir,
+            "profile": profile,
+            "dest": os.path.join(mp4s_dir, "master"),
+            "scene": 0,
+            "quality": "final",
+            "lesson": lesson
+        })
+    for i, file_data in enumerate(scene_files, 1):
+        jobs.append({
+            "filename": file_data["filename"],
+            "className": file_data["className"],
+            "workdir": generated_dir,
+            "profile": profile,
+            "dest": os.path.join(mp4s_dir, f"scene_{i}"),
+            "scene": i,
+            "quality": "final",
+            "lesson": lesson
+        })
+    
+    workers = get_render_workers(max_workers)
+    preview = get_preview_mode(preview)
+    if preview:
+        for job in jobs:
+            job.update(profile=get_preview_profile()["name"], quality="preview")
+    print(f"\n🎬 Rendering {len(jobs)} scenes at '{profile}' with {min(workers, len(jobs))} parallel workers{' (previews first)' if preview else ''}...")
     
     videos = []
-    
-    try:
-        # Render master scene first
-        master_filename = master_file.get("filename", "master_animation.py")
-        master_class = "MasterExplainerScene"
-        
-        print(f"🎬 Rendering master scene: {master_filename}")
-        try:
-            subprocess.run(["manim", "-qm", master_filename, master_class], check=True)
-            master_video = f"./media/videos/{master_filename.replace('.py', '')}/720p30/{master_class}.mp4"
-            if os.path.exists(master_video):
-                videos.append(master_video)
-                print("✅ Master scene rendered successfully")
+    rendered_jobs = []
+    playlist = HLSPlaylist(output_dir, len(jobs)) if get_hls_mode(hls) else None
+    if playlist:
+        print(f"📺 Streaming scenes to {playlist.path}")
+    
+    def on_start(job: Dict[str, Any]) -> None:
+        emit_event(on_event, "render_start", scene=job["scene"], className=job["className"], profile=job["profile"], quality=job["quality"])
+    
+    def on_finish(job: Dict[str, Any], result: Dict[str, Any]) -> None:
+        emit_event(on_event, "render_finish", scene=job["scene"], className=job["className"], profile=job["profile"], quality=job["quality"],
+                   success=result["success"], cached=result["cached"], duration=result["duration"],
+                   video=job["dest"] if result["success"] else None, error=result["error"])
+    
+    # Results stream back in scene order as soon as each prefix has finished
+    render_cache = get_render_cache()
+    for position, (job, result) in enumerate(zip(jobs, tqdm(render_scenes(jobs, workers, render_cache, on_start), total=len(jobs), desc="Rendering previews" if preview else "Rendering scenes", unit="scene"))):
+        if result["success"]:
+            job["dest"] = publish_video(result["video_path"], job["dest"])
+            videos.append(job["dest"])
+            rendered_jobs.append(job)
+            if playlist:
+                playlist.add_scene(position, job["dest"])
+            if result["cached"]:
+                print(f"♻️  Reused cached render of {job['className']}: {job['dest']}")
             else:
-                print(f"⚠️  Master video file not found: {master_video}")
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            print(f"❌ Error rendering master scene: {e}")
-        
-        # Render individual scenes with progress bar
-        print(f"\n🎬 Rendering {len(scene_files)} individual scenes...")
-        for i, file_data in enumerate(tqdm(scene_files, desc="Rendering scenes", unit="scene"), 1):
-            filename = file_data["filename"]
-            class_name = file_data["className"]
-            
+                print(f"✅ Rendered {job['className']} in {result['duration']:.1f}s ({result['segments_rendered']} animations re-rendered): {job['dest']}")
+        elif result["rejected"]:
+            print(f"🚫 Rejected {job['filename']} before rendering: {result['error']}")
+        else:
+            print(f"❌ Error rendering {job['filename']}: {result['error']}")
+        on_finish(job, result)
+        if playlist and not result["success"]:
+            playlist.skip_scene(position)
+    if playlist:
+        playlist.finish()
+    
+    if preview and rendered_jobs:
+        if on_preview:
+            on_preview(videos)
+        final_jobs = [dict(job, profile=profile, priority=FINAL_PRIORITY, quality="final") for job in rendered_jobs]
+        
+        def upgrade() -> None:
+            # Nobody waits on this thread, so failures are reported here
             try:
-                subprocess.run(["manim", "-qm", filename, class_name], check=True)
-                video_path = f"./media/videos/{filename.replace('.py', '')}/720p30/{class_name}.mp4"
-                if os.path.exists(video_path):
-                    videos.append(video_path)
-                    print(f"✅ Scene {i} rendered: {video_path}")
-                else:
-                    print(f"⚠️  Video file not found after rendering: {video_path}")
-            except (subprocess.CalledProcessError, FileNotFoundError) as e:
-                print(f"❌ Error rendering scene {i}: {e}")
-        
-        # Copy all videos to mp4s directory with proper naming
-        print("\n📁 Copying videos to mp4s directory...")
-        copied_videos = []
-        
-        # Copy master video first
-        if videos and os.path.exists(videos[0]):
-            master_dest = os.path.join(mp4s_dir, "master.mp4")
-            shutil.copy2(videos[0], master_dest)
-            copied_videos.append(master_dest)
-            print(f"✅ Copied master video to: {master_dest}")
-        
-        # Copy individual scene videos
-        for i, video_path in enumerate(tqdm(videos[1:], desc="Copying scene videos", unit="video"), 1):  # Skip master video
-            if os.path.exists(video_path):
-                scene_filename = f"scene_{i}.mp4"
-                dest_path = os.path.join(mp4s_dir, scene_filename)
-                shutil.copy2(video_path, dest_path)
-                copied_videos.append(dest_path)
-                print(f"✅ Copied scene {i} to: {dest_path}")
-            else:
-                print(f"⚠️  Source video not found: {video_path}")
-        
-        # Update videos list to point to copied files (convert to absolute paths)
-        videos = [os.path.abspath(video) for video in copied_videos]
+                final_videos = list(videos)
+                for n, (job, result) in enumerate(zip(final_jobs, render_scenes(final_jobs, workers, render_cache, on_start))):
+                    if result["success"]:
+                        job["dest"] = final_videos[n] = replace_video(result["video_path"], job["dest"])
+                        print(f"⬆️  Final render of {job['className']} swapped in: {job['dest']}")
+                    else:
+                        print(f"⚠️  Keeping preview of {job['className']}, final render failed: {result['error']}")
+                    on_finish(job, result)
+                if on_final:
+                    on_final(final_videos)
+            except Exception as e:
+                print(f"❌ Final-quality upgrade failed, keeping previews: {e}")
         
-    finally:
-        # Return to original directory
-        os.chdir(original_cwd)
+        # Previews are usable now; final renders queue behind other jobs' previews
+        print(f"⬆️  Rendering {len(final_jobs)} scenes at final quality in the background...")
+        threading.Thread(target=upgrade, name="render-upgrade", daemon=True).start()
     
     return videos
 
 def combine_videos(videos: List[str], output_dir: str) -> str:
     """
     Combine all videos into one complete video using ffmpeg
+
+    Stream copy is used when every video shares the same format; otherwise only
+    the videos that differ are re-encoded before concatenating.
     """
     print("\n🎬 COMBINING VIDEOS")
     print("="*60)
@@ -1617,21 +1142,15 @@ def combine_videos(videos: List[str], output_dir: str) -> str:
         print("❌ No videos to combine")
         return ""
     
-    # Create videos list file for ffmpeg concat
-    videos_list_path = os.path.join(output_dir, "generated", "videos_to_concat.txt")
-    os.makedirs(os.path.dirname(videos_list_path), exist_ok=True)
     existing_videos = []
-    
-    with open(videos_list_path, "w", encoding="utf-8") as f:
-        for video in videos:
-            if os.path.exists(video):
-                # Convert to absolute path for ffmpeg
-                abs_video = os.path.abspath(video)
-                f.write(f"file '{abs_video}'\n")
-                existing_videos.append(abs_video)
-                print(f"✅ Added video: {abs_video}")
-            else:
-                print(f"⚠️  Video not found: {video}")
+    for video in videos:
+        if os.path.exists(video):
+            # Convert to absolute path for ffmpeg
+            abs_video = os.path.abspath(video)
+            existing_videos.append(abs_video)
+            print(f"✅ Added video: {abs_video}")
+        else:
+            print(f"⚠️  Video not found: {video}")
     
     if not existing_videos:
         print("❌ No valid videos found to combine")
@@ -1642,16 +1161,14 @@ def combine_videos(videos: List[str], output_dir: str) -> str:
     
     try:
         print("🎬 Combining videos with ffmpeg...")
-        subprocess.run([
-            "ffmpeg",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", videos_list_path,
-            "-c", "copy",
-            "-y",
-            output_video_path
-        ], check=True)
-        
+        report = concat_videos(existing_videos, output_video_path)
+        
+        if report["mode"] == "copy":
+            print(f"⚡ All {len(existing_videos)} videos share one format, joined with stream copy")
+        elif report["mode"] == "reencode":
+            print(f"🔁 Re-encoded {len(report['reencoded'])}/{len(existing_videos)} mismatched videos before joining:")
+            for video, mismatch in report["mismatches"].items():
+                print(f"   {os.path.basename(video)}: {mismatch}")
         print(f"✅ Complete video saved to: {output_video_path}")
         return output_video_path
         
@@ -1659,6 +1176,319 @@ def combine_videos(videos: List[str], output_dir: str) -> str:
         print(f"❌ Error combining videos: {e}")
         return ""
 
+async def process_scene_pipeline_async(overview: Dict[str, Any], scene: Dict[str, Any], api_key: str, scene_index: int, total_scenes: int, model: str = DEFAULT_MODEL, run_phase3: bool = True, render_executor: ThreadPoolExecutor = None, generated_dir: str = None, mp4s_dir: str = None, render_cache: RenderCache = None, final_executor: ThreadPoolExecutor = None, profile: str = None, on_event: Callable[[str, Dict[str, Any]], None] = None, render_priority: int = PREVIEW_PRIORITY) -> Dict[str, Any]:
+    """
+    Take a single scene through Phase 2, Phase 3 and rendering without waiting for other scenes
+
+    With a final_executor the scene is rendered with the preview profile and its
+    re-render with the final profile is started in the background as result["upgrade"].
+    render_priority orders the scene's render against other renders (lower first).
+    on_event receives llm_start, llm_finish, validation, render_start and
+    render_finish events for the scene.
+    """
+    result = {"scene": None, "scene_file": None, "video": None, "upgrade": None}
+    
+    # Phase 2: expand the scene script
+    emit_event(on_event, "llm_start", scene=scene_index, phase=2, attempt=0)
+    try:
+        result["scene"] = await process_scene_phase2_async(scene, api_key, scene_index, total_scenes, model)
+        emit_event(on_event, "llm_finish", scene=scene_index, phase=2, attempt=0, success=True, error=None)
+    except Exception as e:
+        print(f"❌ Exception in scene {scene_index} (Phase 2): {e}")
+        result["scene"] = create_fallback_phase2_scene(scene)
+        emit_event(on_event, "llm_finish", scene=scene_index, phase=2, attempt=0, success=False, error=str(e))
+    
+    if not run_phase3:
+        return result
+    
+    # Phase 3: generate code as soon as this scene's script is ready
+    emit_event(on_event, "llm_start", scene=scene_index, phase=3, attempt=0)
+    try:
+        scene_file = await process_scene_phase3_async(overview, result["scene"], api_key, scene_index, total_scenes, model)
+        emit_event(on_event, "llm_finish", scene=scene_index, phase=3, attempt=0, success=True, error=None)
+    except Exception as e:
+        print(f"❌ Exception in scene {scene_index} (Phase 3): {e}")
+        scene_file = create_fallback_scene_file(result["scene"], scene_index, e)
+        emit_event(on_event, "llm_finish", scene=scene_index, phase=3, attempt=0, success=False, error=str(e))
+    
+    # Send this scene alone back to the model until it validates and renders, within the repair budget
+    repair_budget = get_repair_attempts()
+    attempts = 0
+    while True:
+        errors = scene_file_errors(scene_file)
+        emit_event(on_event, "validation", scene=scene_index, attempt=attempts, valid=not errors, errors=errors)
+        if render_executor is not None and (not errors or attempts >= repair_budget):
+            render_profile = get_preview_profile()["name"] if final_executor is not None else profile
+            quality = "preview" if final_executor is not None else "final"
+            emit_event(on_event, "render_start", scene=scene_index, className=scene_file["className"], profile=render_profile, quality=quality)
+            render_result = await render_scene_file_async(scene_file, scene_index, render_executor, generated_dir, mp4s_dir, render_cache, render_profile, render_priority, overview.get("title"))
+            emit_event(on_event, "render_finish", scene=scene_index, className=scene_file["className"], profile=render_profile, quality=quality,
+                       success=render_result["success"], cached=render_result["cached"], duration=render_result["duration"],
+                       video=render_result.get("dest"), error=render_result["error"])
+            if render_result["success"]:
+                result["video"] = render_result["dest"]
+                if final_executor is not None:
+                    print(f"👀 Scene {scene_index} preview ready in {render_result['duration']:.1f}s: {render_result['dest']}")
+                    result["upgrade"] = asyncio.create_task(upgrade_video_async(render_result["job"], render_result["dest"], final_executor, render_cache, profile, scene_index, on_event))
+                elif render_result["cached"]:
+                    print(f"♻️  Scene {scene_index} reused cached render: {render_result['dest']}")
+                else:
+                    print(f"✅ Scene {scene_index} rendered in {render_result['duration']:.1f}s ({render_result['segments_rendered']} animations re-rendered): {render_result['dest']}")
+                break
+            errors = [render_result["error"]]
+            if attempts >= repair_budget:
+                if render_result["rejected"]:
+                    print(f"🚫 Scene {scene_index} rejected before rendering: {render_result['error']}")
+                else:
+                    print(f"❌ Error rendering scene {scene_index}: {render_result['error']}")
+                break
+        if not errors or attempts >= repair_budget:
+            break
+        
+        attempts += 1
+        print(f"🔧 Repairing scene {scene_index} (attempt {attempts}/{repair_budget}): {errors[0][:200]}")
+        emit_event(on_event, "llm_start", scene=scene_index, phase=3, attempt=attempts)
+        try:
+            scene_file = await process_scene_phase3_async(overview, result["scene"], api_key, scene_index, total_scenes, model, scene_file, errors)
+            emit_event(on_event, "llm_finish", scene=scene_index, phase=3, attempt=attempts, success=True, error=None)
+        except Exception as e:
+            print(f"❌ Exception repairing scene {scene_index}: {e}")
+            emit_event(on_event, "llm_finish", scene=scene_index, phase=3, attempt=attempts, success=False, error=str(e))
+    
+    scene_file["repairAttempts"] = attempts
+    result["scene_file"] = scene_file
+    return result
+
+async def render_scene_file_async(scene_file: Dict[str, Any], scene_index: int, render_executor: ThreadPoolExecutor, generated_dir: str, mp4s_dir: str, render_cache: RenderCache = None, profile: str = None, priority: int = PREVIEW_PRIORITY, lesson: str = None) -> Dict[str, Any]:
+    """
+    Write a scene file and render it on the render executor, copying a successful video to mp4s/
+
+    lesson is the lesson title, which keeps its Manim segment cache apart from other lessons'.
+    """
+    write_scene_file(generated_dir, scene_file["filename"], scene_file["code"])
+    job = {
+        "filename": scene_file["filename"],
+        "className": scene_file["className"],
+        "workdir": generated_dir,
+        "profile": profile,
+        "priority": priority,
+        "lesson": lesson
+    }
+    # Reject scenes that cannot run before they take a render slot
+    render_result = precheck_scene(job)
+    if render_result is None:
+        loop = asyncio.get_running_loop()
+        render_result = await loop.run_in_executor(render_executor, render_scene, job, render_cache, False)
+    if render_result["success"]:
+        render_result["dest"] = publish_video(render_result["video_path"], os.path.join(mp4s_dir, f"scene_{scene_index}"))
+        render_result["job"] = job
+    return render_result
+
+async def upgrade_video_async(job: Dict[str, Any], dest: str, final_executor: ThreadPoolExecutor, render_cache: RenderCache = None, profile: str = None, scene_index: int = None, on_event: Callable[[str, Dict[str, Any]], None] = None) -> Optional[str]:
+    """
+    Re-render a previewed scene with the final profile and swap it in over the preview
+
+    Returns the final video's path, or None when the preview is kept.
+    """
+    # Never ahead of the scene's own priority, so batch upgrades stay behind interactive work
+    final_job = dict(job, profile=profile, priority=max(FINAL_PRIORITY, job.get("priority", PREVIEW_PRIORITY)))
+    emit_event(on_event, "render_start", scene=scene_index, className=job["className"], profile=profile, quality="final")
+    render_result = await asyncio.get_running_loop().run_in_executor(final_executor, render_scene, final_job, render_cache, False)
+    final_dest = replace_video(render_result["video_path"], dest) if render_result["success"] else None
+    emit_event(on_event, "render_finish", scene=scene_index, className=job["className"], profile=profile, quality="final",
+               success=render_result["success"], cached=render_result["cached"], duration=render_result["duration"],
+               video=final_dest, error=render_result["error"])
+    if not render_result["success"]:
+        print(f"⚠️  Keeping preview of {job['className']}, final render failed: {render_result['error']}")
+        return None
+    print(f"⬆️  Final render of {job['className']} swapped in: {final_dest}")
+    return final_dest
+
+async def process_scenes_pipeline_async(scene_data: Dict[str, Any], api_key: str, model: str = DEFAULT_MODEL, run_phase3: bool = True, output_dir: str = None, max_workers: int = None, progress_callback: Callable[[int, int], None] = None, preview: bool = None, on_preview: Callable[[List[str]], None] = None, profile: str = None, hls: bool = None, on_event: Callable[[str, Dict[str, Any]], None] = None, render_executor: ThreadPoolExecutor = None, render_priority: int = PREVIEW_PRIORITY) -> Dict[str, Any]:
+    """
+    Stream every scene through Phase 2, Phase 3 and (optionally) rendering
+
+    Each scene moves to the next stage as soon as its own previous stage is done,
+    so the total time is close to the slowest single scene's chain instead of the
+    sum of the slowest scene at every phase barrier. Rendering only happens when
+    output_dir is given.
+
+    Scenes are rendered with the named render profile (default RENDER_PROFILE).
+    In preview mode each scene is rendered with the preview profile first and
+    re-rendered with the final profile in the background; on_preview is called with the preview
+    videos, and the pipeline returns once every final render has been swapped in.
+    In HLS mode each scene is appended to <output_dir>/hls/lesson.m3u8 as soon as it
+    and every scene before it have rendered. The master overview scene is left
+    out of the playlist, since it lists every scene and can only render last.
+    on_event receives every scene's events (see process_scene_pipeline_async);
+    the master scene's render events have scene 0. Pass a render_executor to
+    share one set of render threads between several pipelines; it is left running.
+    render_priority orders this pipeline's renders against other renders in the
+    process (lower first), e.g. BATCH_PRIORITY for lessons nobody is watching.
+    """
+    print("\n🎬 SCENE PIPELINE: Phase 2 → Phase 3 → Render (Streaming)")
+    print("="*70)
+    
+    overview = scene_data.get('overview', {})
+    scenes = scene_data.get('scenes', [])
+    
+    shared_executor = render_executor
+    render_executor = None
+    final_executor = None
+    playlist = None
+    render_cache = None
+    warmups = {}
+    generated_dir = mp4s_dir = None
+    if run_phase3 and output_dir:
+        profile = get_render_profile(profile)["name"]
+        generated_dir, mp4s_dir = prepare_render_dirs(output_dir)
+        render_executor = shared_executor or ThreadPoolExecutor(max_workers=get_render_workers(max_workers), thread_name_prefix="render")
+        # Both executors draw on the same render server workers, or CLI slots when
+        # the server is off, so at most this many manim renders run at once
+        get_cli_slots(get_render_workers(max_workers))
+        if get_preview_mode(preview):
+            # Final renders wait on their own threads, so a waiting preview always
+            # takes the next free render worker ahead of them (FINAL_PRIORITY)
+            final_executor = ThreadPoolExecutor(max_workers=get_render_workers(max_workers), thread_name_prefix="render-final")
+        if get_hls_mode(hls):
+            playlist = HLSPlaylist(output_dir, len(scenes))
+            print(f"📺 Streaming scenes to {playlist.path}")
+        render_cache = get_render_cache()
+        # Build the Manim symbol table and start the render workers while the LLM phases run
+        loop = asyncio.get_running_loop()
+        warmups = {
+            "Manim symbol table": loop.run_in_executor(None, load_manim_symbols),
+            "Render server warm-up": loop.run_in_executor(None, warm_render_server, get_render_workers(max_workers))
+        }
+    
+    completed = 0
+    
+    async def run_scene(i: int, scene: Dict[str, Any]) -> Dict[str, Any]:
+        nonlocal completed
+        scene_result = await process_scene_pipeline_async(overview, scene, api_key, i, len(scenes), model, run_phase3, render_executor, generated_dir, mp4s_dir, render_cache, final_executor, profile, on_event, render_priority)
+        if playlist:
+            # Segmenting is a quick stream copy, but keep ffmpeg off the event loop
+            if scene_result["video"]:
+                await asyncio.get_running_loop().run_in_executor(None, playlist.add_scene, i - 1, scene_result["video"])
+            else:
+                playlist.skip_scene(i - 1)
+        completed += 1
+        if progress_callback:
+            progress_callback(completed, len(scenes))
+        return scene_result
+    
+    try:
+        print(f"\n📝 Processing {len(scenes)} scenes in parallel...")
+        results = await tqdm.gather(*[run_scene(i, scene) for i, scene in enumerate(scenes, 1)], desc="Scene pipeline", unit="scene")
+        
+        output = {"phase2_data": build_phase2_data(scene_data, [r["scene"] for r in results])}
+        if not run_phase3:
+            return output
+        
+        output["phase3_data"] = build_phase3_data(overview, [r["scene_file"] for r in results])
+        if render_executor is None:
+            return output
+        if playlist:
+            playlist.finish()
+            output["playlist"] = playlist.path
+        
+        # The master scene lists every scene's class, so it can only render once Phase 3 is done
+        master_file = output["phase3_data"]["masterFile"]
+        write_scene_file(generated_dir, master_file["filename"], master_file["content"])
+        master_job = {
+            "filename": master_file["filename"],
+            "className": "MasterExplainerScene",
+            "workdir": generated_dir,
+            "profile": get_preview_profile()["name"] if final_executor is not None else profile,
+            "priority": render_priority,
+            "lesson": overview.get("title")
+        }
+        master_quality = "preview" if final_executor is not None else "final"
+        emit_event(on_event, "render_start", scene=0, className=master_job["className"], profile=master_job["profile"], quality=master_quality)
+        master_result = await asyncio.get_running_loop().run_in_executor(render_executor, render_scene, master_job, render_cache)
+        
+        videos = []
+        # (preview path, upgrade task) pairs
+        upgrades = [(r["video"], r["upgrade"]) for r in results if r["upgrade"]]
+        master_dest = publish_video(master_result["video_path"], os.path.join(mp4s_dir, "master")) if master_result["success"] else None
+        emit_event(on_event, "render_finish", scene=0, className=master_job["className"], profile=master_job["profile"], quality=master_quality,
+                   success=master_result["success"], cached=master_result["cached"], duration=master_result["duration"],
+                   video=master_dest, error=master_result["error"])
+        if master_result["success"]:
+            videos.append(master_dest)
+            if final_executor is not None:
+                upgrades.append((master_dest, asyncio.create_task(upgrade_video_async(master_job, master_dest, final_executor, render_cache, profile, 0, on_event))))
+            print("✅ Master scene rendered successfully")
+        else:
+            print(f"❌ Error rendering master scene: {master_result['error']}")
+        videos.extend(r["video"] for r in results if r["video"])
+        output["videos"] = videos
+        
+        if upgrades:
+            if on_preview:
+                await asyncio.get_running_loop().run_in_executor(None, on_preview, videos)
+            print(f"\n⬆️  Waiting for {len(upgrades)} final-quality renders...")
+            upgraded = await asyncio.gather(*[task for _, task in upgrades])
+            # A final profile in another container leaves its video under a new extension
+            swapped = {preview: final for (preview, _), final in zip(upgrades, upgraded) if final}
+            output["videos"] = [swapped.get(video, video) for video in videos]
+            print(f"⬆️  {len(swapped)}/{len(upgrades)} scenes upgraded to final quality")
+        
+        return output
+    finally:
+        # Usually long done; waiting means failures are reported and nothing outlives the pipeline
+        await await_warmups(warmups)
+        if render_executor is not None and render_executor is not shared_executor:
+            render_executor.shutdown(wait=False)
+        if final_executor is not None:
+            final_executor.shutdown(wait=False)
+
+def process_scenes_pipeline(scene_data: Dict[str, Any], api_key: str, model: str = DEFAULT_MODEL, run_phase3: bool = True, output_dir: str = None, max_workers: int = None, progress_callback: Callable[[int, int], None] = None, preview: bool = None, on_preview: Callable[[List[str]], None] = None, profile: str = None, hls: bool = None, on_event: Callable[[str, Dict[str, Any]], None] = None) -> Dict[str, Any]:
+    """
+    Wrapper function to run the async scene pipeline
+    """
+    return asyncio.run(process_scenes_pipeline_async(scene_data, api_key, model, run_phase3, output_dir, max_workers, progress_callback, preview, on_preview, profile, hls, on_event))
+
+async def generate_lesson_async(topic: str, api_key: str, output_dir: str, model: str = DEFAULT_MODEL, render: bool = True, max_workers: int = None, profile: str = None, render_executor: ThreadPoolExecutor = None, render_priority: int = PREVIEW_PRIORITY) -> Dict[str, Any]:
+    """
+    Generate one lesson end to end without prompts, writing everything into output_dir
+
+    Runs Phase 1, streams the scenes through Phase 2, Phase 3 and (when render is
+    True) rendering, saves every scene map and stitches complete.mp4. Several
+    lessons can run at once on one event loop, sharing the LLM client, the caches
+    and, through render_executor, the render threads; render_priority orders its
+    renders against other renders (lower first). Returns {"title",
+    "scene_count", "videos", "complete_video"}; raises when Phase 1 fails.
+    """
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(None, call_openai_api, generate_scene_prompt(topic), api_key, model, schema_for(1))
+    scene_data = parse_json_with_fallback(response, f"Phase 1 for '{topic}'")
+    if not scene_data.get("scenes"):
+        raise ValueError(f"Phase 1 returned no scenes for '{topic}'")
+    save_scene_map(scene_data, os.path.join(output_dir, "scene_map_phase_1.json"))
+    
+    pipeline_output = await process_scenes_pipeline_async(
+        scene_data, api_key, model,
+        run_phase3=True,
+        output_dir=output_dir if render else None,
+        max_workers=max_workers,
+        preview=False,
+        profile=profile,
+        render_executor=render_executor,
+        render_priority=render_priority
+    )
+    save_scene_map(pipeline_output["phase2_data"], os.path.join(output_dir, "scene_map_phase_2.json"))
+    save_scene_map(pipeline_output["phase3_data"], os.path.join(output_dir, "scene_map_phase_3.json"))
+    
+    videos = pipeline_output.get("videos", [])
+    complete_video = await loop.run_in_executor(None, combine_videos, videos, output_dir) if videos else ""
+    return {
+        "title": scene_data.get("overview", {}).get("title"),
+        "scene_count": len(scene_data.get("scenes", [])),
+        "videos": videos,
+        "complete_video": complete_video
+    }
+
 def main():
     """
     Main function to run the scene generation process
@@ -1671,8 +1501,27 @@ def main():
                        help="Topic to explain (if not provided, will prompt for input)")
     parser.add_argument("--model", type=str, default=DEFAULT_MODEL,
                        help=f"OpenAI model to use (default: {DEFAULT_MODEL})")
+    parser.add_argument("--structured-output", action="store_true",
+                       help="Request each phase's payload through the API's JSON schema response format")
+    parser.add_argument("--render-workers", type=int, default=None,
+                       help="Number of scenes to render in parallel (default: RENDER_WORKERS env var or half the CPU cores)")
+    parser.add_argument("--preview", action="store_true", default=None,
+                       help="Render quick previews first, then swap in final-quality renders (default: RENDER_PREVIEW env var)")
+    parser.add_argument("--profile", type=str, default=None,
+                       help="Render profile: preview, mobile, standard, hd, 4k or one from RENDER_PROFILES (default: RENDER_PROFILE env var or standard)")
+    parser.add_argument("--hls", action="store_true", default=None,
+                       help="Stream scenes into hls/lesson.m3u8 in the job workspace as they finish rendering (default: RENDER_HLS env var)")
     args = parser.parse_args()
     
+    if args.structured_output:
+        os.environ["LLM_STRUCTURED_OUTPUT"] = "1"
+    
+    try:
+        get_render_profile(args.profile)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return
+    
     
     print("🎬 Manim Explainer Scene Generator")
     print("="*50)
@@ -1689,10 +1538,10 @@ def main():
         print("❌ Error: Please provide a topic.")
         return
     
-    main_main(topic, args.model, args.yes)
+    main_main(topic, args.model, args.yes, args.render_workers, args.preview, args.profile, args.hls)
 
 
-def main_main(topic: str, model: str = DEFAULT_MODEL, arg_yes: bool = True) -> None :
+def main_main(topic: str, model: str = DEFAULT_MODEL, arg_yes: bool = True, render_workers: int = None, preview: bool = None, profile: str = None, hls: bool = None) -> None :
     
     # Load environment variables from .env file
     load_dotenv(dotenv_path="../.env")
@@ -1714,7 +1563,7 @@ def main_main(topic: str, model: str = DEFAULT_MODEL, arg_yes: bool = True) -> N
         prompt = generate_scene_prompt(topic)
         
         # Call OpenAI API
-        response = call_openai_api(prompt, api_key, model)
+        response = call_openai_api(prompt, api_key, model, schema_for(1))
         
         # Parse JSON response with robust fallback
         try:
@@ -1725,13 +1574,12 @@ def main_main(topic: str, model: str = DEFAULT_MODEL, arg_yes: bool = True) -> N
             print(response)
             return
         
-        # Save Phase 1 to file
-
-        # Get the directory of the current script
-        base_dir = os.path.dirname(__file__)
+        # Everything this run writes goes into its own workspace, so runs never overwrite each other
+        output_dir = create_workspace(new_job_id("lesson"))
+        print(f"📂 Workspace: {output_dir}")
 
-        # Join it with your relative path
-        phase1_output_path = os.path.join(base_dir, "outputs", "scene_map_phase_1.json")
+        # Save Phase 1 to file
+        phase1_output_path = os.path.join(output_dir, "scene_map_phase_1.json")
         save_scene_map(scene_data, phase1_output_path)
         
         # Print Phase 1 results
@@ -1740,20 +1588,32 @@ def main_main(topic: str, model: str = DEFAULT_MODEL, arg_yes: bool = True) -> N
         print("\n✅ Phase 1 completed successfully!")
         print("📁 Phase 1 output saved to:", phase1_output_path)
         
-        # Ask user if they want to proceed to Phase 2
+        # Ask up front how far to go, so scenes can stream through every phase without barriers
         proceed = get_user_input("\n🎬 Proceed to Phase 2 (detailed script generation)?", arg_yes)
+        proceed_phase3 = proceed and get_user_input("\n🎬 Proceed to Phase 3 (Manim code generation and video rendering)?", arg_yes)
+        render_videos_choice = proceed_phase3 and get_user_input("\n🎬 Render videos and create complete animation?", arg_yes)
         
         if proceed:
-            # Process Phase 2
-            phase2_data = process_scenes_phase2(scene_data, api_key, model)
+            def combine_previews(videos: List[str]) -> None:
+                preview_video = combine_videos(videos, output_dir)
+                if preview_video:
+                    print(f"\n👀 Preview animation ready at: {preview_video} (final quality on the way)")
+            
+            # Stream each scene through Phase 2, Phase 3 and rendering
+            pipeline_output = process_scenes_pipeline(
+                scene_data, api_key, model,
+                run_phase3=proceed_phase3,
+                output_dir=output_dir if render_videos_choice else None,
+                max_workers=render_workers,
+                preview=preview,
+                on_preview=combine_previews,
+                profile=profile,
+                hls=hls
+            )
+            phase2_data = pipeline_output["phase2_data"]
             
             # Save Phase 2 to file
-
-            # Get the directory of the current script
-            base_dir = os.path.dirname(__file__)
-
-            # Join it with your relative path
-            phase2_output_path = os.path.join(base_dir, "outputs", "scene_map_phase_2.json")
+            phase2_output_path = os.path.join(output_dir, "scene_map_phase_2.json")
             save_scene_map(phase2_data, phase2_output_path)
             
             # Print Phase 2 results
@@ -1763,35 +1623,18 @@ def main_main(topic: str, model: str = DEFAULT_MODEL, arg_yes: bool = True) -> N
             print("\n✅ Phase 2 completed successfully!")
             print("📁 Phase 2 output saved to:", phase2_output_path)
             
-            # Ask user if they want to proceed to Phase 3
-            proceed_phase3 = get_user_input("\n🎬 Proceed to Phase 3 (Manim code generation and video rendering)?", arg_yes)
-            
             if proceed_phase3:
-                # Process Phase 3
-                phase3_data = process_scenes_phase3(phase2_data, api_key, model)
+                phase3_data = pipeline_output["phase3_data"]
                 
                 # Save Phase 3 to file
-                # Get the directory of the current script
-                base_dir = os.path.dirname(__file__)
-
-                # Join it with your relative path
-                phase3_output_path = os.path.join(base_dir, "outputs", "scene_map_phase_3.json")
+                phase3_output_path = os.path.join(output_dir, "scene_map_phase_3.json")
                 save_scene_map(phase3_data, phase3_output_path)
                 
                 print("\n✅ Phase 3 code generation completed!")
                 print("📁 Phase 3 output saved to:", phase3_output_path)
                 
-                # Ask user if they want to render videos
-                render_videos_choice = get_user_input("\n🎬 Render videos and create complete animation?", arg_yes)
-                
                 if render_videos_choice:
-                    # Render videos
-                    base_dir = os.path.dirname(__file__)
-                    # Join it with your relative path
-                    output_dir = os.path.join(base_dir, "outputs")            
-
-            
-                    videos = render_videos(phase3_data, output_dir)
+                    videos = pipeline_output["videos"]
                     
                     if videos:
                         # Combine videos
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+AST-based fix-up for generated Manim code
+Parses a scene once and finds every fix in a single tree walk. Each fix is an
+edit to the source span of the node it changes, so comments and formatting
+everywhere else are kept. Code that does not parse gets the textual fixes
+first, then the AST pass if the textual fixes made it parse.
+"""
+
+import ast
+import re
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# Names that do not exist in Manim CE, and what to use instead
+NAME_RENAMES = {
+    "ShowCreation": "Create",
+    "CYAN": "BLUE",
+    "AMBER": "YELLOW",
+    "AZURE": "LIGHT_BLUE",
+    "FadeInFromUp": "FadeIn",
+    "FadeInFromDown": "FadeIn",
+    "FadeInFromLeft": "FadeIn",
+    "FadeInFromRight": "FadeIn"
+}
+
+# Module constants that moved onto config
+CONFIG_CONSTANTS = {
+    "FRAME_WIDTH": "frame_width",
+    "FRAME_HEIGHT": "frame_height"
+}
+
+METHOD_RENAMES = {
+    "get_bottom_center": "get_bottom",
+    "get_left_center": "get_left",
+    "get_right_center": "get_right",
+    "get_top_center": "get_top",
+    "set_scale": "scale"
+}
+
+# Keyword arguments that current Manim rejects
+REMOVED_KEYWORDS = {"max_width", "background_lines_color", "background_lines_stroke_width", "background_lines_opacity"}
+
+# Truncated keyword names the model sometimes emits as bare positional arguments
+INCOMPLETE_ARGUMENTS = {
+    "fill_": ("fill_opacity", "0.5"),
+    "stroke_": ("stroke_width", "2"),
+    "color_": ("color", "WHITE")
+}
+
+# Largest safe multiple of each direction vector before objects leave the frame
+POSITION_LIMITS = {"UP": 3, "DOWN": 3, "LEFT": 5, "RIGHT": 5}
+
+# Scene classes where self.camera.frame really exists
+MOVING_CAMERA_SCENES = {"MovingCameraScene", "ZoomedScene"}
+
+# An edit's replacement is fixed text, or built from the edited source of the spans it keeps
+Replacement = Union[str, Callable[[Callable[[int, int], str]], str]]
+
+def _dotted(node: ast.AST) -> Optional[str]:
+    # "self.camera.frame" for the matching Attribute chain, None for anything else
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+def _is_name_call(node: ast.AST, name: str) -> bool:
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == name
+
+def _is_number(node: ast.AST) -> bool:
+    return isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool)
+
+class ManimFixer(ast.NodeVisitor):
+    """
+    Single walk collecting every Manim API fix as an edit to the source
+
+    Offsets are UTF-8 byte offsets, like the positions the parser records.
+    """
+
+    def __init__(self, code: str):
+        self.source = code.encode("utf-8")
+        self.line_offsets = [0]
+        for line in self.source.splitlines(keepends=True):
+            self.line_offsets.append(self.line_offsets[-1] + len(line))
+        self.moving_camera = False
+        # (start, end) -> replacement; a later fix of the same span replaces an earlier one
+        self.edits: Dict[Tuple[int, int], Replacement] = {}
+        self.removed: Dict[int, ast.stmt] = {}
+
+    def span(self, node: ast.AST) -> Tuple[int, int]:
+        return (self.line_offsets[node.lineno - 1] + node.col_offset,
+                self.line_offsets[node.end_lineno - 1] + node.end_col_offset)
+
+    def replace(self, node: ast.AST, replacement: Replacement) -> None:
+        self.edits[self.span(node)] = replacement
+
+    def rename_attr(self, node: ast.Attribute, attr: str) -> None:
+        # The attribute name is the last thing in an Attribute node's span
+        _, end = self.span(node)
+        self.edits[(end - len(node.attr.encode("utf-8")), end)] = attr
+
+    def apply(self) -> str:
+        """
+        Apply the collected edits; edits inside a span another edit replaces only
+        survive where that edit keeps the inner source
+        """
+        # Outer spans before the spans nested at their start; insertions (start == end) first
+        edits = sorted(self.edits.items(), key=lambda item: (item[0][0], item[0][1] != item[0][0], -item[0][1]))
+
+        def render(lo: int, hi: int) -> str:
+            parts = []
+            pos = consumed = lo
+            for (start, end), replacement in edits:
+                # Skip edits outside the range or inside one already applied; an insertion
+                # at the end of an applied span belongs to that span
+                if start < pos or end > hi or (start == end == consumed and consumed > lo):
+                    continue
+                parts.append(self.source[pos:start].decode("utf-8"))
+                parts.append(replacement if isinstance(replacement, str) else replacement(render))
+                pos = end
+                if end > start:
+                    consumed = end
+            parts.append(self.source[pos:hi].decode("utf-8"))
+            return "".join(parts)
+
+        return render(0, len(self.source))
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        outer = self.moving_camera
+        self.moving_camera = any(_dotted(base) in MOVING_CAMERA_SCENES for base in node.bases)
+        self.generic_visit(node)
+        self.moving_camera = outer
+
+    def visit_Expr(self, node: ast.Expr) -> None:
+        if not self.moving_camera:
+            # Camera animations only work on MovingCameraScene, hold the frame instead
+            for child in ast.walk(node.value):
+                if isinstance(child, ast.Attribute) and child.attr == "animate" and _dotted(child.value) in ("self.camera.frame", "self.camera.frame_center"):
+                    self.replace(node.value, "self.wait(0.5)")
+                    return
+
+        # self.play(self.wait(x)) -> self.wait(x)
+        value = node.value
+        if (isinstance(value, ast.Call) and _dotted(value.func) == "self.play" and len(value.args) == 1
+                and isinstance(value.args[0], ast.Call) and _dotted(value.args[0].func) == "self.wait"):
+            inner_start, inner_end = self.span(value.args[0])
+            self.replace(value, lambda render: render(inner_start, inner_end))
+
+        self.generic_visit(node)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        # BLUE = BLUE makes the name local and raises UnboundLocalError
+        if (len(node.targets) == 1 and isinstance(node.targets[0], ast.Name) and isinstance(node.value, ast.Name)
+                and node.targets[0].id == node.value.id):
+            self.removed[id(node)] = node
+            return
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if not isinstance(node.ctx, ast.Load):
+            return
+        if node.id in NAME_RENAMES:
+            self.replace(node, NAME_RENAMES[node.id])
+        elif node.id in CONFIG_CONSTANTS:
+            self.replace(node, f"config.{CONFIG_CONSTANTS[node.id]}")
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr in METHOD_RENAMES:
+            self.rename_attr(node, METHOD_RENAMES[node.attr])
+        if not self.moving_camera and _dotted(node.value) == "self.camera.frame":
+            self.rename_attr(node.value, "frame_center")
+        self.generic_visit(node)
+
+    def visit_BinOp(self, node: ast.BinOp) -> None:
+        self.generic_visit(node)
+        # UP * 12 -> UP * 3 so objects stay inside the frame
+        if isinstance(node.op, ast.Mult):
+            for direction, factor in ((node.left, node.right), (node.right, node.left)):
+                if isinstance(direction, ast.Name) and direction.id in POSITION_LIMITS and _is_number(factor) and factor.value >= 8:
+                    self.replace(factor, str(POSITION_LIMITS[direction.id]))
+
+    def visit_Call(self, node: ast.Call) -> None:
+        self.generic_visit(node)
+        func = node.func
+        args = list(node.args)
+        keywords = list(node.keywords)
+        added: List[str] = []
+        suffix = None
+
+        if isinstance(func, ast.Name):
+            name = NAME_RENAMES.get(func.id, func.id)
+            if name == "SVGMobject":
+                # No external assets are shipped with scenes, fall back to a basic shape
+                self.replace(node, "Circle()")
+                return
+            if name == "Create" and len(args) == 1 and not keywords:
+                # Create only draws outlines; groups and named mobjects are safer with Write
+                target = args[0]
+                if isinstance(target, ast.Name) or any(isinstance(n, ast.Name) and n.id == "VGroup" for n in ast.walk(target)):
+                    self.replace(func, "Write")
+            if name == "VGroup":
+                if len(args) == 1 and isinstance(args[0], ast.Tuple):
+                    args = list(args[0].elts)
+                # Only VMobjects can be grouped
+                args = [arg for arg in args if not _is_number(arg)]
+
+        elif isinstance(func, ast.Attribute):
+            attr = METHOD_RENAMES.get(func.attr, func.attr)
+            if attr == "get_tex":
+                font_size = next((k for k in keywords if k.arg == "font_size"), None)
+                if font_size is not None and _is_number(font_size.value):
+                    keywords.remove(font_size)
+                    # Default font size is 36, keep the result in the readable 0.6-0.8 range
+                    suffix = f".scale({round(max(0.6, min(0.8, font_size.value.value / 36.0)), 2)})"
+            elif attr == "set_style":
+                keywords = [k for k in keywords if k.arg != "opacity"]
+            elif attr == "scale" and len(args) == 1 and _is_number(args[0]) and args[0].value == 0:
+                # Scaling to zero breaks later transforms, hide the mobject instead
+                self.rename_attr(func, "set_opacity")
+
+        # Bare fill_/stroke_/color_ placeholders become real keyword arguments
+        positional = []
+        for arg in args:
+            if isinstance(arg, ast.Name) and arg.id in INCOMPLETE_ARGUMENTS:
+                added.append("=".join(INCOMPLETE_ARGUMENTS[arg.id]))
+            else:
+                positional.append(arg)
+
+        # Drop unsupported keywords, and keep only the last of any repeated keyword
+        kept = {}
+        unpacked = []
+        for keyword in keywords:
+            if keyword.arg is None:
+                unpacked.append(keyword)
+            elif keyword.arg not in REMOVED_KEYWORDS:
+                kept.pop(keyword.arg, None)
+                kept[keyword.arg] = keyword
+
+        arguments = positional + list(kept.values()) + unpacked
+        if added or arguments != node.args + node.keywords:
+            self.rewrite_arguments(node, arguments, added)
+        if suffix:
+            _, end = self.span(node)
+            self.edits[(end, end)] = suffix
+
+    def rewrite_arguments(self, node: ast.Call, arguments: List[ast.AST], added: List[str]) -> None:
+        # Replace the argument list with the kept arguments, in source order, then the added ones
+        original = node.args + node.keywords
+        if not original or any(isinstance(arg, ast.GeneratorExp) for arg in node.args):
+            return
+        start = min(self.span(arg)[0] for arg in original)
+        end = max(self.span(arg)[1] for arg in original)
+        spans = sorted(self.span(arg) for arg in arguments)
+        self.edits[(start, end)] = lambda render: ", ".join([render(*span) for span in spans] + added)
+
+    def remove_statements(self, tree: ast.AST) -> None:
+        # Delete removed statements with their lines, leaving a pass where a block would be empty
+        emptied = set()
+        for node in ast.walk(tree):
+            for field in ("body", "orelse", "finalbody"):
+                block = getattr(node, field, None)
+                if isinstance(block, list) and block and all(id(stmt) in self.removed for stmt in block):
+                    emptied.add(id(block[-1]))
+        for key, stmt in self.removed.items():
+            start, end = self.span(stmt)
+            line_start = self.line_offsets[stmt.lineno - 1]
+            line_end = self.source.find(b"\n", end)
+            line_end = len(self.source) if line_end == -1 else line_end + 1
+            rest = self.source[end:line_end].strip()
+            if key in emptied or self.source[line_start:start].strip() or (rest and not rest.startswith(b"#")):
+                # Keeps the block non-empty, and is safe beside other statements on the line
+                self.edits[(start, end)] = "pass"
+            else:
+                self.edits[(line_start, line_end)] = ""
+
+def fix_manim_ast(code: str) -> Optional[str]:
+    """
+    Apply all fixes with one parse and one tree walk, or return None if the code does not parse
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    fixer = ManimFixer(code)
+    fixer.visit(tree)
+    fixer.remove_statements(tree)
+    fixed = fixer.apply()
+    try:
+        ast.parse(fixed)
+    except SyntaxError:
+        # An edit the fixer did not anticipate broke the code; better unfixed than unparseable
+        return code
+    return fixed
+
+_TEXT_RENAMES = {**NAME_RENAMES, **{name: f"config.{attr}" for name, attr in CONFIG_CONSTANTS.items()}}
+_TEXT_RENAME_PATTERN = re.compile(r"\b(?:" + "|".join(_TEXT_RENAMES) + r")\b")
+_METHOD_RENAME_PATTERN = re.compile(r"\.(" + "|".join(METHOD_RENAMES) + r")\(")
+
+_INDENT_KEYWORDS = ('scene_', 'icon_', 'bullet_', 'title_', 'text_', 'rect_', 'diag_', 'w_', 'h_')
+_INDENT_CALLS = ('Text(', 'Circle(', 'Rectangle(', 'Square(', 'Line(', 'Dot(', 'VGroup(', 'Polygon(')
+
+def fix_manim_text(code: str) -> str:
+    """
+    Textual fixes for code that does not parse: indentation, escaping and malformed calls
+    """
+    # Re-indent scene content that lost or gained a level
+    lines = code.split('\n')
+    fixed_lines = []
+    in_scene_method = False
+    for line in lines:
+        stripped = line.strip()
+        looks_like_content = any(keyword in line for keyword in _INDENT_CALLS + _INDENT_KEYWORDS)
+        if 'def construct(self):' in line:
+            in_scene_method = True
+        elif in_scene_method and stripped and looks_like_content and (line.startswith(' ' * 16) or not line.startswith((' ', '\t'))):
+            line = '        ' + stripped
+        elif not in_scene_method and stripped.startswith(_INDENT_KEYWORDS) and not line.startswith('        '):
+            line = '        ' + stripped
+        fixed_lines.append(line)
+    code = '\n'.join(fixed_lines)
+
+    # Renames that are safe on tokens even without a parse tree
+    code = _TEXT_RENAME_PATTERN.sub(lambda m: _TEXT_RENAMES[m.group(0)], code)
+    code = _METHOD_RENAME_PATTERN.sub(lambda m: f".{METHOD_RENAMES[m.group(1)]}(", code)
+
+    # Escaped quotes around font names
+    code = re.sub(r'font=\\"([^"]+)\\"', r'font="\1"', code)
+
+    # Incomplete parameters, including ones after keyword arguments which do not parse
+    code = re.sub(r'\bfill_\s*(?=[,)])', 'fill_opacity=0.5', code)
+    code = re.sub(r'\bstroke_\s*(?=[,)])', 'stroke_width=2', code)
+    code = re.sub(r'\bcolor_\s*(?=[,)])', 'color=WHITE', code)
+
+    # Malformed VGroup constructors: VGroup(((a, b) / VGroup((*items) / VGroup((a, b)
+    code = re.sub(r'VGroup\(\s*\(\s*\(', 'VGroup(', code)
+    code = re.sub(r'VGroup\(\s*\(\s*\*', 'VGroup(*', code)
+    code = re.sub(r'VGroup\(\s*\(\s*([^()]+)\)\s*$', r'VGroup(\1)', code, flags=re.MULTILINE)
+
+    # Doubled commas left behind by the model
+    code = re.sub(r',\s*,', ',', code)
+    return code
+
+def apply_manim_fixes(code: str) -> str:
+    """
+    Fix common Manim API mistakes, preferring the AST pass and falling back to text fixes
+    """
+    fixed = fix_manim_ast(code)
+    if fixed is not None:
+        return fixed
+
+    code = fix_manim_text(code)
+    fixed = fix_manim_ast(code)
+    return fixed if fixed is not None else code
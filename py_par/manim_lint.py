@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Rule-table linter for generated Manim code
+All rule triggers are compiled once into a single scanner, so validating a scene
+is one pass over the code no matter how many rules there are
+"""
+
+import re
+from typing import Dict, Any, List, Tuple
+
+# Each rule fires where one of its literal triggers occurs and its pattern matches there.
+#   trigger   literal string (or list of strings) the scanner looks for
+#   pattern   regex matched at the trigger; defaults to the trigger itself
+#   scope     "line" to match the pattern from the start of the trigger's line instead
+#   severity  "issue" (default, makes the code invalid) or "warning"
+#   requires  marker that must also appear somewhere in the code
+#   unless    marker that suppresses the rule when it appears anywhere in the code
+#   marker    True for triggers that only feed requires/unless and are never reported
+# Messages may reference named groups from the pattern, e.g. {color}
+RULES: List[Dict[str, Any]] = [
+    {"id": "indentation", "trigger": ["scene_", "icon_", "bullet_"], "scope": "line",
+     "pattern": r"(?! {8})[ \t]*(?:scene_|icon_|bullet_)",
+     "message": "Indentation error - scene content should be indented"},
+    {"id": "camera_frame", "trigger": "self.camera.frame", "pattern": r"self\.camera\.frame(?!_center\.animate)",
+     "message": "Uses deprecated camera.frame API - should use camera.frame_center or avoid camera animations"},
+    {"id": "camera_frame_center_animate", "trigger": "self.camera.frame_center.animate",
+     "message": "Uses camera.frame_center.animate - this doesn't work, should use object animations instead"},
+    {"id": "get_tex_font_size", "trigger": "font_size=", "requires": "get_tex",
+     "message": "Uses font_size parameter in get_tex() - should use .scale() method instead"},
+    {"id": "svg_mobject", "trigger": "SVGMobject",
+     "message": "Uses SVGMobject - should use basic shapes instead"},
+    {"id": "show_creation", "trigger": "ShowCreation",
+     "message": "Uses deprecated ShowCreation - should use Create instead"},
+    {"id": "create_vgroup", "trigger": "Create(", "pattern": r"Create\(\s*[^)]*VGroup[^)]*\)",
+     "message": "Uses Create() on VGroup - should use Write() or FadeIn() instead"},
+    {"id": "undefined_color", "trigger": ["CYAN", "AMBER", "AZURE"], "pattern": r"(?P<color>\w+)",
+     "message": "Uses undefined color constant '{color}' - should use standard Manim colors"},
+    {"id": "undefined_animation", "trigger": "FadeInFrom", "pattern": r"(?P<animation>FadeInFrom(?:Up|Down|Left|Right))",
+     "message": "Uses undefined animation '{animation}' - should use standard Manim animations"},
+    {"id": "number_plane_args", "trigger": "background_lines_", "pattern": r"background_lines_(?:color|stroke_width|opacity)",
+     "message": "Uses unsupported NumberPlane arguments - these parameters don't exist"},
+    {"id": "rectangle_center_methods", "trigger": [".get_bottom_center()", ".get_left_center()", ".get_right_center()", ".get_top_center()"],
+     "message": "Uses deprecated Rectangle methods - should use .get_bottom(), .get_left(), etc."},
+    {"id": "font_quote_escaping", "trigger": 'font=\\"',
+     "message": "Uses malformed quote escaping in font parameter"},
+    {"id": "play_wait", "trigger": "self.play(self.wait(",
+     "message": "Uses malformed parentheses in camera animation fix"},
+    {"id": "incomplete_fill", "trigger": "fill_", "pattern": r"fill_\s*[,)]",
+     "message": "Uses incomplete fill_opacity parameters - should be fill_opacity=value"},
+    {"id": "incomplete_stroke", "trigger": "stroke_", "pattern": r"stroke_\s*[,)]",
+     "message": "Uses incomplete stroke parameters - should be stroke_width=value"},
+    {"id": "incomplete_color", "trigger": "color_", "pattern": r"color_\s*[,)]",
+     "message": "Uses incomplete color parameters - should be color=value"},
+    {"id": "frame_constants", "trigger": ["FRAME_WIDTH", "FRAME_HEIGHT"],
+     "message": "Uses FRAME_WIDTH/FRAME_HEIGHT - these constants don't exist in Manim"},
+    {"id": "zero_scale", "trigger": ".scale(0)", "unless": "set_opacity",
+     "message": "Scale method with 0 parameter may cause issues"},
+    {"id": "max_width", "trigger": "max_width=",
+     "message": "Uses max_width parameter - not supported in current Manim version"},
+    {"id": "sector_duplicate_radius", "trigger": "Sector(", "pattern": r"Sector\([^)]*outer_radius=[^,)]+[^)]*outer_radius=",
+     "message": "Sector has duplicate outer_radius parameters"},
+    {"id": "vgroup_float", "trigger": "VGroup(", "pattern": r"VGroup\([^)]*,\s*[0-9]+\.?[0-9]*\s*\)",
+     "message": "VGroup contains float values - only VMobjects allowed"},
+    {"id": "vgroup_extra_parens", "trigger": "VGroup(", "pattern": r"VGroup\(\s*\(\s*\(",
+     "message": "VGroup has malformed constructor with extra parentheses"},
+    {"id": "vgroup_starred", "trigger": "VGroup(", "pattern": r"VGroup\(\s*\(\s*\*",
+     "message": "VGroup has malformed starred expression syntax"},
+    {"id": "vgroup_unclosed", "trigger": "VGroup(", "pattern": r"VGroup\(\s*\(\s*[^)]+\)\s*\Z",
+     "message": "VGroup has missing closing parentheses"},
+    {"id": "self_assignment", "trigger": "=", "scope": "line",
+     "pattern": r"[ \t]*(?P<name>\w+)[ \t]*=[ \t]*(?P=name)[ \t]*$",
+     "message": "Duplicate variable assignments causing UnboundLocalError"},
+
+    {"id": "multiline_mathtex", "trigger": '"""', "requires": "MathTex", "severity": "warning",
+     "message": "Uses multiline strings with MathTex - may cause issues"},
+    {"id": "unscaled_text", "trigger": "Text(", "unless": "scale", "severity": "warning",
+     "message": "Text elements should be scaled for better readability (use .scale(0.6-0.8))"},
+    {"id": "long_text", "trigger": "Text(", "pattern": r"""Text\(["'](?P<text>[^"']{50,})["']""", "severity": "warning",
+     "message": "Long text detected: '{text:.30}...' - ensure proper scaling"},
+    {"id": "out_of_bounds", "trigger": "move_to(", "pattern": r"move_to\([^)]*\*(?:[89]|1[0-5])[^)]*\)", "severity": "warning",
+     "message": "Potential out-of-bounds positioning detected - ensure elements stay within video bounds"},
+
+    {"id": "get_tex", "trigger": "get_tex", "marker": True},
+    {"id": "set_opacity", "trigger": "set_opacity", "marker": True},
+    {"id": "MathTex", "trigger": "MathTex", "marker": True},
+    {"id": "scale", "trigger": ".scale(", "marker": True},
+]
+
+def compile_rules(rules: List[Dict[str, Any]]) -> Tuple["re.Pattern", Dict[str, List[Tuple[int, Dict[str, Any], "re.Pattern"]]]]:
+    """
+    Compile a rule table into one trigger scanner and a trigger -> rules dispatch table
+
+    The scanner is a plain alternation of literals (longest first), which the
+    regex engine searches with a fast literal-prefix scan. Each scanner match also
+    dispatches the rules of any shorter trigger found inside it, with its offset.
+    Matches never overlap, so triggers should be whole tokens: one that starts
+    inside another trigger and runs past its end is not seen.
+    """
+    by_trigger: Dict[str, List[Tuple[Dict[str, Any], "re.Pattern"]]] = {}
+    for rule in rules:
+        triggers = rule["trigger"] if isinstance(rule["trigger"], list) else [rule["trigger"]]
+        for trigger in triggers:
+            pattern = re.compile(rule.get("pattern") or re.escape(trigger), re.MULTILINE)
+            by_trigger.setdefault(trigger, []).append((rule, pattern))
+
+    ordered = sorted(by_trigger, key=len, reverse=True)
+    dispatch = {}
+    for trigger in ordered:
+        entries = []
+        for other in ordered:
+            if trigger.startswith(other):
+                entries.extend((0, rule, pattern) for rule, pattern in by_trigger[other])
+            for k in range(1, len(trigger) - len(other) + 1):
+                if trigger.startswith(other, k):
+                    entries.extend((k, rule, pattern) for rule, pattern in by_trigger[other])
+        dispatch[trigger] = entries
+    scanner = re.compile("|".join(re.escape(trigger) for trigger in ordered))
+    return scanner, dispatch
+
+_SCANNER, _DISPATCH = compile_rules(RULES)
+
+def _format(diagnostics: List[Dict[str, Any]], severity: str) -> List[str]:
+    # One line per distinct message, located at its first occurrence
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for d in diagnostics:
+        if d["severity"] == severity:
+            grouped.setdefault(d["message"], []).append(d)
+    lines = []
+    for message, occurrences in grouped.items():
+        first = occurrences[0]
+        more = f" (and {len(occurrences) - 1} more)" if len(occurrences) > 1 else ""
+        lines.append(f"Line {first['line']}, col {first['column']}: {message}{more}")
+    return lines
+
+def lint_manim_code(code: str) -> Dict[str, Any]:
+    """
+    Run every rule over the code in a single scan
+
+    Returns issues and warnings as "Line L, col C: message" strings for display,
+    plus structured diagnostics with rule ids and locations.
+    """
+    hits = []
+    seen_markers = set()
+    checked_lines = set()
+    for match in _SCANNER.finditer(code):
+        for k, rule, pattern in _DISPATCH[match.group(0)]:
+            if rule.get("marker"):
+                seen_markers.add(rule["id"])
+                continue
+            start = match.start() + k
+            if rule.get("scope") == "line":
+                start = code.rfind("\n", 0, start) + 1
+                if (rule["id"], start) in checked_lines:
+                    continue
+                checked_lines.add((rule["id"], start))
+            rule_match = pattern.match(code, start)
+            if rule_match:
+                hits.append((rule, start, rule_match))
+
+    diagnostics = []
+    line, line_start, counted = 1, 0, 0
+    for rule, offset, rule_match in sorted(hits, key=lambda hit: hit[1]):
+        if rule.get("requires") and rule["requires"] not in seen_markers:
+            continue
+        if rule.get("unless") and rule["unless"] in seen_markers:
+            continue
+        # Hits are in offset order, so line numbers can be counted incrementally
+        line += code.count("\n", counted, offset)
+        line_start = code.rfind("\n", 0, offset) + 1
+        counted = offset
+        diagnostics.append({
+            "rule": rule["id"],
+            "severity": rule.get("severity", "issue"),
+            "message": rule["message"].format(**rule_match.groupdict()),
+            "line": line,
+            "column": offset - line_start + 1
+        })
+
+    issues = _format(diagnostics, "issue")
+    return {
+        "issues": issues,
+        "warnings": _format(diagnostics, "warning"),
+        "diagnostics": diagnostics,
+        "is_valid": len(issues) == 0
+    }
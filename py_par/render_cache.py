@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Render output cache
+Rendered scene videos are stored by a hash of (scene code, class name, quality
+flags, Manim version) so byte-identical scenes never go through Manim twice
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+DEFAULT_RENDER_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "cache", "renders")
+
+@lru_cache(maxsize=1)
+def get_manim_version() -> str:
+    """
+    Get the installed Manim version without importing Manim
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        return version("manim")
+    except PackageNotFoundError:
+        return "unknown"
+
+def render_cache_key(code: str, class_name: str, quality_flags: List[str]) -> str:
+    """
+    Hash everything that affects a scene's rendered output
+    """
+    payload = json.dumps([code, class_name, list(quality_flags), get_manim_version()], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """
+    Directory of rendered videos named by their render cache key, with the
+    extension of their container format so they are served with the right type
+    """
+
+    def __init__(self, directory: str = DEFAULT_RENDER_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, video_format: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{video_format}")
+
+    def get(self, key: str, video_format: str = "mp4") -> Optional[str]:
+        """
+        Get the cached video path for a key and container format, or None on a miss
+        """
+        path = self._path(key, video_format)
+        return path if os.path.exists(path) else None
+
+    def put(self, key: str, video_path: str, video_format: str = "mp4") -> str:
+        """
+        Store a rendered video under a key and container format and return the cached path
+        """
+        path = self._path(key, video_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Copy then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copy2(video_path, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+def get_render_cache() -> Optional[RenderCache]:
+    """
+    Create the render cache configured by RENDER_CACHE and RENDER_CACHE_DIR
+    """
+    if os.getenv("RENDER_CACHE", "on").lower() in ("off", "none", "0", "false"):
+        return None
+    return RenderCache(os.getenv("RENDER_CACHE_DIR", DEFAULT_RENDER_CACHE_DIR))
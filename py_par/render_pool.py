@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Parallel render scheduler for Manim scenes
+Spreads scene renders across a pool of warm render workers, or manim
+subprocesses when the render server is unavailable
+"""
+
+import hashlib
+import heapq
+import itertools
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: renders sharing a media directory are only serialised within this process
+    fcntl = None
+
+from render_cache import RenderCache, render_cache_key
+from render_queue import use_render_queue, render_on_queue
+from render_profiles import get_render_profile, profile_cli_args, profile_config, profile_video_path, find_rendered_video
+from render_server import RenderServerUnavailable, get_render_server, disable_render_server
+from scene_check import check_scene_code
+
+# Each manim process is mostly single-threaded but ffmpeg encoding adds some load,
+# so default to one render per two cores
+DEFAULT_RENDER_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Two-tier rendering: a quick low-quality preview first, then the final profile
+# at a lower priority so previews of other scenes are never stuck behind it
+PREVIEW_PRIORITY = 0
+FINAL_PRIORITY = 10
+# Batch lessons have nobody watching, so their renders wait behind every interactive one
+BATCH_PRIORITY = 20
+
+# Manim deletes a scene's oldest partial movie files beyond this many (RENDER_SEGMENT_CACHE_FILES);
+# its default of 100 is too few to keep every segment of a long scene across edits
+DEFAULT_SEGMENT_CACHE_FILES = 1000
+DEFAULT_SEGMENT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "cache", "segments")
+
+_segment_locks: Dict[str, threading.Lock] = {}
+_segment_locks_guard = threading.Lock()
+
+class RenderSlots:
+    """
+    Caps how many manim CLI processes run at once across every render thread
+
+    Like the render server's workers, a freed slot goes to the waiting render
+    with the lowest priority number, oldest first.
+    """
+
+    def __init__(self, slots: int = 0):
+        self.size = 0
+        self._free = 0
+        self._waiting: List[Tuple[int, int]] = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+        self.grow(slots)
+
+    def grow(self, slots: int) -> None:
+        """
+        Add slots until there are at least this many
+        """
+        with self._cond:
+            if slots > self.size:
+                self._free += slots - self.size
+                self.size = slots
+                self._cond.notify_all()
+
+    @contextmanager
+    def hold(self, priority: int):
+        """
+        Block until a slot is free for this priority and hold it for the with block
+        """
+        with self._cond:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            while not (self._free and self._waiting[0] == ticket):
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._free -= 1
+            # The next waiter in line may be able to take another free slot
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._free += 1
+                self._cond.notify_all()
+
+_cli_slots = RenderSlots()
+
+def get_cli_slots(workers: int = 1) -> RenderSlots:
+    """
+    Get the process-wide CLI render slots, grown to at least this many
+    """
+    _cli_slots.grow(workers)
+    return _cli_slots
+
+def get_render_workers(max_workers: Optional[int] = None) -> int:
+    """
+    Resolve the number of render workers from the argument or RENDER_WORKERS env var
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv("RENDER_WORKERS", DEFAULT_RENDER_WORKERS))
+    return max(1, max_workers)
+
+def get_preview_mode(preview: Optional[bool] = None) -> bool:
+    """
+    Resolve whether to render previews first from the argument or RENDER_PREVIEW env var
+    """
+    if preview is None:
+        preview = os.getenv("RENDER_PREVIEW", "").lower() in ("1", "true", "yes", "on")
+    return preview
+
+def get_segment_cache_files() -> int:
+    """
+    Resolve how many partial movie files Manim keeps per scene from RENDER_SEGMENT_CACHE_FILES
+    """
+    return int(os.getenv("RENDER_SEGMENT_CACHE_FILES", DEFAULT_SEGMENT_CACHE_FILES))
+
+def scene_media_dir(workdir: str, filename: str) -> str:
+    """
+    Get the media directory for a scene file, beside the workdir in the same job workspace
+
+    One directory per scene file keeps parallel renders apart.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(workdir)), "media", os.path.splitext(filename)[0])
+
+def scene_segment_dir(filename: str, class_name: str, profile: Dict[str, Any], lesson: Optional[str] = None) -> str:
+    """
+    Get the shared directory of Manim partial movie files for a scene and profile
+
+    Partial movie files are named by the hash of their animation, so they can be
+    shared across runs and jobs: after a small edit only the animations that
+    changed are rendered again. Generated scenes of every lesson are called
+    scene_1.py/Scene1 and so on, so the lesson (its title) is part of the key;
+    otherwise unrelated lessons would wait on each other's lock and prune each
+    other's files. Set the location with RENDER_SEGMENT_CACHE_DIR.
+    """
+    root = os.getenv("RENDER_SEGMENT_CACHE_DIR", DEFAULT_SEGMENT_CACHE_DIR)
+    lesson_key = hashlib.sha256(lesson.strip().encode("utf-8")).hexdigest()[:12] if lesson and lesson.strip() else "shared"
+    return os.path.join(os.path.abspath(root), profile["name"], lesson_key, os.path.splitext(filename)[0], class_name)
+
+@contextmanager
+def segment_dir_lock(segment_dir: str):
+    """
+    Serialise renders sharing a segment directory across threads and processes,
+    since Manim writes its segment list and prunes old segments there
+    """
+    os.makedirs(segment_dir, exist_ok=True)
+    lock_path = f"{segment_dir}.lock"
+    with _segment_locks_guard:
+        lock = _segment_locks.setdefault(lock_path, threading.Lock())
+    with lock, open(lock_path, "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def write_render_config(media_dir: str, segment_dir: str, profile: Dict[str, Any]) -> str:
+    """
+    Write the manim.cfg that points CLI renders at the shared segment directory
+    """
+    path = os.path.join(media_dir, f"manim-{profile['name']}.cfg")
+    content = f"[CLI]\npartial_movie_dir = {segment_dir}\nmax_files_cached = {get_segment_cache_files()}\n"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return path
+    except OSError:
+        pass
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+def build_render_command(filename: str, class_name: str, media_dir: str, profile: Dict[str, Any], segment_dir: str) -> List[str]:
+    """
+    Build the manim CLI command for a single scene
+    """
+    media_dir = os.path.abspath(media_dir)
+    return [
+        "manim", *profile_cli_args(profile),
+        "--config_file", write_render_config(media_dir, segment_dir, profile),
+        "--media_dir", media_dir,
+        filename, class_name
+    ]
+
+def _new_result(job: Dict[str, Any], video_path: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "filename": job["filename"],
+        "className": job["className"],
+        "video_path": video_path,
+        "success": False,
+        "cached": False,
+        "rejected": False,
+        "error": None,
+        "duration": 0.0,
+        "segments_rendered": 0
+    }
+
+def precheck_scene(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Statically check a scene before it takes a render slot
+
+    Returns a rejected render result, or None when the scene may be rendered.
+    """
+    with open(os.path.join(job["workdir"], job["filename"]), "r", encoding="utf-8") as f:
+        check = check_scene_code(f.read(), job["className"], job["filename"])
+    if check["ok"]:
+        return None
+    result = _new_result(job)
+    result.update(rejected=True, error="Static check failed: " + "; ".join(check["errors"]))
+    return result
+
+def _render_with_cli(filename: str, class_name: str, workdir: str, media_dir: str, profile: Dict[str, Any], segment_dir: str) -> Dict[str, Any]:
+    # Fallback path: a fresh manim process for this scene alone
+    try:
+        subprocess.run(
+            build_render_command(filename, class_name, media_dir, profile, segment_dir),
+            cwd=workdir,
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        video_path = find_rendered_video(media_dir, filename, class_name, profile) or profile_video_path(media_dir, filename, class_name, profile)
+        return {"success": True, "video_path": video_path, "error": None}
+    except subprocess.CalledProcessError as e:
+        # Keep the tail of stderr, the full manim log is very noisy
+        stderr_tail = (e.stderr or "")[-2000:]
+        return {"success": False, "video_path": None, "error": f"manim exited with code {e.returncode}: {stderr_tail}"}
+    except FileNotFoundError as e:
+        return {"success": False, "video_path": None, "error": str(e)}
+
+def _render_locally(filename: str, class_name: str, workdir: str, media_dir: str, profile: Dict[str, Any], priority: int, lesson: Optional[str] = None) -> Dict[str, Any]:
+    segment_dir = scene_segment_dir(filename, class_name, profile, lesson)
+    with segment_dir_lock(segment_dir):
+        # Manim reuses the partial movie file of every animation whose hash is unchanged,
+        # so only the new files in the segment directory were actually rendered
+        segments_before = set(os.listdir(segment_dir))
+
+        server = get_render_server(get_render_workers())
+        rendered = None
+        if server is not None:
+            try:
+                rendered = server.render({
+                    "filename": filename,
+                    "className": class_name,
+                    "workdir": os.path.abspath(workdir),
+                    "media_dir": os.path.abspath(media_dir),
+                    "config": {**profile_config(profile), "partial_movie_dir": segment_dir, "max_files_cached": get_segment_cache_files()},
+                    "priority": priority
+                })
+            except RenderServerUnavailable as e:
+                disable_render_server(str(e))
+        if rendered is None:
+            with get_cli_slots(get_render_workers()).hold(priority):
+                rendered = _render_with_cli(filename, class_name, workdir, media_dir, profile, segment_dir)
+
+        rendered["segments_rendered"] = sum(1 for name in os.listdir(segment_dir) if name.endswith(f".{profile['format']}") and name not in segments_before)
+    return rendered
+
+def render_scene(job: Dict[str, Any], cache: Optional[RenderCache] = None, check: bool = True) -> Dict[str, Any]:
+    """
+    Render a single scene on a warm render worker, or reuse a cached render
+
+    Falls back to a manim subprocess per scene when RENDER_BACKEND=cli or the
+    render server cannot start. With RENDER_BACKEND=queue the scene is queued
+    for a standalone render worker instead (see render_queue.py).
+
+    job keys: filename, className, workdir, and optionally media_dir, profile
+    (a render profile name, default RENDER_PROFILE), priority (lower renders
+    first) and lesson (the lesson title, which keys the segment directory). Scenes that fail the static check are rejected without starting
+    Manim; pass check=False if already checked. Only animations that are not
+    already in the scene's segment directory are rendered again.
+    """
+    filename = job["filename"]
+    class_name = job["className"]
+    workdir = job["workdir"]
+    profile = get_render_profile(job.get("profile"))
+
+    if check:
+        rejected = precheck_scene(job)
+        if rejected is not None:
+            return rejected
+
+    media_dir = job.get("media_dir") or scene_media_dir(workdir, filename)
+    os.makedirs(media_dir, exist_ok=True)
+
+    result = _new_result(job, profile_video_path(media_dir, filename, class_name, profile))
+
+    start = time.monotonic()
+    cache_key = None
+    if cache is not None:
+        with open(os.path.join(workdir, filename), "r", encoding="utf-8") as f:
+            cache_key = render_cache_key(f.read(), class_name, profile_cli_args(profile))
+        cached_path = cache.get(cache_key, profile["format"])
+        if cached_path:
+            result.update(video_path=cached_path, success=True, cached=True, duration=time.monotonic() - start)
+            return result
+
+    if use_render_queue():
+        # Render farm mode: a standalone render worker renders the scene into shared storage
+        with open(os.path.join(workdir, filename), "r", encoding="utf-8") as f:
+            code = f.read()
+        rendered = render_on_queue({
+            "filename": filename,
+            "className": class_name,
+            "code": code,
+            "profile": profile["name"],
+            "priority": job.get("priority", PREVIEW_PRIORITY),
+            "lesson": job.get("lesson")
+        })
+    else:
+        rendered = _render_locally(filename, class_name, workdir, media_dir, profile, job.get("priority", PREVIEW_PRIORITY), job.get("lesson"))
+    result["segments_rendered"] = rendered.get("segments_rendered", 0)
+
+    if rendered["success"] and os.path.exists(rendered["video_path"]):
+        result.update(success=True, video_path=rendered["video_path"])
+        if cache_key is not None:
+            cache.put(cache_key, rendered["video_path"], profile["format"])
+    elif rendered["success"]:
+        result["error"] = f"Video file not found after rendering: {rendered['video_path']}"
+    else:
+        result["error"] = rendered["error"]
+    result["duration"] = time.monotonic() - start
+
+    return result
+
+def _start_and_render(job: Dict[str, Any], cache: Optional[RenderCache], on_start: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+    if on_start:
+        on_start(job)
+    return render_scene(job, cache, False)
+
+def render_scenes(jobs: List[Dict[str, Any]], max_workers: Optional[int] = None, cache: Optional[RenderCache] = None, on_start: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Render scenes across a pool of workers and yield results in job order
+
+    Every job is statically checked first and only the scenes that pass are
+    submitted, all up front, so later scenes keep rendering while earlier ones
+    are being consumed. on_start is called with each job, on its render
+    thread, when the job's render begins.
+    """
+    if not jobs:
+        return
+
+    rejected = [precheck_scene(job) for job in jobs]
+    workers = min(get_render_workers(max_workers), len(jobs))
+    # Size the warm server (or CLI slots) for this batch so no render thread waits for a worker
+    get_render_server(workers)
+    get_cli_slots(workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render") as executor:
+        futures = [None if rejection else executor.submit(_start_and_render, job, cache, on_start) for job, rejection in zip(jobs, rejected)]
+        for future, rejection in zip(futures, rejected):
+            yield rejection if future is None else future.result()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Named render profiles
+A profile fixes everything about how a scene is rendered (resolution, frame
+rate, renderer and container/codec) and where Manim writes the result, so the
+same scene can be served as a cheap low-res render or in HD on request
+"""
+
+import glob
+import json
+import os
+from typing import Dict, Any, List, Optional
+
+# Manim CLI quality flags and the config names they stand for
+QUALITY_NAMES = {
+    "-ql": "low_quality",
+    "-qm": "medium_quality",
+    "-qh": "high_quality",
+    "-qp": "production_quality",
+    "-qk": "fourk_quality"
+}
+
+# Video codec Manim encodes each container format with
+FORMAT_CODECS = {
+    "mp4": "h264",
+    "mov": "prores",
+    "webm": "vp9"
+}
+
+# Override or extend with the RENDER_PROFILES env var, e.g.
+# '{"tablet": {"quality": "-qm", "resolution": [1024, 576], "fps": 30}}'
+#   quality     base Manim quality flag, for settings a profile does not override
+#   resolution  [width, height] in pixels
+#   fps         frames per second
+#   renderer    "cairo" or "opengl"
+#   format      container, which decides the codec (see FORMAT_CODECS)
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "preview": {"quality": "-ql", "resolution": [854, 480], "fps": 15, "renderer": "cairo", "format": "mp4"},
+    "mobile": {"quality": "-ql", "resolution": [640, 360], "fps": 30, "renderer": "cairo", "format": "mp4"},
+    "standard": {"quality": "-qm", "resolution": [1280, 720], "fps": 30, "renderer": "cairo", "format": "mp4"},
+    "hd": {"quality": "-qh", "resolution": [1920, 1080], "fps": 60, "renderer": "cairo", "format": "mp4"},
+    "4k": {"quality": "-qk", "resolution": [3840, 2160], "fps": 60, "renderer": "cairo", "format": "mp4"}
+}
+
+# Used when no profile is requested (RENDER_PROFILE) and for preview renders (RENDER_PREVIEW_PROFILE)
+DEFAULT_PROFILE = "standard"
+DEFAULT_PREVIEW_PROFILE = "preview"
+
+def load_render_profiles() -> Dict[str, Dict[str, Any]]:
+    """
+    Load render profiles from the RENDER_PROFILES env var, falling back to defaults
+    """
+    profiles = {name: dict(profile) for name, profile in DEFAULT_PROFILES.items()}
+    raw = os.getenv("RENDER_PROFILES")
+    if raw:
+        for name, overrides in json.loads(raw).items():
+            profiles[name] = {**profiles.get(name, profiles[DEFAULT_PROFILE]), **overrides}
+    return profiles
+
+def get_render_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resolve a profile by name, or the RENDER_PROFILE default when name is None
+
+    Raises ValueError for unknown profile names or invalid settings.
+    """
+    name = name or os.getenv("RENDER_PROFILE", DEFAULT_PROFILE)
+    profiles = load_render_profiles()
+    if name not in profiles:
+        raise ValueError(f"Unknown render profile '{name}', expected one of: {', '.join(sorted(profiles))}")
+
+    profile = dict(profiles[name], name=name)
+    if profile["quality"] not in QUALITY_NAMES:
+        raise ValueError(f"Render profile '{name}' has unknown quality flag {profile['quality']}")
+    if profile["renderer"] not in ("cairo", "opengl"):
+        raise ValueError(f"Render profile '{name}' has unknown renderer {profile['renderer']}")
+    if profile["format"] not in FORMAT_CODECS:
+        raise ValueError(f"Render profile '{name}' has unknown format {profile['format']}")
+    return profile
+
+def get_preview_profile() -> Dict[str, Any]:
+    """
+    Resolve the profile used for preview renders
+    """
+    return get_render_profile(os.getenv("RENDER_PREVIEW_PROFILE", DEFAULT_PREVIEW_PROFILE))
+
+def profile_cli_args(profile: Dict[str, Any]) -> List[str]:
+    """
+    Manim CLI flags for a profile
+    """
+    width, height = profile["resolution"]
+    return [
+        profile["quality"],
+        "--resolution", f"{width},{height}",
+        "--fps", f"{profile['fps']:g}",
+        "--renderer", profile["renderer"],
+        "--format", profile["format"]
+    ]
+
+def profile_config(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Manim config overrides for a profile, for rendering through the Python API
+    """
+    width, height = profile["resolution"]
+    # The quality preset goes first so the explicit settings override it
+    return {
+        "quality": QUALITY_NAMES[profile["quality"]],
+        "pixel_width": width,
+        "pixel_height": height,
+        "frame_rate": profile["fps"],
+        "renderer": profile["renderer"],
+        "format": profile["format"]
+    }
+
+def profile_video_path(media_dir: str, filename: str, class_name: str, profile: Dict[str, Any]) -> str:
+    """
+    Where Manim writes a scene's video for a profile under --media_dir
+
+    Manim names the directory after the scene module and the output's
+    {height}p{fps}, whatever quality flag produced it.
+    """
+    module_name = os.path.splitext(os.path.basename(filename))[0]
+    quality_dir = f"{profile['resolution'][1]}p{profile['fps']:g}"
+    return os.path.join(media_dir, "videos", module_name, quality_dir, f"{class_name}.{profile['format']}")
+
+def find_rendered_video(media_dir: str, filename: str, class_name: str, profile: Dict[str, Any]) -> Optional[str]:
+    """
+    Find a scene's rendered video, at the expected path or else the newest
+    output for the scene class under media_dir
+    """
+    expected = profile_video_path(media_dir, filename, class_name, profile)
+    if os.path.exists(expected):
+        return expected
+    module_name = os.path.splitext(os.path.basename(filename))[0]
+    candidates = glob.glob(os.path.join(glob.escape(media_dir), "videos", glob.escape(module_name), "*", f"{glob.escape(class_name)}.{profile['format']}"))
+    return max(candidates, key=os.path.getmtime) if candidates else None
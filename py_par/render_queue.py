@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Render queue for render farm mode
+With RENDER_BACKEND=queue scenes are not rendered in the API process: each one
+is queued as a task, leased by a standalone render worker (render_worker.py,
+on this or any other node), and its video is stored in shared artifact storage
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "render_queue.sqlite")
+# Must be storage every API node and render worker can reach, e.g. an NFS mount (RENDER_ARTIFACT_DIR)
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "artifacts")
+# A worker renews its lease while rendering; a task whose lease runs out goes back
+# on the queue, up to RENDER_QUEUE_MAX_ATTEMPTS leases in total
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+# How often the API checks on a queued scene, and how long it waits for one (RENDER_QUEUE_TIMEOUT)
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_WAIT_TIMEOUT = 3600
+# Finished tasks are kept this long in Redis, which expires them itself
+REDIS_RESULT_TTL = 86400
+
+def use_render_queue() -> bool:
+    """
+    Whether scenes go to the render queue instead of rendering in this process (RENDER_BACKEND=queue)
+    """
+    return os.getenv("RENDER_BACKEND", "server").lower() == "queue"
+
+def get_max_attempts() -> int:
+    """
+    Resolve how many times a task may be leased from the RENDER_QUEUE_MAX_ATTEMPTS env var
+    """
+    attempts = int(os.getenv("RENDER_QUEUE_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+    if attempts < 1:
+        raise ValueError(f"RENDER_QUEUE_MAX_ATTEMPTS must be at least 1, got {attempts}")
+    return attempts
+
+def _lease_expired_result(attempts: int) -> Dict[str, Any]:
+    return {"success": False, "video_path": None, "error": f"Render worker lease expired {attempts} times, giving up"}
+
+class SQLiteRenderQueue:
+    """
+    Render queue in a SQLite file, shared by every process on the node (or on
+    any node that mounts the file from storage with working locks)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS render_tasks (
+                id TEXT PRIMARY KEY,
+                job TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_render_tasks_queue ON render_tasks (status, priority, created_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, in autocommit mode so leases can take the write lock up front
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, job: Dict[str, Any]) -> str:
+        """
+        Queue a scene job and return its task id; lower job["priority"] is leased first
+        """
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO render_tasks (id, job, priority, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+            (task_id, json.dumps(job), job.get("priority", 0), now, now)
+        )
+        return task_id
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Take the next queued task, or one whose lease has expired, for lease_seconds
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            max_attempts = get_max_attempts()
+            for task_id, attempts in conn.execute(
+                "SELECT id, attempts FROM render_tasks WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, max_attempts)
+            ).fetchall():
+                conn.execute(
+                    "UPDATE render_tasks SET status = 'failed', result = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(_lease_expired_result(attempts)), now, task_id)
+                )
+            row = conn.execute(
+                "SELECT id, job, attempts FROM render_tasks WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority, created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE render_tasks SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease_seconds, now, row[0])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        task_id, job, attempts = row
+        return {"id": task_id, "job": json.loads(job), "attempts": attempts + 1}
+
+    def renew(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        Extend a lease; False means the task is no longer this worker's
+        """
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE render_tasks SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+            (now + lease_seconds, now, task_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Record a leased task's render result; False means the lease was lost to another worker
+        """
+        cursor = self._conn().execute(
+            "UPDATE render_tasks SET status = 'done', result = ?, updated_at = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+            (json.dumps(result), time.time(), task_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def cancel(self, task_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Mark a task nobody waits for any more as failed with result, so no worker
+        leases it and a worker rendering it cannot complete it; False if it had already finished
+        """
+        cursor = self._conn().execute(
+            "UPDATE render_tasks SET status = 'failed', result = ?, updated_at = ? WHERE id = ? AND status IN ('queued', 'leased')",
+            (json.dumps(result), time.time(), task_id)
+        )
+        return cursor.rowcount == 1
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a task's status ("queued", "leased", "done" or "failed") and result
+        """
+        row = self._conn().execute(
+            "SELECT status, attempts, worker, result FROM render_tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, attempts, worker, result = row
+        return {"id": task_id, "status": status, "attempts": attempts, "worker": worker, "result": json.loads(result) if result else None}
+
+# Pops the best queued task and leases it in one step, so a crash in between cannot lose it
+_REDIS_LEASE_SCRIPT = """
+local item = redis.call('ZPOPMIN', KEYS[1])
+if #item == 0 then
+    return false
+end
+local task_key = ARGV[3] .. item[1]
+redis.call('ZADD', KEYS[2], ARGV[1], item[1])
+redis.call('HSET', task_key, 'status', 'leased', 'worker', ARGV[2], 'lease_expires', ARGV[1])
+redis.call('HINCRBY', task_key, 'attempts', 1)
+return item[1]
+"""
+
+class RedisRenderQueue:
+    """
+    Render queue on a Redis-compatible server, for render workers on other nodes
+
+    Queued tasks are a sorted set by (priority, enqueue time) and leases a sorted
+    set by expiry. Needs the redis package.
+    """
+
+    def __init__(self, url: str, prefix: str = "render_queue"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ValueError("RENDER_QUEUE=redis needs the redis package (pip install redis)") from e
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._queue_key = f"{prefix}:queued"
+        self._leases_key = f"{prefix}:leases"
+        self._task_prefix = f"{prefix}:task:"
+        self._lease_script = self._redis.register_script(_REDIS_LEASE_SCRIPT)
+
+    @staticmethod
+    def _score(priority: int, created_at: float) -> float:
+        # Priority first, then first in first out; millisecond times stay exact in a double
+        return priority * 1e13 + created_at * 1000
+
+    def enqueue(self, job: Dict[str, Any]) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        priority = job.get("priority", 0)
+        pipe = self._redis.pipeline()
+        pipe.hset(self._task_prefix + task_id, mapping={
+            "job": json.dumps(job), "priority": priority, "status": "queued", "attempts": 0, "created_at": now
+        })
+        pipe.zadd(self._queue_key, {task_id: self._score(priority, now)})
+        pipe.execute()
+        return task_id
+
+    def _requeue_expired(self, now: float) -> None:
+        max_attempts = get_max_attempts()
+        for task_id in self._redis.zrangebyscore(self._leases_key, "-inf", now):
+            # Only the caller whose ZREM succeeds handles this expiry
+            if not self._redis.zrem(self._leases_key, task_id):
+                continue
+            task_key = self._task_prefix + task_id
+            attempts, priority, created_at = self._redis.hmget(task_key, "attempts", "priority", "created_at")
+            if int(attempts or 0) >= max_attempts:
+                self._redis.hset(task_key, mapping={"status": "failed", "result": json.dumps(_lease_expired_result(int(attempts)))})
+                self._redis.expire(task_key, REDIS_RESULT_TTL)
+            else:
+                self._redis.hset(task_key, "status", "queued")
+                self._redis.zadd(self._queue_key, {task_id: self._score(int(priority or 0), float(created_at or now))})
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        self._requeue_expired(now)
+        task_id = self._lease_script(keys=[self._queue_key, self._leases_key], args=[now + lease_seconds, worker_id, self._task_prefix])
+        if not task_id:
+            return None
+        job, attempts = self._redis.hmget(self._task_prefix + task_id, "job", "attempts")
+        return {"id": task_id, "job": json.loads(job), "attempts": int(attempts)}
+
+    def renew(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        task_key = self._task_prefix + task_id
+        status, worker = self._redis.hmget(task_key, "status", "worker")
+        if status != "leased" or worker != worker_id:
+            return False
+        expires = time.time() + lease_seconds
+        # xx: only while the lease has not already been taken back
+        if not self._redis.zadd(self._leases_key, {task_id: expires}, xx=True, ch=True):
+            return False
+        self._redis.hset(task_key, "lease_expires", expires)
+        return True
+
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        task_key = self._task_prefix + task_id
+        status, worker = self._redis.hmget(task_key, "status", "worker")
+        if status != "leased" or worker != worker_id or not self._redis.zrem(self._leases_key, task_id):
+            return False
+        pipe = self._redis.pipeline()
+        pipe.hset(task_key, mapping={"status": "done", "result": json.dumps(result)})
+        pipe.expire(task_key, REDIS_RESULT_TTL)
+        pipe.execute()
+        return True
+
+    def cancel(self, task_id: str, result: Dict[str, Any]) -> bool:
+        # Only the caller whose ZREM succeeds settles the task, as in complete and _requeue_expired
+        if not (self._redis.zrem(self._queue_key, task_id) or self._redis.zrem(self._leases_key, task_id)):
+            return False
+        task_key = self._task_prefix + task_id
+        pipe = self._redis.pipeline()
+        pipe.hset(task_key, mapping={"status": "failed", "result": json.dumps(result)})
+        pipe.expire(task_key, REDIS_RESULT_TTL)
+        pipe.execute()
+        return True
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        task = self._redis.hgetall(self._task_prefix + task_id)
+        if not task:
+            return None
+        return {
+            "id": task_id,
+            "status": task["status"],
+            "attempts": int(task.get("attempts", 0)),
+            "worker": task.get("worker"),
+            "result": json.loads(task["result"]) if task.get("result") else None
+        }
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_render_queue():
+    """
+    Get the process-wide render queue configured by RENDER_QUEUE ("sqlite" or
+    "redis"), RENDER_QUEUE_PATH and RENDER_QUEUE_URL
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            backend = os.getenv("RENDER_QUEUE", "sqlite").lower()
+            if backend == "sqlite":
+                _queue = SQLiteRenderQueue(os.getenv("RENDER_QUEUE_PATH", DEFAULT_QUEUE_PATH))
+            elif backend == "redis":
+                _queue = RedisRenderQueue(os.getenv("RENDER_QUEUE_URL", "redis://localhost:6379/0"))
+            else:
+                raise ValueError(f"Unknown RENDER_QUEUE backend: {backend}")
+        return _queue
+
+def get_artifact_dir() -> str:
+    """
+    Resolve the shared artifact directory from the RENDER_ARTIFACT_DIR env var
+    """
+    return os.path.abspath(os.getenv("RENDER_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR))
+
+def store_artifact(video_path: str, task_id: str) -> str:
+    """
+    Copy a rendered video into shared artifact storage and return its path there
+    """
+    dest = os.path.join(get_artifact_dir(), task_id[:2], f"{task_id}{os.path.splitext(video_path)[1]}")
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    # Copy then rename so the API never picks up a partial file
+    tmp_dest = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copy2(video_path, tmp_dest)
+    os.replace(tmp_dest, dest)
+    return dest
+
+def render_on_queue(job: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Queue a scene job and wait for a render worker to finish it
+
+    job keys: filename, className, code, profile, priority and lesson. Returns
+    {"success", "video_path", "error", "segments_rendered"}, where video_path is
+    the video in shared artifact storage.
+    """
+    queue = get_render_queue()
+    task_id = queue.enqueue(job)
+    timeout = timeout or float(os.getenv("RENDER_QUEUE_TIMEOUT", DEFAULT_WAIT_TIMEOUT))
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = queue.get(task_id)
+        if task is not None and task["status"] in ("done", "failed"):
+            result = task["result"]
+            return {
+                "success": result["success"],
+                "video_path": result["video_path"],
+                "error": result["error"],
+                "segments_rendered": result.get("segments_rendered", 0)
+            }
+        time.sleep(DEFAULT_POLL_INTERVAL)
+    result = {"success": False, "video_path": None, "error": f"No render worker finished {job['className']} within {timeout:g}s (task {task_id})", "segments_rendered": 0}
+    # Take the task off the queue so no worker renders a scene nobody is waiting for
+    if not queue.cancel(task_id, result):
+        task = queue.get(task_id)
+        if task is not None and task["status"] in ("done", "failed"):
+            # Finished just after the deadline
+            result = {**result, **task["result"]}
+    return result
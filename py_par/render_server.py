@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Warm Manim render server
+Long-running worker processes import Manim once and render the scenes they are
+sent, so each scene no longer pays interpreter startup, the Manim import and
+font/LaTeX/cairo initialisation. Workers recycle themselves after a fixed
+number of jobs to keep memory bounded.
+"""
+
+import atexit
+import heapq
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import traceback
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+
+# Recycle a worker after this many scenes (RENDER_SERVER_MAX_JOBS)
+DEFAULT_MAX_JOBS = 20
+# Give up on a scene (and kill its worker) after this many seconds (RENDER_SERVER_TIMEOUT)
+DEFAULT_JOB_TIMEOUT = 600
+# Importing Manim can be slow on a cold disk
+STARTUP_TIMEOUT = 120
+
+class RenderServerUnavailable(RuntimeError):
+    """
+    Raised when a render worker cannot start, e.g. Manim is not importable
+    """
+
+def _render_in_process(job: Dict[str, Any]) -> Dict[str, Any]:
+    # Runs inside the worker: load the scene module fresh and render it with Manim's API
+    import importlib.util
+    from manim import tempconfig
+
+    path = os.path.join(job["workdir"], job["filename"])
+    try:
+        spec = importlib.util.spec_from_file_location(f"scene_{uuid.uuid4().hex}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        scene_class = getattr(module, job["className"])
+
+        # job["config"] holds the render profile's settings, see render_profiles.profile_config
+        with tempconfig({
+            **job.get("config", {}),
+            "media_dir": job["media_dir"],
+            "input_file": path,
+            "progress_bar": "none",
+            "verbosity": "WARNING"
+        }):
+            scene = scene_class()
+            scene.render()
+            video_path = str(scene.renderer.file_writer.movie_file_path)
+        return {"success": True, "video_path": video_path, "error": None}
+    except Exception:
+        return {"success": False, "video_path": None, "error": traceback.format_exc()[-2000:]}
+
+def _worker_main(conn, max_jobs: int) -> None:
+    # Ctrl+C reaches the whole process group; the parent decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        import manim  # noqa: F401  the whole point: pay for this once per worker
+    except Exception:
+        conn.send({"ready": False, "error": traceback.format_exc()[-2000:]})
+        return
+    conn.send({"ready": True})
+
+    for _ in range(max_jobs):
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        conn.send(_render_in_process(job))
+
+class RenderWorker:
+    """
+    One warm worker process, rendering one scene at a time
+    """
+
+    def __init__(self, max_jobs: int = DEFAULT_MAX_JOBS, job_timeout: float = DEFAULT_JOB_TIMEOUT):
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self.process = None
+        self.conn = None
+        self.jobs_done = 0
+
+    def _start(self) -> None:
+        # Spawn rather than fork: the parent runs threads (event loops, pools) that must not be copied
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_worker_main, args=(child_conn, self.max_jobs), daemon=True, name="manim-render-worker")
+        process.start()
+        child_conn.close()
+
+        if not parent_conn.poll(STARTUP_TIMEOUT):
+            process.kill()
+            raise RenderServerUnavailable("Render worker did not start in time")
+        hello = parent_conn.recv()
+        if not hello.get("ready"):
+            process.join()
+            raise RenderServerUnavailable(f"Render worker could not import Manim: {hello.get('error')}")
+
+        self.process, self.conn, self.jobs_done = process, parent_conn, 0
+
+    def _stop(self, kill: bool = False) -> None:
+        if self.process is None:
+            return
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=10)
+        self.conn.close()
+        self.process = self.conn = None
+
+    def render(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Render a job on this worker, starting or recycling the process as needed
+        """
+        self.warm()
+
+        try:
+            self.conn.send(job)
+            if not self.conn.poll(self.job_timeout):
+                self._stop(kill=True)
+                return {"success": False, "video_path": None, "error": f"Render timed out after {self.job_timeout:.0f}s"}
+            result = self.conn.recv()
+        except (EOFError, BrokenPipeError, OSError):
+            # The worker died mid-scene (crash or out of memory); the next job gets a fresh one
+            exitcode = self.process.exitcode if self.process else None
+            self._stop(kill=True)
+            return {"success": False, "video_path": None, "error": f"Render worker died (exit code {exitcode})"}
+
+        self.jobs_done += 1
+        if self.jobs_done >= self.max_jobs:
+            # The worker exits on its own after max_jobs, reap it now
+            self._stop()
+        return result
+
+    @property
+    def is_warm(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def warm(self) -> None:
+        """
+        Start the process ahead of the first job
+        """
+        if not self.is_warm:
+            self._stop(kill=True)
+            self._start()
+
+    def close(self) -> None:
+        self._stop()
+
+class RenderServer:
+    """
+    A fixed set of warm workers shared by every render thread in the process
+
+    When every worker is busy, the next free one goes to the waiting job with
+    the lowest priority number, oldest first.
+    """
+
+    def __init__(self, workers: int, max_jobs: int = DEFAULT_MAX_JOBS, job_timeout: float = DEFAULT_JOB_TIMEOUT):
+        self.size = 0
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self._free: List[RenderWorker] = []
+        self._waiting: List[Tuple[int, int]] = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+        self.grow(workers)
+
+    def grow(self, workers: int) -> None:
+        """
+        Add workers until there are at least this many; processes start on first use
+        """
+        with self._cond:
+            while self.size < workers:
+                self._free.append(RenderWorker(self.max_jobs, self.job_timeout))
+                self.size += 1
+            self._cond.notify_all()
+
+    def _acquire(self, priority: int) -> RenderWorker:
+        with self._cond:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            while not (self._free and self._waiting[0] == ticket):
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            worker = self._free.pop()
+            # The next waiter in line may be able to take another free worker
+            self._cond.notify_all()
+            return worker
+
+    def _release(self, worker: RenderWorker) -> None:
+        with self._cond:
+            self._free.append(worker)
+            self._cond.notify_all()
+
+    def render(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Render a job on the next free worker, blocking until one is free
+
+        job["priority"] orders waiting jobs (lower first, default 0).
+        """
+        start = time.monotonic()
+        worker = self._acquire(job.get("priority", 0))
+        try:
+            result = worker.render(job)
+        finally:
+            self._release(worker)
+        result["duration"] = time.monotonic() - start
+        return result
+
+    def warm(self) -> None:
+        """
+        Start every idle cold worker now so the first scenes skip the Manim import
+
+        Workers start in parallel and each goes back to the pool as soon as it is
+        ready, so renders never wait for the slowest start. Raises
+        RenderServerUnavailable once every start has finished if any failed.
+        """
+        with self._cond:
+            cold = [worker for worker in self._free if not worker.is_warm]
+            self._free = [worker for worker in self._free if worker.is_warm]
+        errors = []
+
+        def start(worker: RenderWorker) -> None:
+            try:
+                worker.warm()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                self._release(worker)
+
+        threads = [threading.Thread(target=start, args=(worker,), name="render-warm", daemon=True) for worker in cold]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def close(self, timeout: float = 30) -> None:
+        # Busy workers are daemonic, so any still rendering after the timeout die with the process
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._free) >= self.size, timeout)
+            for worker in self._free:
+                worker.close()
+
+_server: Optional[RenderServer] = None
+_server_lock = threading.Lock()
+_server_disabled = False
+
+def get_render_server(workers: int = 1) -> Optional[RenderServer]:
+    """
+    Get the process-wide render server with at least this many workers, or None
+    when warm rendering is off or unavailable
+
+    Controlled by RENDER_BACKEND ("server", the default, or "cli"),
+    RENDER_SERVER_MAX_JOBS and RENDER_SERVER_TIMEOUT.
+    """
+    global _server
+    if _server_disabled or os.getenv("RENDER_BACKEND", "server").lower() != "server":
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = RenderServer(
+                workers,
+                max_jobs=int(os.getenv("RENDER_SERVER_MAX_JOBS", DEFAULT_MAX_JOBS)),
+                job_timeout=float(os.getenv("RENDER_SERVER_TIMEOUT", DEFAULT_JOB_TIMEOUT))
+            )
+        else:
+            _server.grow(workers)
+        return _server
+
+def disable_render_server(reason: str) -> None:
+    """
+    Fall back to one manim CLI process per scene for the rest of this process
+    """
+    global _server_disabled
+    if not _server_disabled:
+        _server_disabled = True
+        print(f"⚠️  Warm render server unavailable, falling back to the manim CLI: {reason}")
+
+def warm_render_server(workers: int) -> None:
+    """
+    Size the render server and start its workers, e.g. while the LLM phases run
+    """
+    server = get_render_server(workers)
+    if server is None:
+        return
+    try:
+        server.warm()
+    except RenderServerUnavailable as e:
+        disable_render_server(str(e))
+
+@atexit.register
+def _close_server() -> None:
+    if _server is not None:
+        _server.close()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Standalone render worker for render farm mode
+Leases scene tasks from the render queue, renders them on a warm render server
+and stores each video in shared artifact storage. Run as many as needed, on
+any node that can reach the queue and the artifact storage:
+
+    python render_worker.py --concurrency 4
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+from render_cache import get_render_cache
+from render_pool import render_scene, get_render_workers
+from render_queue import DEFAULT_LEASE_SECONDS, get_render_queue, store_artifact
+from render_server import warm_render_server
+from workspace import create_workspace
+
+DEFAULT_WORKER_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "worker")
+# How long an idle worker waits before checking the queue again
+IDLE_SLEEP = 1.0
+
+def get_lease_seconds() -> float:
+    """
+    Resolve the task lease length in seconds from the RENDER_QUEUE_LEASE env var
+    """
+    lease_seconds = float(os.getenv("RENDER_QUEUE_LEASE", DEFAULT_LEASE_SECONDS))
+    if lease_seconds <= 0:
+        raise ValueError(f"RENDER_QUEUE_LEASE must be positive, got {lease_seconds}")
+    return lease_seconds
+
+def process_task(queue, task: Dict[str, Any], worker_id: str, lease_seconds: float) -> Dict[str, Any]:
+    """
+    Render one leased task in a scratch workspace and record its result in the queue
+    """
+    job = task["job"]
+    workspace = create_workspace(f"task_{task['id']}", os.getenv("RENDER_WORKER_ROOT", DEFAULT_WORKER_ROOT))
+    done = threading.Event()
+
+    def keep_lease() -> None:
+        # Renew well before expiry; stop if another worker has taken the task over
+        while not done.wait(lease_seconds / 3):
+            if not queue.renew(task["id"], worker_id, lease_seconds):
+                print(f"⚠️  Lost the lease on {job['className']} ({task['id']}), or it was cancelled")
+                return
+
+    heartbeat = threading.Thread(target=keep_lease, name=f"lease-{task['id'][:8]}", daemon=True)
+    heartbeat.start()
+    try:
+        generated_dir = os.path.join(workspace, "generated")
+        os.makedirs(generated_dir, exist_ok=True)
+        with open(os.path.join(generated_dir, job["filename"]), "w", encoding="utf-8") as f:
+            f.write(job["code"])
+
+        try:
+            result = render_scene({
+                "filename": job["filename"],
+                "className": job["className"],
+                "workdir": generated_dir,
+                "profile": job.get("profile"),
+                "priority": job.get("priority", 0),
+                "lesson": job.get("lesson")
+            }, get_render_cache())
+            if result["success"]:
+                result["video_path"] = store_artifact(result["video_path"], task["id"])
+        except Exception as e:
+            result = {"success": False, "video_path": None, "error": f"Render worker error: {e}", "segments_rendered": 0}
+
+        if queue.complete(task["id"], worker_id, result):
+            status = "✅" if result["success"] else "❌"
+            print(f"{status} {job['className']} ({task['id']}, attempt {task['attempts']}): {result['video_path'] or result['error']}")
+        else:
+            print(f"⚠️  Dropped result for {job['className']} ({task['id']}), its lease was taken over or it was cancelled")
+        return result
+    finally:
+        done.set()
+        heartbeat.join()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def run_worker(worker_id: str, once: bool = False, stop: Optional[threading.Event] = None) -> int:
+    """
+    Lease and render tasks until stopped, or until the queue is empty when once is True
+
+    Returns the number of tasks processed.
+    """
+    queue = get_render_queue()
+    lease_seconds = get_lease_seconds()
+    processed = 0
+    while stop is None or not stop.is_set():
+        task = queue.lease(worker_id, lease_seconds)
+        if task is None:
+            if once:
+                break
+            time.sleep(IDLE_SLEEP)
+            continue
+        process_task(queue, task, worker_id, lease_seconds)
+        processed += 1
+    return processed
+
+def main():
+    """
+    Run render workers until interrupted
+    """
+    parser = argparse.ArgumentParser(description="Render worker for render farm mode")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help="Number of scenes to render at once (default: RENDER_WORKERS env var or half the CPU cores)")
+    parser.add_argument("--worker-id", type=str, default=None,
+                       help="Name this worker in leases and logs (default: hostname and a random suffix)")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server",
+                       help="Render on warm Manim workers or with one manim process per scene (default: server)")
+    parser.add_argument("--once", action="store_true",
+                       help="Exit once the queue is empty instead of waiting for more tasks")
+    args = parser.parse_args()
+
+    # The worker renders locally, whatever RENDER_BACKEND the API nodes use
+    os.environ["RENDER_BACKEND"] = args.backend
+    concurrency = get_render_workers(args.concurrency)
+    worker_id = args.worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+
+    print(f"🏭 Render worker {worker_id} starting with {concurrency} slots")
+    warm_render_server(concurrency)
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=run_worker, args=(f"{worker_id}/{slot}", args.once, stop), name=f"render-slot-{slot}")
+        for slot in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping after the current renders...")
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Retry policy for LLM calls
+Classifies errors, honours Retry-After, and backs off exponentially with jitter
+within a per-request timeout and a total deadline
+"""
+
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import aiohttp
+
+# HTTP statuses that are worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+@dataclass
+class RetryPolicy:
+    """
+    Settings for retrying a single logical request
+    """
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    request_timeout: float = 180.0
+    deadline: float = 600.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """
+        Build a policy from LLM_MAX_ATTEMPTS, LLM_REQUEST_TIMEOUT and LLM_DEADLINE
+        """
+        return cls(
+            max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", cls.max_attempts)),
+            request_timeout=float(os.getenv("LLM_REQUEST_TIMEOUT", cls.request_timeout)),
+            deadline=float(os.getenv("LLM_DEADLINE", cls.deadline))
+        )
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either as seconds or as an HTTP date
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def classify_error(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """
+    Decide whether an error is retryable, and how long the server asked us to wait
+    """
+    if isinstance(error, aiohttp.ClientResponseError):
+        retry_after = parse_retry_after(error.headers.get("Retry-After")) if error.headers else None
+        return error.status in RETRYABLE_STATUSES, retry_after
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ServerDisconnectedError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return True, None
+    return False, None
+
+def compute_backoff(attempt: int, policy: RetryPolicy, retry_after: Optional[float] = None) -> float:
+    """
+    Exponential backoff with full jitter, never shorter than the server's Retry-After
+    """
+    delay = random.uniform(0, min(policy.max_delay, policy.base_delay * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+async def retry_async(func: Callable[[], Awaitable[Any]], policy: RetryPolicy, description: str = "request") -> Any:
+    """
+    Call func until it succeeds, a non-retryable error occurs, or the policy runs out
+
+    func is responsible for applying policy.request_timeout to the network call
+    itself, so time spent queueing for a concurrency slot is not counted.
+    """
+    start = time.monotonic()
+    for attempt in range(policy.max_attempts):
+        try:
+            return await func()
+        except Exception as e:
+            retryable, retry_after = classify_error(e)
+            if not retryable or attempt == policy.max_attempts - 1:
+                raise
+
+            delay = compute_backoff(attempt, policy, retry_after)
+            if time.monotonic() - start + delay > policy.deadline:
+                print(f"❌ {description} failed, retry deadline of {policy.deadline:.0f}s reached: {e}")
+                raise
+
+            print(f"⚠️  {description} failed on attempt {attempt + 1} ({type(e).__name__}: {e}), retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
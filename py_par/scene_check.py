@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Pre-render static check for scene files
+Byte-compiles each scene, resolves its names against the installed Manim's
+exports and checks the scene class exists, so broken scenes are rejected in
+milliseconds instead of after Manim has started up
+"""
+
+import ast
+import builtins
+import json
+import os
+import subprocess
+import sys
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, Optional
+
+from render_cache import get_manim_version
+
+DEFAULT_SYMBOL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "cache", "symbols")
+
+# Run in a child interpreter so the check process never pays for importing Manim
+_LIST_EXPORTS = "import json, manim; print(json.dumps(sorted(n for n in dir(manim) if not n.startswith('_'))))"
+
+_MODULE_NAMES = {"__name__", "__file__", "__doc__"}
+
+@lru_cache(maxsize=1)
+def load_manim_symbols(cache_dir: str = DEFAULT_SYMBOL_CACHE_DIR) -> Optional[FrozenSet[str]]:
+    """
+    Get the names exported by `from manim import *`, cached on disk per Manim version
+
+    Returns None when Manim is not installed, in which case names are not checked.
+    """
+    version = get_manim_version()
+    if version == "unknown":
+        return None
+
+    path = os.path.join(cache_dir, f"manim-{version}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return frozenset(json.load(f))
+    except (OSError, ValueError):
+        pass
+
+    try:
+        output = subprocess.run([sys.executable, "-c", _LIST_EXPORTS], check=True, capture_output=True, text=True, timeout=120).stdout
+        symbols = json.loads(output)
+    except (subprocess.SubprocessError, OSError, ValueError) as e:
+        print(f"⚠️  Could not list Manim exports, skipping name checks: {e}")
+        return None
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(symbols, f)
+    os.replace(tmp_path, path)
+    return frozenset(symbols)
+
+def _bound_names(tree: ast.AST) -> set:
+    # Every name the module binds anywhere; scopes are ignored, which only ever
+    # lets a genuinely unknown name through, never rejects a valid one
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            names.add(node.name)
+    return names
+
+def check_scene_code(code: str, class_name: str, filename: str = "<scene>", symbols: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+    """
+    Statically check a scene before it is rendered
+
+    Returns {"ok": bool, "errors": [...]} where each error names its line.
+    """
+    errors = []
+    try:
+        tree = compile(code, filename, "exec", ast.PyCF_ONLY_AST)
+        compile(tree, filename, "exec")
+    except SyntaxError as e:
+        return {"ok": False, "errors": [f"Line {e.lineno}: {e.msg}"]}
+    except ValueError as e:
+        return {"ok": False, "errors": [str(e)]}
+
+    if not any(isinstance(node, ast.ClassDef) and node.name == class_name for node in tree.body):
+        errors.append(f"Class '{class_name}' is not defined in {filename}")
+
+    # Names can only be resolved when every star import is Manim's and its exports are known
+    star_imports = {node.module for node in ast.walk(tree) if isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names)}
+    if star_imports and symbols is None:
+        symbols = load_manim_symbols()
+    if star_imports <= {"manim"} and (symbols is not None or not star_imports):
+        known = _bound_names(tree) | set(dir(builtins)) | _MODULE_NAMES | (symbols or frozenset())
+        unknown = {}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in known:
+                unknown[node.id] = min(node.lineno, unknown.get(node.id, node.lineno))
+        for name, line in sorted(unknown.items(), key=lambda item: item[1]):
+            errors.append(f"Line {line}: Unknown name '{name}'")
+
+    return {"ok": not errors, "errors": errors}
+
+def check_scene_file(path: str, class_name: str) -> Dict[str, Any]:
+    """
+    Statically check a scene file on disk
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return check_scene_code(f.read(), class_name, os.path.basename(path))
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+JSON schemas for each phase's LLM payload
+Used to request structured output from the API and to enforce the same schema
+on every response we accept
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+def _object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    # Strict structured output requires every property to be required and no extras
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+PHASE1_SCHEMA = _object({
+    "overview": _object({
+        "title": _STRING,
+        "description": _STRING,
+        "learning_objectives": _STRING_LIST,
+        "target_duration": _STRING,
+        "format": _STRING
+    }),
+    "scenes": {
+        "type": "array",
+        "items": _object({
+            "scene_number": {"type": "integer"},
+            "title": _STRING,
+            "description": _STRING,
+            "visual_elements": _STRING_LIST,
+            "key_points": _STRING_LIST,
+            "manim_concepts": _STRING_LIST,
+            "explanation": _STRING
+        })
+    }
+})
+
+PHASE2_SCHEMA = _object({
+    "expanded_description": _STRING,
+    "script": _object({
+        "setup": _STRING_LIST,
+        "animations": {
+            "type": "array",
+            "items": _object({
+                "step": {"type": "integer"},
+                "action": _STRING,
+                "description": _STRING,
+                "objects": _STRING_LIST,
+                "timing": {"type": "number"}
+            })
+        },
+        "cleanup": _STRING_LIST,
+        "total_estimated_time": {"type": "number"},
+        "manim_objects": _object({
+            "text_objects": _STRING_LIST,
+            "math_objects": _STRING_LIST,
+            "geometric_objects": _STRING_LIST,
+            "groups": _STRING_LIST
+        }),
+        "positioning_guide": _object({
+            "center": _STRING,
+            "left_side": _STRING,
+            "right_side": _STRING,
+            "top": _STRING,
+            "bottom": _STRING
+        }),
+        "color_scheme": _object({
+            "primary": _STRING,
+            "secondary": _STRING,
+            "accent": _STRING,
+            "background": _STRING
+        })
+    })
+})
+
+PHASE3_SCHEMA = _object({
+    "className": _STRING,
+    "filename": _STRING,
+    "code": _STRING,
+    "validationResults": _object({
+        "syntaxValid": {"type": "boolean"},
+        "manimCompatible": {"type": "boolean"},
+        "warnings": _STRING_LIST,
+        "suggestions": _STRING_LIST
+    })
+})
+
+PHASE_SCHEMAS = {
+    1: ("scene_map", PHASE1_SCHEMA),
+    2: ("scene_script", PHASE2_SCHEMA),
+    3: ("manim_scene_code", PHASE3_SCHEMA)
+}
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None
+}
+
+class SchemaValidationError(ValueError):
+    """
+    Raised when a structured response does not match its schema
+    """
+
+def structured_output_enabled() -> bool:
+    """
+    Check whether structured output mode is on (LLM_STRUCTURED_OUTPUT env var)
+    """
+    return os.getenv("LLM_STRUCTURED_OUTPUT", "").lower() in ("1", "true", "yes", "on")
+
+def schema_for(phase: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the (name, schema) pair to request for a phase, or None when structured output is off
+    """
+    return PHASE_SCHEMAS[phase] if structured_output_enabled() else None
+
+def response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the chat completions response_format for a schema
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": schema
+        }
+    }
+
+def validate_against_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Validate a value against the subset of JSON Schema used by the phase schemas
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_TYPE_CHECKS[t](value) for t in types):
+            return [f"{path}: expected {' or '.join(types)}, got {type(value).__name__}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: {value!r} is not one of {schema['enum']}")
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}: missing required property '{key}'")
+        for key, item in value.items():
+            if key in properties:
+                errors.extend(validate_against_schema(item, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unexpected property '{key}'")
+
+    if isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate_against_schema(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
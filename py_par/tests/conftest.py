@@ -0,0 +1,8 @@
+"""
+Shared test setup: the py_par modules import each other as top-level modules
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
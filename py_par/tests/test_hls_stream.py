@@ -0,0 +1,49 @@
+"""
+Tests for the growing HLS playlist; ffmpeg is replaced by a fake segmenter
+"""
+
+import hls_stream
+from hls_stream import HLSPlaylist
+
+
+def read_playlist(playlist):
+    with open(playlist.path, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def fake_segmenter(durations_by_mode, calls):
+    def segment(video_path, directory, name, segment_seconds, force_keyframes=False):
+        calls.append((name, force_keyframes))
+        return [(duration, f"{name}_{n:03d}.ts") for n, duration in enumerate(durations_by_mode[force_keyframes])]
+    return segment
+
+
+def test_target_duration_is_fixed_when_created(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(hls_stream, "segment_video", fake_segmenter({False: [6.0, 7.9], True: []}, calls))
+    playlist = HLSPlaylist(str(tmp_path), 2, segment_seconds=6)
+    assert "#EXT-X-TARGETDURATION:8" in read_playlist(playlist)
+    assert playlist.add_scene(0, "scene_1.mp4")
+    assert "#EXT-X-TARGETDURATION:8" in read_playlist(playlist)
+    assert calls == [("part_000", False)]
+
+
+def test_long_segments_are_reencoded(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(hls_stream, "segment_video", fake_segmenter({False: [12.0], True: [6.0, 6.0]}, calls))
+    playlist = HLSPlaylist(str(tmp_path), 1, segment_seconds=6)
+    assert playlist.add_scene(0, "scene_1.mp4")
+    assert calls == [("part_000", False), ("part_000", True)]
+    assert read_playlist(playlist).count("#EXTINF:6.000000,") == 2
+
+
+def test_scene_that_cannot_fit_is_skipped(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(hls_stream, "segment_video", fake_segmenter({False: [12.0], True: [12.0]}, calls))
+    playlist = HLSPlaylist(str(tmp_path), 2, segment_seconds=6)
+    assert not playlist.add_scene(0, "scene_1.mp4")
+    playlist.finish()
+    lines = read_playlist(playlist)
+    assert "#EXT-X-TARGETDURATION:8" in lines
+    assert not any(line.startswith("#EXTINF") for line in lines)
+    assert lines[-1] == "#EXT-X-ENDLIST"
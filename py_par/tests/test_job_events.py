@@ -0,0 +1,69 @@
+"""
+Tests for job event publishing and the resumable event stream
+"""
+
+import json
+
+import pytest
+
+from job_events import format_sse, get_poll_interval, make_event_publisher, poll_job_events
+from job_store import MemoryJobStore
+
+
+def test_publisher_adds_artifact_urls():
+    store = MemoryJobStore()
+    store.create("job_1")
+    publish = make_event_publisher(store, "job_1", lambda path: f"/files/{path}")
+    publish("render_finish", {"scene": 1, "video": "scene_1.mp4"})
+    publish("render_start", {"scene": 2})
+    events = store.get_events("job_1")
+    assert events[0]["data"] == {"scene": 1, "video": "scene_1.mp4", "url": "/files/scene_1.mp4"}
+    assert "url" not in events[1]["data"]
+
+
+def test_poll_sends_new_events_then_status_changes():
+    store = MemoryJobStore()
+    store.create("job_1", phase="rendering")
+    store.add_event("job_1", "render_start", {"scene": 1})
+
+    events, after, state, done = poll_job_events(store, "job_1", 0, None)
+    assert [event["type"] for event in events] == ["render_start", "status"]
+    assert after == events[0]["id"]
+    assert not done
+
+    # Nothing new: no events and no repeated status
+    events, after, state, done = poll_job_events(store, "job_1", after, state)
+    assert events == [] and not done
+
+    store.add_event("job_1", "render_finish", {"scene": 1})
+    store.update("job_1", status="completed", progress=100, result={"videos": []})
+    events, after, state, done = poll_job_events(store, "job_1", after, state)
+    assert [event["type"] for event in events] == ["render_finish", "status"]
+    assert events[1]["data"]["result"] == {"videos": []}
+    assert done
+
+
+def test_resuming_skips_events_already_seen():
+    store = MemoryJobStore()
+    store.create("job_1")
+    first = store.add_event("job_1", "llm_start", {})
+    store.add_event("job_1", "llm_finish", {})
+    events, _, _, _ = poll_job_events(store, "job_1", first, None)
+    assert [event["type"] for event in events] == ["llm_finish", "status"]
+
+
+def test_missing_job_ends_the_stream():
+    events, _, _, done = poll_job_events(MemoryJobStore(), "nope", 0, None)
+    assert events[0]["type"] == "error"
+    assert done
+
+
+def test_format_sse():
+    assert format_sse({"id": 7, "type": "render_start", "data": {"scene": 1}}) == f"id: 7\nevent: render_start\ndata: {json.dumps({'scene': 1})}\n\n"
+    assert format_sse({"id": None, "type": "status", "data": {}}).startswith("event: status\n")
+
+
+def test_poll_interval_must_be_positive(monkeypatch):
+    monkeypatch.setenv("JOB_EVENTS_POLL_INTERVAL", "0")
+    with pytest.raises(ValueError):
+        get_poll_interval()
@@ -0,0 +1,140 @@
+"""
+Tests for the job scheduler's priority classes, fair share and queue limits
+"""
+
+import threading
+import time
+
+import pytest
+
+from job_scheduler import JobScheduler, SchedulerFull, get_priority_class
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = JobScheduler({"render": 1}, max_queued=10, max_queued_per_user=5)
+    yield scheduler
+    scheduler.shutdown(cancel_pending=True)
+
+
+def block_worker(scheduler):
+    # Occupy the only worker so later submissions queue up behind it
+    started = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait()
+
+    future = scheduler.submit("render", hold, user="holder")
+    started.wait()
+    return release, future
+
+
+def test_interactive_runs_before_batch(scheduler):
+    release, holder = block_worker(scheduler)
+    order = []
+    futures = [
+        scheduler.submit("render", order.append, "batch", user="a", priority_class="batch"),
+        scheduler.submit("render", order.append, "interactive", user="b", priority_class="interactive")
+    ]
+    release.set()
+    for future in [holder, *futures]:
+        future.result(timeout=5)
+    assert order == ["interactive", "batch"]
+
+
+def test_users_take_turns(scheduler):
+    release, holder = block_worker(scheduler)
+    order = []
+    futures = [scheduler.submit("render", order.append, f"bulk{n}", user="bulk") for n in range(3)]
+    futures.append(scheduler.submit("render", order.append, "other", user="other"))
+    release.set()
+    for future in [holder, *futures]:
+        future.result(timeout=5)
+    # The other user is served after one bulk job, not after all three
+    assert order == ["bulk0", "other", "bulk1", "bulk2"]
+
+
+def test_full_user_share_is_rejected(scheduler):
+    release, holder = block_worker(scheduler)
+    for _ in range(5):
+        scheduler.submit("render", lambda: None, user="bulk")
+    with pytest.raises(SchedulerFull) as info:
+        scheduler.submit("render", lambda: None, user="bulk")
+    assert info.value.retry_after == scheduler.retry_after
+    # Other users still have room
+    scheduler.submit("render", lambda: None, user="other")
+    release.set()
+    holder.result(timeout=5)
+
+
+def test_unknown_kind_and_class_are_rejected(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.submit("upload", lambda: None)
+    with pytest.raises(ValueError):
+        get_priority_class("urgent")
+
+
+def test_shutdown_cancels_queued_jobs():
+    scheduler = JobScheduler({"render": 1})
+    release, holder = block_worker(scheduler)
+    queued = scheduler.submit("render", lambda: None)
+    scheduler.shutdown(cancel_pending=True)
+    release.set()
+    holder.result(timeout=5)
+    assert queued.cancelled()
+
+
+def test_batches_leave_a_worker_for_interactive_jobs():
+    scheduler = JobScheduler({"generation": 3}, interactive_reserved=1, max_running_batch_per_user=5)
+    release = threading.Event()
+    started = []
+    lock = threading.Lock()
+
+    def batch(name):
+        with lock:
+            started.append(name)
+        release.wait()
+
+    try:
+        batches = [scheduler.submit("generation", batch, f"batch{n}", user="bulk", priority_class="batch") for n in range(3)]
+        deadline = time.monotonic() + 5
+        while len(started) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Two batches fill every worker but the reserved one, which the interactive job gets
+        interactive = scheduler.submit("generation", lambda: "done", user="someone")
+        assert interactive.result(timeout=5) == "done"
+        assert sorted(started) == ["batch0", "batch1"]
+        release.set()
+        for future in batches:
+            future.result(timeout=5)
+        assert sorted(started) == ["batch0", "batch1", "batch2"]
+    finally:
+        release.set()
+        scheduler.shutdown()
+
+
+def test_one_user_runs_one_batch_at_a_time():
+    scheduler = JobScheduler({"generation": 4}, interactive_reserved=1, max_running_batch_per_user=1)
+    release = threading.Event()
+    started = []
+
+    def batch(name):
+        started.append(name)
+        release.wait()
+
+    try:
+        futures = [scheduler.submit("generation", batch, name, user=user, priority_class="batch")
+                   for name, user in [("a1", "a"), ("a2", "a"), ("b1", "b")]]
+        deadline = time.monotonic() + 5
+        while len(started) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        assert sorted(started) == ["a1", "b1"]
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        release.set()
+        scheduler.shutdown()
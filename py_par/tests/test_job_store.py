@@ -0,0 +1,62 @@
+"""
+Tests that the memory and SQLite job stores behave the same way
+"""
+
+import pytest
+
+from job_store import MemoryJobStore, SQLiteJobStore, get_job_store, new_job_id
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+
+
+def test_new_job_ids_are_unique_and_prefixed():
+    first, second = new_job_id("render"), new_job_id("render")
+    assert first.startswith("render_")
+    assert first != second
+
+
+def test_create_get_and_update(store):
+    created = store.create("job_1", phase="queued")
+    assert created == {"status": "processing", "phase": "queued", "progress": 0, "result": None, "error": None}
+    store.update("job_1", status="completed", progress=100, result={"videos": ["a.mp4"]})
+    assert store.get("job_1") == {"status": "completed", "phase": "queued", "progress": 100, "result": {"videos": ["a.mp4"]}, "error": None}
+
+
+def test_missing_jobs(store):
+    assert store.get("nope") is None
+    # Updating a job that does not exist is ignored by both stores
+    store.update("nope", status="error")
+    assert store.get("nope") is None
+
+
+def test_unknown_fields_are_rejected(store):
+    store.create("job_1")
+    with pytest.raises(ValueError):
+        store.update("job_1", colour="red")
+    with pytest.raises(ValueError):
+        store.create("job_2", colour="red")
+
+
+def test_events_are_read_in_order_after_an_id(store):
+    store.create("job_1")
+    ids = [store.add_event("job_1", "render_start", {"scene": n}) for n in range(3)]
+    store.add_event("job_2", "render_start", {"scene": 9})
+    assert ids == sorted(ids)
+    assert [event["data"]["scene"] for event in store.get_events("job_1")] == [0, 1, 2]
+    assert [event["data"]["scene"] for event in store.get_events("job_1", after=ids[0])] == [1, 2]
+    assert [event["id"] for event in store.get_events("job_1", limit=2)] == ids[:2]
+
+
+def test_get_job_store(monkeypatch, tmp_path):
+    monkeypatch.setenv("JOB_STORE", "memory")
+    assert isinstance(get_job_store(str(tmp_path / "jobs.sqlite")), MemoryJobStore)
+    monkeypatch.setenv("JOB_STORE", "sqlite")
+    assert isinstance(get_job_store(str(tmp_path / "jobs.sqlite")), SQLiteJobStore)
+    monkeypatch.setenv("JOB_STORE", "redis")
+    with pytest.raises(ValueError):
+        get_job_store(str(tmp_path / "jobs.sqlite"))
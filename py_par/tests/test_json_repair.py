@@ -0,0 +1,110 @@
+"""
+Tests for the repairing JSON parser
+"""
+
+import pytest
+
+from json_repair import JSONRepairError, is_complete_json, repair_json
+
+
+def test_valid_json_needs_no_repairs():
+    assert repair_json('{"a": [1, 2.5, true, null]}') == ({"a": [1, 2.5, True, None]}, [])
+
+
+def test_strips_code_fence():
+    value, repairs = repair_json('```json\n{"title": "Sorting"}\n```')
+    assert value == {"title": "Sorting"}
+    assert repairs == ["stripped_code_fence"]
+
+
+def test_strips_leading_and_trailing_prose():
+    value, repairs = repair_json('Here is the scene map: {"a": 1} Hope this helps!')
+    assert value == {"a": 1}
+    assert "stripped_leading_text" in repairs
+    assert "ignored_trailing_text" in repairs
+
+
+def test_removes_trailing_commas():
+    value, repairs = repair_json('{"a": [1, 2,], "b": 3,}')
+    assert value == {"a": [1, 2], "b": 3}
+    assert repairs == ["removed_trailing_commas"]
+
+
+def test_escapes_raw_newlines_in_strings():
+    value, repairs = repair_json('{"code": "line one\nline two"}')
+    assert value == {"code": "line one\nline two"}
+    assert "escaped_control_characters" in repairs
+
+
+def test_escapes_inner_quotes():
+    value, repairs = repair_json('{"code": "Text("Hello")", "n": 1}')
+    assert value == {"code": 'Text("Hello")', "n": 1}
+    assert "escaped_inner_quotes" in repairs
+
+
+def test_keeps_quoted_call_arguments_inside_code():
+    value, repairs = repair_json('{"code": "t = Text("Hi", font_size=24)\nx = 1", "className": "A"}')
+    assert value == {"code": 't = Text("Hi", font_size=24)\nx = 1', "className": "A"}
+    assert "escaped_inner_quotes" in repairs
+
+
+def test_keeps_several_string_arguments_inside_code():
+    value, _ = repair_json('{"code": "t = MathTex("a", "b")", "className": "A"}')
+    assert value == {"code": 't = MathTex("a", "b")', "className": "A"}
+
+
+def test_keeps_dict_literals_inside_code():
+    value, _ = repair_json('{"code": "d = {"k": 1}", "n": 1}')
+    assert value == {"code": 'd = {"k": 1}', "n": 1}
+
+
+def test_array_items_still_split_on_commas():
+    value, repairs = repair_json('{"tags": ["a", "b",], "c": "x"}')
+    assert value == {"tags": ["a", "b"], "c": "x"}
+    assert repairs == ["removed_trailing_commas"]
+
+
+def test_inserts_missing_comma_after_string_value():
+    value, repairs = repair_json('{"a": "x" "b": 2}')
+    assert value == {"a": "x", "b": 2}
+    assert repairs == ["inserted_missing_commas"]
+
+
+def test_converts_python_literals():
+    value, repairs = repair_json('{"done": True, "error": None}')
+    assert value == {"done": True, "error": None}
+    assert repairs == ["converted_python_literals"]
+
+
+def test_quotes_bare_keys():
+    value, repairs = repair_json('{title: "Sorting"}')
+    assert value == {"title": "Sorting"}
+    assert repairs == ["quoted_bare_keys"]
+
+
+def test_closes_truncated_response():
+    value, repairs = repair_json('{"scenes": [{"title": "One"}, {"title": "Tw')
+    assert value == {"scenes": [{"title": "One"}, {"title": "Tw"}]}
+    assert "closed_unterminated_strings" in repairs
+    assert "closed_unterminated_containers" in repairs
+
+
+def test_inserts_missing_commas():
+    value, repairs = repair_json('{"a": 1 "b": 2}')
+    assert value == {"a": 1, "b": 2}
+    assert repairs == ["inserted_missing_commas"]
+
+
+def test_no_json_at_all():
+    with pytest.raises(JSONRepairError):
+        repair_json("I could not generate the scenes.")
+
+
+def test_repair_error_is_a_value_error():
+    assert issubclass(JSONRepairError, ValueError)
+
+
+def test_complete_json_excludes_truncated_responses():
+    assert is_complete_json('```json\n{"a": [1, 2,]}\n```')
+    assert not is_complete_json('{"scenes": [{"title": "Tw')
+    assert not is_complete_json("Sorry, I cannot help with that.")
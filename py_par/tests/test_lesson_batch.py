@@ -0,0 +1,77 @@
+"""
+Tests for batch item loading and resuming an interrupted batch
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import lesson_batch
+from lesson_batch import batch_item_id, load_batch_items, load_finished_ids, normalize_batch_items, run_batch
+
+
+def test_item_ids_are_stable():
+    assert batch_item_id("Fourier series") == batch_item_id("  Fourier series ")
+    assert batch_item_id("Fourier series") != batch_item_id("Taylor series")
+    items = normalize_batch_items(["Fourier series", {"topic": "Limits", "id": "limits"}])
+    assert [item["id"] for item in items] == [batch_item_id("Fourier series"), "limits"]
+
+
+@pytest.mark.parametrize("entries", [
+    [{"id": "x"}],
+    ["  "],
+    [42],
+    [{"topic": "A", "id": "same"}, {"topic": "B", "id": "same"}],
+    [{"topic": "A", "id": "../escape"}]
+])
+def test_invalid_entries_are_rejected(entries):
+    with pytest.raises(ValueError):
+        normalize_batch_items(entries)
+
+
+def test_load_batch_items_names_the_bad_line(tmp_path):
+    path = tmp_path / "topics.jsonl"
+    path.write_text('"Limits"\n\n{"topic": \n', encoding="utf-8")
+    with pytest.raises(ValueError, match=":3:"):
+        load_batch_items(str(path))
+
+
+def test_finished_ids_skip_failures_and_truncated_lines(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text(
+        json.dumps({"id": "a", "status": "completed"}) + "\n"
+        + json.dumps({"id": "b", "status": "error"}) + "\n"
+        + '{"id": "c", "stat',
+        encoding="utf-8"
+    )
+    assert load_finished_ids(str(path)) == {"a"}
+
+
+def test_batch_resumes_where_it_stopped(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_generate(topic, *args):
+        calls.append(topic)
+        await asyncio.sleep(0)
+        if topic == "Broken":
+            raise ValueError("no scenes")
+        return {"title": topic, "scene_count": 1, "videos": [], "complete_video": ""}
+
+    monkeypatch.setattr(lesson_batch, "generate_lesson_async", fake_generate)
+    items = normalize_batch_items(["Limits", "Broken", "Derivatives"])
+    results_path = tmp_path / "results.jsonl"
+    # A crash left a half-written line behind
+    results_path.write_text(json.dumps({"id": items[0]["id"], "topic": "Limits", "status": "completed"}) + "\n{\"id\": ", encoding="utf-8")
+
+    summary = run_batch(items, str(results_path), "key", render=False, workspace_root=str(tmp_path / "jobs"))
+    assert sorted(calls) == ["Broken", "Derivatives"]
+    assert summary["skipped"] == 1 and summary["completed"] == 1 and summary["failed"] == 1
+
+    calls.clear()
+    run_batch(items, str(results_path), "key", render=False, workspace_root=str(tmp_path / "jobs"))
+    assert calls == ["Broken"]
+    # Every result after the truncated line starts on its own line
+    lines = results_path.read_text(encoding="utf-8").splitlines()
+    assert lines[1] == '{"id": '
+    assert sorted(json.loads(line)["topic"] for line in lines[2:]) == ["Broken", "Broken", "Derivatives"]
@@ -0,0 +1,104 @@
+"""
+Tests for the LLM response cache backends
+"""
+
+import os
+
+import pytest
+
+import llm_cache
+from llm_cache import DiskLLMCache, SQLiteLLMCache, make_cache_key
+
+
+@pytest.fixture(params=["sqlite", "disk"])
+def make_cache(request, tmp_path):
+    def make(max_bytes=10_000, ttl=None):
+        if request.param == "sqlite":
+            return SQLiteLLMCache(str(tmp_path / "cache.sqlite"), max_bytes, ttl)
+        return DiskLLMCache(str(tmp_path / "llm"), max_bytes, ttl)
+    return make
+
+
+def entry_sizes(cache):
+    if isinstance(cache, SQLiteLLMCache):
+        return cache._sum_sizes()
+    return sum(size for _, size, _ in cache._scan())
+
+
+def test_cache_key_covers_every_part():
+    key = make_cache_key("m", "system", "prompt")
+    assert key == make_cache_key("m", "system", "prompt")
+    assert key != make_cache_key("other", "system", "prompt")
+    assert key != make_cache_key("m", "system", "prompt", {"type": "json_object"})
+
+
+def test_get_and_set(make_cache):
+    cache = make_cache()
+    assert cache.get("a" * 64) is None
+    cache.set("a" * 64, "réponse")
+    assert cache.get("a" * 64) == "réponse"
+
+
+def test_running_total_tracks_writes(make_cache):
+    cache = make_cache()
+    cache.set("a" * 64, "x" * 100)
+    cache.set("b" * 64, "y" * 200)
+    cache.set("a" * 64, "z" * 50)
+    assert cache._total == entry_sizes(cache)
+    # A new instance picks the total up from what is already stored
+    assert make_cache()._total == cache._total
+
+
+def test_writes_under_the_limit_do_not_scan(make_cache, monkeypatch):
+    cache = make_cache()
+    monkeypatch.setattr(cache, "_evict", lambda: pytest.fail("evicted under the size limit"))
+    for n in range(10):
+        cache.set(f"{n:064d}", "x" * 100)
+
+
+def test_evicts_least_recently_used(make_cache, monkeypatch):
+    cache = make_cache(max_bytes=1000)
+    clock = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: clock[0])
+    keys = [f"{n:064d}" for n in range(4)]
+    for key in keys:
+        clock[0] += 1
+        cache.set(key, "x" * 200)
+        if isinstance(cache, DiskLLMCache):
+            os.utime(cache._path(key), (clock[0], clock[0]))
+    clock[0] += 1
+    # Touch the oldest entry so the second one is now least recently used
+    assert cache.get(keys[0]) is not None
+    if isinstance(cache, DiskLLMCache):
+        os.utime(cache._path(keys[0]), (clock[0], clock[0]))
+    clock[0] += 1
+    cache.set("f" * 64, "x" * 400)
+
+    assert cache._total <= 1000
+    assert cache._total == entry_sizes(cache)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get("f" * 64) is not None
+
+
+def test_expired_entries_leave_the_total(make_cache, monkeypatch):
+    cache = make_cache(ttl=60)
+    clock = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: clock[0])
+    cache.set("a" * 64, "x" * 100)
+    clock[0] += 61
+    assert cache.get("a" * 64) is None
+    assert cache._total == entry_sizes(cache) == 0
+
+
+@pytest.mark.parametrize("content", ['{"response": "partial"}', '{"created_at": 1', '[]'])
+def test_corrupt_disk_entries_are_misses(tmp_path, content):
+    cache = DiskLLMCache(str(tmp_path))
+    cache.set("ab12", "reply")
+    path = cache._path("ab12")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    assert cache.get("ab12") is None
+    assert not os.path.exists(path)
+    cache.set("ab12", "again")
+    assert cache.get("ab12") == "again"
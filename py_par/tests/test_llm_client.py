@@ -0,0 +1,100 @@
+"""
+Tests for the per-model request and token budgets
+"""
+
+import pytest
+
+import llm_client
+from llm_client import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_client.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_requests_per_minute(clock):
+    limiter = RateLimiter(rpm=2)
+    assert limiter.try_acquire(10) == 0
+    assert limiter.try_acquire(10) == 0
+    clock[0] += 15
+    assert limiter.try_acquire(10) == pytest.approx(45)
+    clock[0] += 45
+    assert limiter.try_acquire(10) == 0
+
+
+def test_usage_corrections_do_not_use_request_slots(clock):
+    limiter = RateLimiter(rpm=3)
+    for _ in range(3):
+        assert limiter.try_acquire(100) == 0
+        limiter.record_usage(100, 250)
+    # Three requests in the window, not six
+    assert limiter.try_acquire(100) > 0
+    clock[0] += 60
+    assert limiter.try_acquire(100) == 0
+
+
+def test_usage_corrections_count_against_tokens(clock):
+    limiter = RateLimiter(tpm=1000)
+    assert limiter.try_acquire(400) == 0
+    clock[0] += 10
+    limiter.record_usage(400, 900)
+    # 900 tokens used, so another 200 must wait for the request to leave the window
+    assert limiter.try_acquire(200) > 0
+    clock[0] += 50
+    # The request has expired but its correction (+500) has not
+    assert limiter.try_acquire(600) > 0
+    assert limiter.try_acquire(400) == 0
+
+
+def test_tokens_wait_until_enough_expires(clock):
+    limiter = RateLimiter(tpm=1000)
+    assert limiter.try_acquire(600) == 0
+    clock[0] += 20
+    assert limiter.try_acquire(300) == 0
+    clock[0] += 10
+    assert limiter.try_acquire(500) == pytest.approx(30)
+
+
+def test_overestimates_free_tokens(clock):
+    limiter = RateLimiter(tpm=1000)
+    assert limiter.try_acquire(800) == 0
+    limiter.record_usage(800, 300)
+    assert limiter.try_acquire(600) == 0
+
+
+def test_no_limits():
+    limiter = RateLimiter()
+    for _ in range(100):
+        assert limiter.try_acquire(10 ** 6) == 0
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, response):
+        self.entries[key] = response
+
+
+@pytest.mark.parametrize("reply, cached", [('{"scenes": []}', True), ('{"scenes": [{"title": "Cut', False)])
+def test_only_valid_responses_are_cached(reply, cached):
+    from json_repair import is_complete_json
+
+    cache = DictCache()
+    client = llm_client.LLMClient("key", cache=cache)
+
+    async def fake_send(system_prompt, prompt, model, format_spec=None):
+        return reply
+
+    client._send = fake_send
+    try:
+        assert client.complete("system", "prompt", "model", validate=is_complete_json) == reply
+    finally:
+        client.close()
+    assert bool(cache.entries) is cached
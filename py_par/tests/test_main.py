@@ -0,0 +1,111 @@
+"""
+Tests for pipeline helpers in main.py
+"""
+
+import asyncio
+import os
+
+from main import await_warmups
+
+
+def test_await_warmups_reports_failures(capsys):
+    async def run():
+        loop = asyncio.get_running_loop()
+
+        def fail():
+            raise RuntimeError("no manim")
+
+        done = []
+        warmups = {
+            "Symbol table": loop.run_in_executor(None, fail),
+            "Warm-up": loop.run_in_executor(None, done.append, True)
+        }
+        await await_warmups(warmups)
+        return done
+
+    assert asyncio.run(run()) == [True]
+    assert "Symbol table failed: no manim" in capsys.readouterr().out
+
+
+def test_scene_renders_carry_the_render_priority(tmp_path, monkeypatch):
+    import main
+    from render_pool import BATCH_PRIORITY
+
+    jobs = []
+
+    def fake_render(job, cache=None, check=True):
+        jobs.append(job)
+        return {"success": False, "error": "not rendered"}
+
+    monkeypatch.setattr(main, "precheck_scene", lambda job: None)
+    monkeypatch.setattr(main, "render_scene", fake_render)
+    scene_file = {"filename": "scene_1.py", "className": "Scene1", "code": "pass\n"}
+    result = asyncio.run(main.render_scene_file_async(scene_file, 1, None, str(tmp_path), str(tmp_path), priority=BATCH_PRIORITY))
+    assert not result["success"]
+    assert jobs[0]["priority"] == BATCH_PRIORITY
+
+
+def test_render_videos_returns_previews_before_final_renders(tmp_path, monkeypatch):
+    import threading
+
+    import main
+
+    release = threading.Event()
+    finals = threading.Event()
+    events = []
+
+    def fake_render_scenes(jobs, workers, cache=None, on_start=None):
+        for job in jobs:
+            if job["quality"] == "final":
+                release.wait(5)
+            on_start(job)
+            video = tmp_path / f"{job['className']}_{job['quality']}.mp4"
+            video.write_text(job["quality"])
+            yield {"success": True, "video_path": str(video), "cached": False, "rejected": False, "duration": 0.1, "segments_rendered": 1, "error": None}
+
+    monkeypatch.setattr(main, "render_scenes", fake_render_scenes)
+    monkeypatch.setattr(main, "get_render_cache", lambda: None)
+    phase3_data = {"sceneFiles": [{"filename": "scene_1.py", "className": "Scene1", "code": "pass\n"}]}
+    previews = []
+    videos = main.render_videos(phase3_data, str(tmp_path / "job"), preview=True, on_preview=previews.append,
+                                on_event=lambda kind, data: events.append((kind, data["quality"])), on_final=lambda videos: finals.set())
+
+    # Returned while the final render is still held back
+    assert previews == [videos]
+    assert open(videos[0]).read() == "preview"
+    release.set()
+    assert finals.wait(5)
+    assert open(videos[0]).read() == "final"
+    assert events == [("render_start", "preview"), ("render_finish", "preview"), ("render_start", "final"), ("render_finish", "final")]
+
+
+def test_published_videos_take_the_profile_container(tmp_path, monkeypatch):
+    import threading
+
+    import main
+    from render_profiles import get_render_profile
+
+    monkeypatch.setenv("RENDER_PROFILES", '{"web": {"quality": "-qm", "resolution": [1280, 720], "fps": 30, "renderer": "cairo", "format": "webm"}}')
+    finals = []
+    done = threading.Event()
+
+    def fake_render_scenes(jobs, workers, cache=None, on_start=None):
+        for job in jobs:
+            video = tmp_path / f"{job['className']}_{job['quality']}.{get_render_profile(job['profile'])['format']}"
+            video.write_text(job["quality"])
+            yield {"success": True, "video_path": str(video), "cached": False, "rejected": False, "duration": 0.1, "segments_rendered": 1, "error": None}
+
+    def on_final(videos):
+        finals.extend(videos)
+        done.set()
+
+    monkeypatch.setattr(main, "render_scenes", fake_render_scenes)
+    monkeypatch.setattr(main, "get_render_cache", lambda: None)
+    phase3_data = {"sceneFiles": [{"filename": "scene_1.py", "className": "Scene1", "code": "pass\n"}]}
+    previews = main.render_videos(phase3_data, str(tmp_path / "job"), preview=True, profile="web", on_final=on_final)
+
+    assert previews[0].endswith("scene_1.mp4")
+    assert done.wait(5)
+    assert finals[0].endswith("scene_1.webm")
+    assert open(finals[0]).read() == "final"
+    assert not os.path.exists(previews[0])
@@ -0,0 +1,110 @@
+"""
+Tests for the Manim code fixer
+"""
+
+import ast
+import textwrap
+
+from manim_fixer import apply_manim_fixes, fix_manim_ast, fix_manim_text
+
+
+def scene(body: str, base: str = "Scene") -> str:
+    return f"from manim import *\n\nclass Demo({base}):\n    def construct(self):\n" + textwrap.indent(textwrap.dedent(body), " " * 8)
+
+
+def fixed_body(body: str, base: str = "Scene") -> str:
+    lines = apply_manim_fixes(scene(body, base)).split("\n")[4:]
+    return textwrap.dedent("\n".join(lines))
+
+
+def test_keeps_comments_and_formatting():
+    code = scene('''\
+        # Title card — stays
+        title = Text("Sorting",   font_size=48)  # big title
+        self.play(ShowCreation(title))  # draw it
+    ''')
+    fixed = apply_manim_fixes(code)
+    assert "# Title card — stays" in fixed
+    assert 'title = Text("Sorting",   font_size=48)  # big title' in fixed
+    assert "self.play(Write(title))  # draw it" in fixed
+
+
+def test_leaves_text_unscaled():
+    assert fixed_body('t = Text("Hello")\n') == 't = Text("Hello")\n'
+
+
+def test_code_without_fixes_is_unchanged():
+    code = scene('''\
+        c = Circle(color=BLUE)  # comment
+        self.play(Write(c))
+    ''')
+    assert apply_manim_fixes(code) == code
+
+
+def test_renames():
+    assert fixed_body("c = Circle(color=CYAN)\nw = FRAME_WIDTH / 2\np = c.get_top_center()\n") == \
+        "c = Circle(color=BLUE)\nw = config.frame_width / 2\np = c.get_top()\n"
+
+
+def test_renames_skip_strings_and_assignment_targets():
+    assert fixed_body('label = Text("CYAN ShowCreation")\n') == 'label = Text("CYAN ShowCreation")\n'
+
+
+def test_create_on_groups_becomes_write():
+    assert fixed_body("self.play(Create(VGroup(a, b)), Create(Circle()))\n") == \
+        "self.play(Write(VGroup(a, b)), Create(Circle()))\n"
+    assert fixed_body("self.play(ShowCreation(group))\n") == "self.play(Write(group))\n"
+
+
+def test_vgroup_arguments():
+    assert fixed_body("g = VGroup((a, 2, Circle(color=AMBER)))\n") == "g = VGroup(a, Circle(color=YELLOW))\n"
+    assert fixed_body("g = VGroup(*items)\n") == "g = VGroup(*items)\n"
+
+
+def test_get_tex_font_size_becomes_scale():
+    assert fixed_body('t = m.get_tex("x", font_size=24)\n') == 't = m.get_tex("x").scale(0.67)\n'
+    assert fixed_body('g = VGroup(m.get_tex("y", font_size=72), 1)\n') == 'g = VGroup(m.get_tex("y").scale(0.8))\n'
+
+
+def test_keyword_cleanup():
+    assert fixed_body("c = Circle(fill_, radius=1, max_width=3)\ns.set_style(opacity=0.3, fill_color=RED)\n") == \
+        "c = Circle(radius=1, fill_opacity=0.5)\ns.set_style(fill_color=RED)\n"
+
+
+def test_positions_and_zero_scale():
+    assert fixed_body("c.move_to(UP * 12 + 9 * LEFT + DOWN * 2)\nc.scale(0)\n") == \
+        "c.move_to(UP * 3 + 5 * LEFT + DOWN * 2)\nc.set_opacity(0)\n"
+
+
+def test_camera_fixes_outside_moving_camera_scenes():
+    assert fixed_body("self.play(self.camera.frame.animate.shift(UP))  # pan\nself.camera.frame.set(width=3)\n") == \
+        "self.wait(0.5)  # pan\nself.camera.frame_center.set(width=3)\n"
+    body = "self.play(self.camera.frame.animate.shift(UP))\n"
+    assert fixed_body(body, "MovingCameraScene") == body
+
+
+def test_play_wait_is_unwrapped():
+    assert fixed_body("self.play(self.wait(FRAME_HEIGHT))\n") == "self.wait(config.frame_height)\n"
+
+
+def test_self_assignments_are_removed():
+    assert fixed_body("BLUE = BLUE  # shadowing\nc = Circle(color=BLUE)\n") == "c = Circle(color=BLUE)\n"
+    assert fixed_body("if x:\n    RED = RED\nelse:\n    y = 1\n") == "if x:\n    pass\nelse:\n    y = 1\n"
+    assert fixed_body("a = 1; GREEN = GREEN\n") == "a = 1; pass\n"
+
+
+def test_svg_becomes_circle():
+    assert fixed_body('icon = SVGMobject("icon.svg", color=CYAN)\n') == "icon = Circle()\n"
+
+
+def test_unparseable_code_returns_none():
+    assert fix_manim_ast("def broken(:\n") is None
+
+
+def test_text_fixes_make_code_parse():
+    code = "c = Circle(color=RED, fill_)\nt = Text('a', font=\\\"Arial\\\")\n"
+    fixed = fix_manim_text(code)
+    ast.parse(fixed)
+    assert "fill_opacity=0.5" in fixed
+    assert 'font="Arial"' in fixed
+    assert apply_manim_fixes(code) == fixed
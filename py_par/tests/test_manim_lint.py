@@ -0,0 +1,94 @@
+"""
+Tests for the single-pass Manim code linter
+"""
+
+import re
+
+from manim_lint import compile_rules, lint_manim_code
+
+CLEAN_SCENE = '''from manim import *
+
+class Scene1(Scene):
+    def construct(self):
+        title = Text("Sorting").scale(0.7)
+        self.play(Write(title))
+        self.wait(1)
+'''
+
+
+def rules_of(result):
+    return [d["rule"] for d in result["diagnostics"]]
+
+
+def test_clean_scene_is_valid():
+    result = lint_manim_code(CLEAN_SCENE)
+    assert result == {"issues": [], "warnings": [], "diagnostics": [], "is_valid": True}
+
+
+def test_issue_locations():
+    code = "x = 1\n    self.play(ShowCreation(c))\n"
+    result = lint_manim_code(code)
+    assert result["is_valid"] is False
+    assert result["diagnostics"] == [{
+        "rule": "show_creation",
+        "severity": "issue",
+        "message": "Uses deprecated ShowCreation - should use Create instead",
+        "line": 2,
+        "column": 15
+    }]
+    assert result["issues"] == ["Line 2, col 15: Uses deprecated ShowCreation - should use Create instead"]
+
+
+def test_repeated_messages_are_grouped():
+    result = lint_manim_code("a = SVGMobject('a')\nb = SVGMobject('b')\nc = SVGMobject('c')\n")
+    assert result["issues"] == ["Line 1, col 5: Uses SVGMobject - should use basic shapes instead (and 2 more)"]
+
+
+def test_messages_use_pattern_groups():
+    result = lint_manim_code("c = Circle(color=CYAN)\nself.play(FadeInFromDown(c))\n")
+    messages = [d["message"] for d in result["diagnostics"]]
+    assert "Uses undefined color constant 'CYAN' - should use standard Manim colors" in messages
+    assert "Uses undefined animation 'FadeInFromDown' - should use standard Manim animations" in messages
+
+
+def test_nested_triggers():
+    # camera.frame_center.animate contains the camera.frame trigger but is its own rule
+    result = lint_manim_code("self.play(self.camera.frame_center.animate.shift(UP))\n")
+    assert rules_of(result) == ["camera_frame_center_animate"]
+    result = lint_manim_code("self.camera.frame.scale(2)\n")
+    assert rules_of(result) == ["camera_frame"]
+
+
+def test_warnings_do_not_invalidate():
+    result = lint_manim_code('t = Text("Hello")\n')
+    assert rules_of(result) == ["unscaled_text"]
+    assert result["is_valid"] is True
+    assert len(result["warnings"]) == 1
+
+
+def test_unless_marker_suppresses_rule():
+    assert "unscaled_text" not in rules_of(lint_manim_code(CLEAN_SCENE))
+    assert "zero_scale" in rules_of(lint_manim_code("c.scale(0)\n"))
+    assert "zero_scale" not in rules_of(lint_manim_code("c.scale(0)\nc.set_opacity(0)\n"))
+
+
+def test_requires_marker():
+    assert "get_tex_font_size" not in rules_of(lint_manim_code("t = Tex('x', font_size=24)\n"))
+    assert "get_tex_font_size" in rules_of(lint_manim_code("t = m.get_tex('x', font_size=24)\n"))
+
+
+def test_line_scoped_rules():
+    assert "self_assignment" in rules_of(lint_manim_code("        total = total\n"))
+    assert "self_assignment" not in rules_of(lint_manim_code("        total = total + 1\n"))
+
+
+def test_compile_rules_dispatches_inner_triggers():
+    scanner, dispatch = compile_rules([
+        {"id": "outer", "trigger": "abc.def"},
+        {"id": "inner", "trigger": "def"}
+    ])
+    match = scanner.search("xx abc.def")
+    assert match.group(0) == "abc.def"
+    entries = [(k, rule["id"]) for k, rule, _ in dispatch["abc.def"]]
+    assert entries == [(0, "outer"), (4, "inner")]
+    assert isinstance(scanner, re.Pattern)
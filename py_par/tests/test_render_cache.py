@@ -0,0 +1,34 @@
+"""
+Tests for the rendered video cache
+"""
+
+from render_cache import RenderCache, render_cache_key
+
+
+def test_key_depends_on_code_class_and_flags():
+    key = render_cache_key("code", "Scene1", ["-qm"])
+    assert key == render_cache_key("code", "Scene1", ["-qm"])
+    assert key != render_cache_key("code2", "Scene1", ["-qm"])
+    assert key != render_cache_key("code", "Scene2", ["-qm"])
+    assert key != render_cache_key("code", "Scene1", ["-qh"])
+
+
+def test_put_and_get(tmp_path):
+    cache = RenderCache(str(tmp_path / "renders"))
+    video = tmp_path / "scene.mp4"
+    video.write_bytes(b"video")
+    assert cache.get("ab" * 32) is None
+    path = cache.put("ab" * 32, str(video))
+    assert path.endswith(".mp4")
+    assert cache.get("ab" * 32) == path
+    assert open(path, "rb").read() == b"video"
+
+
+def test_videos_keep_their_container_extension(tmp_path):
+    cache = RenderCache(str(tmp_path / "renders"))
+    video = tmp_path / "scene.webm"
+    video.write_bytes(b"webm")
+    path = cache.put("cd" * 32, str(video), "webm")
+    assert path.endswith(".webm")
+    assert cache.get("cd" * 32, "webm") == path
+    assert cache.get("cd" * 32, "mp4") is None
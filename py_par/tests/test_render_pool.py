@@ -0,0 +1,109 @@
+"""
+Tests for render worker and preview mode resolution and the CLI render slots
+"""
+
+import os
+import threading
+import time
+
+from render_pool import DEFAULT_RENDER_WORKERS, RenderSlots, get_preview_mode, get_render_workers, scene_media_dir
+
+
+def test_render_workers_default(monkeypatch):
+    monkeypatch.delenv("RENDER_WORKERS", raising=False)
+    assert get_render_workers() == DEFAULT_RENDER_WORKERS
+
+
+def test_render_workers_argument_beats_env(monkeypatch):
+    monkeypatch.setenv("RENDER_WORKERS", "6")
+    assert get_render_workers() == 6
+    assert get_render_workers(3) == 3
+
+
+def test_render_workers_at_least_one():
+    assert get_render_workers(0) == 1
+    assert get_render_workers(-4) == 1
+
+
+def test_preview_mode_from_env(monkeypatch):
+    monkeypatch.setenv("RENDER_PREVIEW", "yes")
+    assert get_preview_mode() is True
+    assert get_preview_mode(False) is False
+    monkeypatch.setenv("RENDER_PREVIEW", "0")
+    assert get_preview_mode() is False
+
+
+def test_scene_media_dirs_are_per_file(tmp_path):
+    workdir = str(tmp_path / "generated")
+    first = scene_media_dir(workdir, "scene_1.py")
+    second = scene_media_dir(workdir, "scene_2.py")
+    assert first != second
+    assert os.path.dirname(first) == str(tmp_path / "media")
+
+
+def test_render_slots_cap_concurrent_renders():
+    slots = RenderSlots(2)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def render():
+        with slots.hold(0):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+    threads = [threading.Thread(target=render) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 2
+
+
+def test_render_slots_go_to_lowest_priority_first():
+    slots = RenderSlots(1)
+    order = []
+    release = threading.Event()
+
+    def render(priority, name):
+        with slots.hold(priority):
+            order.append(name)
+
+    def first():
+        with slots.hold(0):
+            release.wait()
+
+    holder = threading.Thread(target=first)
+    holder.start()
+    time.sleep(0.02)
+    waiters = [threading.Thread(target=render, args=args) for args in [(10, "final"), (0, "preview")]]
+    for waiter in waiters:
+        waiter.start()
+        time.sleep(0.02)
+    release.set()
+    for thread in [holder, *waiters]:
+        thread.join()
+    assert order == ["preview", "final"]
+
+
+def test_render_slots_only_grow():
+    slots = RenderSlots(3)
+    slots.grow(1)
+    assert slots.size == 3
+    slots.grow(5)
+    assert slots.size == 5
+
+
+def test_segment_dirs_are_per_lesson(tmp_path, monkeypatch):
+    from render_pool import scene_segment_dir
+
+    monkeypatch.setenv("RENDER_SEGMENT_CACHE_DIR", str(tmp_path))
+    profile = {"name": "standard"}
+    sorting = scene_segment_dir("scene_1.py", "Scene1", profile, "Sorting")
+    assert scene_segment_dir("scene_1.py", "Scene1", profile, " Sorting ") == sorting
+    assert scene_segment_dir("scene_1.py", "Scene1", profile, "Graphs") != sorting
+    assert scene_segment_dir("scene_1.py", "Scene1", profile) == str(tmp_path / "standard" / "shared" / "scene_1" / "Scene1")
@@ -0,0 +1,48 @@
+"""
+Tests for the SQLite render queue and waiting on queued scenes
+"""
+
+import pytest
+
+import render_queue
+from render_queue import SQLiteRenderQueue, render_on_queue
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = SQLiteRenderQueue(str(tmp_path / "queue.sqlite"))
+    monkeypatch.setattr(render_queue, "_queue", queue)
+    monkeypatch.setattr(render_queue, "DEFAULT_POLL_INTERVAL", 0.01)
+    return queue
+
+
+def test_lease_takes_lowest_priority_first(queue):
+    queue.enqueue({"className": "Final", "priority": 10})
+    queue.enqueue({"className": "Preview", "priority": 0})
+    assert queue.lease("w1", 60)["job"]["className"] == "Preview"
+    assert queue.lease("w1", 60)["job"]["className"] == "Final"
+    assert queue.lease("w1", 60) is None
+
+
+def test_render_on_queue_timeout_cancels_the_task(queue):
+    result = render_on_queue({"className": "Slow"}, timeout=0.05)
+    assert not result["success"]
+    assert "within" in result["error"]
+    assert queue.lease("w1", 60) is None
+
+
+def test_cancelled_leased_task_cannot_complete(queue):
+    task_id = queue.enqueue({"className": "Slow"})
+    queue.lease("w1", 60)
+    assert queue.cancel(task_id, {"success": False, "video_path": None, "error": "gave up"})
+    assert not queue.renew(task_id, "w1", 60)
+    assert not queue.complete(task_id, "w1", {"success": True, "video_path": "x.mp4", "error": None})
+    assert queue.get(task_id)["status"] == "failed"
+
+
+def test_cancel_leaves_finished_tasks_alone(queue):
+    task_id = queue.enqueue({"className": "Fast"})
+    queue.lease("w1", 60)
+    queue.complete(task_id, "w1", {"success": True, "video_path": "x.mp4", "error": None})
+    assert not queue.cancel(task_id, {"success": False, "video_path": None, "error": "gave up"})
+    assert queue.get(task_id)["status"] == "done"
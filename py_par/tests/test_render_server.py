@@ -0,0 +1,109 @@
+"""
+Tests for the warm render server's worker pool
+"""
+
+import threading
+import time
+
+import pytest
+
+import render_server
+from render_server import RenderServer, RenderServerUnavailable
+
+
+class FakeWorker:
+    """
+    Stands in for a worker process; start_times maps how long each start takes
+    """
+
+    start_times = []
+    fail = False
+
+    def __init__(self, max_jobs, job_timeout):
+        self.warmed = False
+        self.start_time = FakeWorker.start_times.pop(0) if FakeWorker.start_times else 0
+
+    @property
+    def is_warm(self):
+        return self.warmed
+
+    def warm(self):
+        if not self.warmed:
+            time.sleep(self.start_time)
+            if FakeWorker.fail:
+                raise RenderServerUnavailable("no manim")
+            self.warmed = True
+
+    def render(self, job):
+        self.warm()
+        return {"success": True, "video_path": job["name"], "error": None, "start_time": self.start_time}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    monkeypatch.setattr(render_server, "RenderWorker", FakeWorker)
+    FakeWorker.start_times = []
+    FakeWorker.fail = False
+    return FakeWorker
+
+
+def test_warm_starts_workers_in_parallel(fake_workers):
+    fake_workers.start_times = [0.3, 0.3, 0.3, 0.3]
+    server = RenderServer(4)
+    start = time.monotonic()
+    server.warm()
+    assert time.monotonic() - start < 0.9
+    assert all(worker.is_warm for worker in server._free)
+    assert len(server._free) == 4
+
+
+def test_render_gets_the_first_worker_that_is_ready(fake_workers):
+    fake_workers.start_times = [1.0, 0.1]
+    server = RenderServer(2)
+    warming = threading.Thread(target=server.warm)
+    warming.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    result = server.render({"name": "scene_1"})
+    assert time.monotonic() - start < 0.6
+    assert result["start_time"] == 0.1
+    warming.join()
+
+
+def test_warm_skips_workers_that_are_already_warm(fake_workers):
+    fake_workers.start_times = [0.0, 0.5]
+    server = RenderServer(1)
+    server.warm()
+    server.grow(2)
+    start = time.monotonic()
+    server.warm()
+    assert 0.4 < time.monotonic() - start < 0.9
+    assert len(server._free) == 2
+
+
+def test_warm_failure_raises_after_every_start(fake_workers):
+    fake_workers.fail = True
+    server = RenderServer(3)
+    with pytest.raises(RenderServerUnavailable):
+        server.warm()
+    # Failed workers go back to the pool, cold
+    assert len(server._free) == 3
+
+
+def test_waiting_jobs_run_in_priority_order(fake_workers):
+    server = RenderServer(1)
+    order = []
+    worker = server._acquire(0)
+    threads = []
+    for priority, name in ((10, "final"), (0, "preview")):
+        thread = threading.Thread(target=lambda p=priority, n=name: order.append(server.render({"name": n, "priority": p})["video_path"]))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    server._release(worker)
+    for thread in threads:
+        thread.join()
+    assert order == ["preview", "final"]
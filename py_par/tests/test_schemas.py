@@ -0,0 +1,71 @@
+"""
+Tests for the per-phase JSON schemas and their validator
+"""
+
+import pytest
+
+from schemas import PHASE_SCHEMAS, response_format, schema_for, validate_against_schema
+
+
+def walk_objects(schema):
+    if schema.get("type") == "object":
+        yield schema
+        for child in schema.get("properties", {}).values():
+            yield from walk_objects(child)
+    if "items" in schema:
+        yield from walk_objects(schema["items"])
+
+
+@pytest.mark.parametrize("phase", sorted(PHASE_SCHEMAS))
+def test_schemas_are_strict(phase):
+    # Strict structured output rejects schemas with optional or extra properties
+    _, schema = PHASE_SCHEMAS[phase]
+    for obj in walk_objects(schema):
+        assert obj["additionalProperties"] is False
+        assert sorted(obj["required"]) == sorted(obj["properties"])
+
+
+def test_schema_for_follows_env(monkeypatch):
+    monkeypatch.delenv("LLM_STRUCTURED_OUTPUT", raising=False)
+    assert schema_for(1) is None
+    monkeypatch.setenv("LLM_STRUCTURED_OUTPUT", "1")
+    assert schema_for(2) == PHASE_SCHEMAS[2]
+
+
+def test_response_format():
+    name, schema = PHASE_SCHEMAS[1]
+    spec = response_format(name, schema)
+    assert spec["type"] == "json_schema"
+    assert spec["json_schema"] == {"name": name, "strict": True, "schema": schema}
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "level": {"type": "string", "enum": ["intro", "advanced"]},
+        "steps": {"type": "array", "items": {"type": "integer"}},
+        "note": {"type": ["string", "null"]}
+    },
+    "required": ["title", "steps"],
+    "additionalProperties": False
+}
+
+
+def test_valid_value():
+    assert validate_against_schema({"title": "t", "level": "intro", "steps": [1, 2], "note": None}, SCHEMA) == []
+
+
+def test_reports_every_error_with_its_path():
+    errors = validate_against_schema({"level": "expert", "steps": [1, "two", True], "extra": 1}, SCHEMA)
+    assert errors == [
+        "$: missing required property 'title'",
+        "$.level: 'expert' is not one of ['intro', 'advanced']",
+        "$.steps[1]: expected integer, got str",
+        "$.steps[2]: expected integer, got bool",
+        "$: unexpected property 'extra'"
+    ]
+
+
+def test_wrong_top_level_type():
+    assert validate_against_schema([], SCHEMA) == ["$: expected object, got list"]
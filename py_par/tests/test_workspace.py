@@ -0,0 +1,31 @@
+"""
+Tests for job workspace paths
+"""
+
+import os
+
+import pytest
+
+from workspace import create_workspace, get_workspace_root, workspace_path
+
+
+def test_workspace_root_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("WORKSPACE_ROOT", str(tmp_path))
+    assert get_workspace_root() == str(tmp_path)
+    assert get_workspace_root(str(tmp_path / "other")) == str(tmp_path / "other")
+
+
+def test_workspace_path_is_under_root(tmp_path):
+    assert workspace_path("job_1", str(tmp_path)) == os.path.join(str(tmp_path), "job_1")
+
+
+@pytest.mark.parametrize("job_id", ["", ".", "..", "../escape", "a/b", "/abs", "a\\b"])
+def test_workspace_path_rejects_unsafe_ids(job_id, tmp_path):
+    with pytest.raises(ValueError):
+        workspace_path(job_id, str(tmp_path))
+
+
+def test_create_workspace_is_idempotent(tmp_path):
+    path = create_workspace("job_1", str(tmp_path))
+    assert os.path.isdir(path)
+    assert create_workspace("job_1", str(tmp_path)) == path
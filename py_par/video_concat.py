@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Checked video concatenation
+Probes every input once, stream-copies when all inputs are compatible and
+otherwise re-encodes only the inputs that do not match the majority format
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+# ffprobe and ffmpeg are mostly I/O and single-stream work, so a few run at once
+DEFAULT_CONCAT_WORKERS = max(1, min(8, os.cpu_count() or 2))
+
+# Encoders that reproduce the codec of the majority of the inputs
+CODEC_ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+    "vp9": "libvpx-vp9",
+    "prores": "prores_ks",
+    "mpeg4": "mpeg4"
+}
+
+def probe_video(path: str) -> Dict[str, Any]:
+    """
+    Read the stream parameters that decide whether a file can be stream-copied into a concat
+
+    Raises subprocess.CalledProcessError or FileNotFoundError when ffprobe fails.
+    """
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_streams", "-of", "json", path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    streams = json.loads(output).get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    return {
+        "path": path,
+        "video": {
+            "codec": video.get("codec_name"),
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "fps": video.get("r_frame_rate"),
+            "time_base": video.get("time_base"),
+            "pix_fmt": video.get("pix_fmt")
+        },
+        "audio": {
+            "codec": audio.get("codec_name"),
+            "sample_rate": audio.get("sample_rate"),
+            "channels": audio.get("channels")
+        } if audio else None
+    }
+
+def stream_signature(probe: Dict[str, Any]) -> Tuple:
+    """
+    Everything that must be identical across inputs for `-c copy` to be safe
+    """
+    video = probe["video"]
+    audio = probe["audio"] or {}
+    return (
+        video["codec"], video["width"], video["height"], video["fps"], video["time_base"], video["pix_fmt"],
+        audio.get("codec"), audio.get("sample_rate"), audio.get("channels")
+    )
+
+def describe_mismatch(probe: Dict[str, Any], target: Dict[str, Any]) -> str:
+    """
+    Name the stream parameters in which an input differs from the target
+    """
+    differences = []
+    for key, value in probe["video"].items():
+        if value != target["video"][key]:
+            differences.append(f"{key} {value} != {target['video'][key]}")
+    if (probe["audio"] is None) != (target["audio"] is None):
+        differences.append("audio " + ("missing" if probe["audio"] is None else "unexpected"))
+    elif probe["audio"] != target["audio"]:
+        differences.append("audio parameters")
+    return ", ".join(differences)
+
+def build_conform_command(source: Dict[str, Any], target: Dict[str, Any], dest: str) -> List[str]:
+    """
+    Build the ffmpeg command that re-encodes a probed input to match the target's streams
+    """
+    video = target["video"]
+    audio = target["audio"]
+    command = ["ffmpeg", "-v", "error", "-y", "-i", source["path"]]
+    add_silence = audio and source["audio"] is None
+    if add_silence:
+        # Silent track for inputs without audio; -shortest stops it at the video's end
+        layout = "mono" if audio["channels"] == 1 else "stereo"
+        command += ["-f", "lavfi", "-i", f"anullsrc=r={audio['sample_rate']}:cl={layout}"]
+    command += [
+        "-map", "0:v:0",
+        "-vf", f"scale={video['width']}:{video['height']},fps={video['fps']},format={video['pix_fmt']}",
+        "-c:v", CODEC_ENCODERS.get(video["codec"], "libx264")
+    ]
+    if video["time_base"]:
+        command += ["-video_track_timescale", video["time_base"].split("/")[-1]]
+    if audio:
+        command += [
+            "-map", "1:a:0" if add_silence else "0:a:0",
+            "-c:a", audio["codec"] if audio["codec"] in ("aac", "opus", "mp3") else "aac",
+            "-ar", str(audio["sample_rate"]), "-ac", str(audio["channels"]),
+            "-shortest"
+        ]
+    else:
+        command.append("-an")
+    command.append(dest)
+    return command
+
+def _run_concat(paths: List[str], output_path: str, work_dir: str) -> None:
+    list_path = os.path.join(work_dir, "videos_to_concat.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            # The concat demuxer needs single quotes in paths escaped
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", "-y", output_path],
+        check=True, capture_output=True, text=True
+    )
+
+def concat_videos(paths: List[str], output_path: str, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Concatenate videos, stream-copying wherever the inputs allow
+
+    Every input is probed in parallel. When all inputs share codec, resolution,
+    frame rate, time base and audio layout they are concatenated with stream copy.
+    Otherwise the inputs that differ from the most common format are re-encoded to
+    it in parallel first. Returns a report with the path taken:
+    {"output", "mode": "copy" | "reencode" | "unchecked", "reencoded": [...], "mismatches": {...}}.
+    Raises subprocess.CalledProcessError or FileNotFoundError when ffmpeg fails.
+    """
+    workers = max(1, min(max_workers or DEFAULT_CONCAT_WORKERS, len(paths)))
+    report = {"output": output_path, "mode": "copy", "reencoded": [], "mismatches": {}}
+    work_dir = tempfile.mkdtemp(prefix="concat_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ffprobe") as executor:
+                probes = list(executor.map(probe_video, paths))
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError) as e:
+            # Without ffprobe the inputs cannot be checked; stream copy is the old behaviour
+            print(f"⚠️  Could not probe videos, concatenating without checks: {e}")
+            report["mode"] = "unchecked"
+            _run_concat(paths, output_path, work_dir)
+            return report
+
+        signatures = [stream_signature(probe) for probe in probes]
+        # Conform to the format most inputs already have; ties go to the earliest input
+        counts = Counter(signatures)
+        target_signature = max(signatures, key=lambda signature: counts[signature])
+        target = probes[signatures.index(target_signature)]
+
+        inputs = list(paths)
+        mismatched = [i for i, signature in enumerate(signatures) if signature != target_signature]
+        if mismatched:
+            report["mode"] = "reencode"
+            report["mismatches"] = {paths[i]: describe_mismatch(probes[i], target) for i in mismatched}
+
+            def conform(i: int) -> str:
+                dest = os.path.join(work_dir, f"conformed_{i}{os.path.splitext(output_path)[1] or '.mp4'}")
+                subprocess.run(build_conform_command(probes[i], target, dest), check=True, capture_output=True, text=True)
+                return dest
+
+            with ThreadPoolExecutor(max_workers=min(workers, len(mismatched)), thread_name_prefix="conform") as executor:
+                for i, dest in zip(mismatched, executor.map(conform, mismatched)):
+                    inputs[i] = dest
+                    report["reencoded"].append(paths[i])
+
+        _run_concat(inputs, output_path, work_dir)
+        return report
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Per-job workspaces
+Every lesson or render job writes its scene maps, generated code, media and
+videos into its own directory, so concurrent jobs never share output paths
+"""
+
+import os
+from typing import Optional
+
+# Set the location with the WORKSPACE_ROOT env var
+DEFAULT_WORKSPACE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outputs", "jobs")
+
+def get_workspace_root(root: Optional[str] = None) -> str:
+    """
+    Resolve the directory job workspaces are created in from the argument or WORKSPACE_ROOT env var
+    """
+    return os.path.abspath(root or os.getenv("WORKSPACE_ROOT", DEFAULT_WORKSPACE_ROOT))
+
+def workspace_path(job_id: str, root: Optional[str] = None) -> str:
+    """
+    Get the workspace directory of a job
+
+    Raises ValueError for job ids that are not a single path component.
+    """
+    if not job_id or job_id in (".", "..") or os.path.basename(job_id) != job_id or "\\" in job_id:
+        raise ValueError(f"Invalid job id for a workspace: {job_id!r}")
+    return os.path.join(get_workspace_root(root), job_id)
+
+def create_workspace(job_id: str, root: Optional[str] = None) -> str:
+    """
+    Create the workspace directory of a job and return its absolute path
+    """
+    path = workspace_path(job_id, root)
+    os.makedirs(path, exist_ok=True)
+    return path
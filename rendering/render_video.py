@@ -1,25 +1,34 @@
 import shutil
 import os
-import subprocess
+import sys
+from pathlib import Path
+
+# Render through the py_par render pool so scenes share warm Manim workers
+sys.path.append(str(Path(__file__).parent.parent / "py_par"))
+from render_pool import render_scenes
+from video_concat import concat_videos
+
+def render_video(results_json, profile=None, output_dir="."):
+    # Every path is built from output_dir, so nothing depends on the working directory
+    generated_dir = os.path.join(output_dir, "generated")
+    combined_path = os.path.join(output_dir, "combined.mp4")
 
-def render_video(results_json):
     # Step 1. clean up generated code
-    if os.path.exists("combined.mp4"):
-        os.remove("combined.mp4")
-    shutil.rmtree("generated", ignore_errors=True)
-    os.mkdir("generated")
+    if os.path.exists(combined_path):
+        os.remove(combined_path)
+    shutil.rmtree(generated_dir, ignore_errors=True)
+    os.makedirs(generated_dir)
 
     # Step 2. generate code
     for file in results_json['sceneFiles']:
         filename = file['filename']
-        with open("generated/" + filename, "w", encoding="utf-8") as f:
+        with open(os.path.join(generated_dir, filename), "w", encoding="utf-8") as f:
             f.write(file['code'])
 
-    with open("generated/" + results_json['masterFile']['filename'], "w", encoding="utf-8") as f:
+    with open(os.path.join(generated_dir, results_json['masterFile']['filename']), "w", encoding="utf-8") as f:
         f.write(results_json['masterFile']['content'])
 
     # Step 3: render each scene
-    os.chdir("generated")
     scenes = [
         ("master_animation.py", "MasterExplainerScene"),
     ]
@@ -29,32 +38,23 @@ def render_video(results_json):
 
     videos = []
 
-    for fname, scene in scenes:
-        try:
-            subprocess.run(["manim", "-qm", fname, scene], check=True)
-            print(f"Rendered {fname}")
-            videos.append(f"./media/videos/{fname.replace('.py', '')}/720p30/{scene}.mp4")
-        except Exception as e:
-            print(f"Error rendering {fname}: {e}")
+    lesson = results_json.get('lessonPlan', {}).get('title')
+    jobs = [{"filename": fname, "className": scene, "workdir": generated_dir, "profile": profile, "lesson": lesson} for fname, scene in scenes]
+    for result in render_scenes(jobs):
+        if result["success"]:
+            print(f"Rendered {result['filename']}")
+            videos.append(result["video_path"])
+        else:
+            print(f"Error rendering {result['filename']}: {result['error']}")
     
-    # Step 4: combine videos
-    # Write the list of video files to a text file for ffmpeg concat
-    with open("videos_to_concat.txt", "w", encoding="utf-8") as f:
-        for video in videos:
-            f.write(f"file '{video}'\n")
-
-    # Use ffmpeg with -f concat to combine the videos
-    subprocess.run([
-        "ffmpeg",
-        "-f", "concat",
-        "-safe", "0",
-        "-i", "videos_to_concat.txt",
-        "-c", "copy",
-        "combined.mp4"
-    ])
+    if not videos:
+        print("No videos rendered, nothing to combine")
+        return None
 
-    # Step 5: copy the combined video to the root directory
-    shutil.copy("combined.mp4", "../combined.mp4")
+    # Step 4: combine videos, stream copy unless some differ in format
+    report = concat_videos(videos, combined_path)
+    print(f"Combined {len(videos)} videos ({report['mode']}, {len(report['reencoded'])} re-encoded)")
+    return combined_path
     
 
 if __name__ == "__main__":
@@ -62,4 +62,5 @@ if __name__ == "__main__":
 
     results_json = json.load(open("result.json", "r", encoding="utf-8"))
 
-    render_video(results_json)
\ No newline at end of file
+    # Optional render profile name and output directory, e.g. `python render_video.py mobile out`
+    render_video(results_json, sys.argv[1] if len(sys.argv) > 1 else None, sys.argv[2] if len(sys.argv) > 2 else ".")
\ No newline at end of file